@@ -0,0 +1,59 @@
+"""
+Micro-benchmark for the high/low-pass stages of the preprocessing pipeline.
+
+Compares the previous implementation (two (b, a) Butterworth designs per call and two
+float64 filtfilt passes) against the cached SOS cascade in SpeechFilterBank, both as a
+single causal float32 pass and in zero-phase mode.
+
+Usage:
+    python benchmarks/filter_bank.py
+    python benchmarks/filter_bank.py --seconds 120 --sr 48000 --repeat 10
+"""
+import argparse
+import sys
+import timeit
+from pathlib import Path
+
+import numpy as np
+from scipy import signal
+
+SRC_DIR = Path(__file__).resolve().parents[1] / "src"
+sys.path.insert(0, str(SRC_DIR))
+
+from model.audio_filters import SpeechFilterBank  # noqa: E402
+
+
+def legacy_filters(y, sr):
+    b, a = signal.butter(5, 300 / (sr / 2), 'highpass')
+    y = signal.filtfilt(b, a, y)
+    b, a = signal.butter(5, 8000 / (sr / 2), 'lowpass')
+    return signal.filtfilt(b, a, y)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--seconds", type=float, default=60)
+    parser.add_argument("--sr", type=int, default=44100)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    y = (0.1 * rng.standard_normal(int(args.seconds * args.sr))).astype(np.float32)
+    SpeechFilterBank.design(args.sr)  # warm the cache, as on a long-running worker
+
+    cases = {
+        "legacy filtfilt x2 (float64)": lambda: legacy_filters(y, args.sr),
+        "SOS cascade, zero-phase": lambda: SpeechFilterBank.apply(y, args.sr, zero_phase=True),
+        "SOS cascade, single pass": lambda: SpeechFilterBank.apply(y, args.sr),
+    }
+
+    baseline = None
+    print(f"{args.seconds:g}s of audio at {args.sr} Hz, best of {args.repeat}")
+    for name, fn in cases.items():
+        best = min(timeit.repeat(fn, number=1, repeat=args.repeat))
+        baseline = baseline or best
+        print(f"{name:<30} {best * 1000:>9.1f} ms  {baseline / best:>5.2f}x")
+
+
+if __name__ == "__main__":
+    main()
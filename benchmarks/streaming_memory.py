@@ -0,0 +1,95 @@
+"""
+Peak-RSS benchmark for the block-streaming preprocessing engine.
+
+Each duration is processed in a fresh subprocess so ru_maxrss reflects only that run.
+The synthetic recording is generated block by block, so generation itself stays flat too.
+
+Usage:
+    python benchmarks/streaming_memory.py
+    python benchmarks/streaming_memory.py --minutes 1 10 60 --sr 44100 --compare
+"""
+import argparse
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+SRC_DIR = Path(__file__).resolve().parents[1] / "src"
+sys.path.insert(0, str(SRC_DIR))
+
+
+def generate_recording(path, minutes, sr, block_seconds=10):
+    """Write a dictation-like signal (bursts of harmonics over background noise)."""
+    import numpy as np
+    import soundfile as sf
+
+    rng = np.random.default_rng(0)
+    total = int(minutes * 60 * sr)
+    block = int(block_seconds * sr)
+    with sf.SoundFile(path, "w", samplerate=sr, channels=1, subtype="PCM_16") as out:
+        for start in range(0, total, block):
+            t = (np.arange(start, min(start + block, total)) / sr).astype(np.float32)
+            voiced = (np.sin(2 * np.pi * 0.3 * t) > -0.2).astype(np.float32)
+            speech = sum(np.sin(2 * np.pi * f * t) / k for k, f in enumerate((180, 360, 720, 1440), 1))
+            noise = 0.02 * rng.standard_normal(len(t)).astype(np.float32)
+            out.write(0.2 * voiced * speech + noise)
+
+
+def run_worker(mode, input_path):
+    from model.audio_preprocessing import AudioPreprocessingService
+
+    output_path = input_path + f".{mode}.out.wav"
+    t0 = time.perf_counter()
+    AudioPreprocessingService.preprocess_audio(input_path, output_path, streaming=(mode == "streaming"))
+    elapsed = time.perf_counter() - t0
+    os.remove(output_path)
+    peak_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    print(json.dumps({"seconds": elapsed, "peak_rss_mb": peak_kb / 1024}))
+
+
+def measure(mode, input_path):
+    proc = subprocess.run(
+        [sys.executable, __file__, "--worker", mode, input_path],
+        capture_output=True, text=True,
+    )
+    if proc.returncode != 0:
+        # e.g. the in-memory path being OOM-killed on long recordings
+        return None
+    return json.loads(proc.stdout.strip().splitlines()[-1])
+
+
+def format_result(result):
+    if result is None:
+        return f"{'failed':>14} {'-':>13}"
+    return f"{result['peak_rss_mb']:>14.1f} {result['seconds']:>13.1f}"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--minutes", type=float, nargs="+", default=[1, 5, 15, 30, 60])
+    parser.add_argument("--sr", type=int, default=44100)
+    parser.add_argument("--compare", action="store_true", help="Also run the in-memory path")
+    parser.add_argument("--worker", nargs=2, metavar=("MODE", "PATH"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        run_worker(*args.worker)
+        return
+
+    modes = ["streaming", "in_memory"] if args.compare else ["streaming"]
+    print(f"{'minutes':>8} " + " ".join(f"{m + ' MB':>14} {m + ' s':>13}" for m in modes))
+    with tempfile.TemporaryDirectory() as tmp:
+        for minutes in args.minutes:
+            path = os.path.join(tmp, f"recording_{minutes}m.wav")
+            generate_recording(path, minutes, args.sr)
+            results = [measure(mode, path) for mode in modes]
+            os.remove(path)
+            print(f"{minutes:>8g} " + " ".join(format_result(r) for r in results))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,8 +1,9 @@
-import os
 import json
+import asyncio
 import logging
 import aiofiles
 import time
+from contextlib import aclosing
 from pathlib import Path
 from typing import Optional, Dict, Any, AsyncGenerator
 from fastapi import UploadFile
@@ -12,6 +13,7 @@ from model.speech_service import SpeechService
 from model.input_validator import MedicalValidator
 from model.llm_service import LLMService
 from model.extract_features import ExtractFeature
+from utils.upload_spool import UploadSpool
 
 # ---- Setup ----
 logger = logging.getLogger("medical_voice_assistant")
@@ -32,6 +34,14 @@ async def save_json(payload: Dict[str, Any]) -> Path:
         await f.write(json.dumps(payload, ensure_ascii=False, indent=2))
     return out_path
 
+
+async def _save_output(final_payload: Dict[str, Any], persist_task: Optional[asyncio.Task]) -> None:
+    """Save the payload once the original upload (if being persisted) is on disk."""
+    if persist_task:
+        await persist_task
+    await save_json(final_payload)
+    logger.info(f"Output saved for visit_id={final_payload.get('visit_id')} (mode: {final_payload.get('mode')})")
+
 DEFAULT_FEATURES = """{
     "chief_complaint": "string",
     "icd10_codes": ["string"],
@@ -67,36 +77,47 @@ async def run_pipeline_streaming(
     features: Optional[str] = None,
     uploaded_file: Optional[UploadFile] = None,
     audio_path: Optional[str] = None,
+    fused_refine_translate: Optional[bool] = None,
 ) -> AsyncGenerator[Dict[str, Any], None]:
     """
     Streaming pipeline that yields progress updates for each phase with word-by-word streaming.
+
+    An uploaded file is handed to preprocessing straight from its upload spool; when save is
+    set, the original is written to AUDIO_DIR concurrently instead of before processing.
+    With fused_refine_translate (default: Config.FUSED_REFINE_TRANSLATE), Arabic text is
+    refined and translated by one LLM call whose output still streams as the separate
+    refinement and translation phases.
     """
-    temp_path = None
+    persist_task = None
+    fused_stream = None
     final_payload = {}
+    pipeline_t0 = time.perf_counter()
 
     try:
         # --- Determine audio source ---
         if uploaded_file:
-            suffix = Path(uploaded_file.filename).suffix or ".wav"
-            temp_path = AUDIO_DIR / f"{visit_id}{suffix}"
-            async with aiofiles.open(temp_path, "wb") as out:
-                while chunk := await uploaded_file.read(8192):
-                    await out.write(chunk)
-            audio_path = str(temp_path)
-            logger.info(f"Uploaded file saved: {audio_path}")
+            spool = UploadSpool(uploaded_file)
+            audio_source = spool.source()
+            source_name = uploaded_file.filename
+            if save:
+                suffix = Path(uploaded_file.filename).suffix or ".wav"
+                audio_path = str(AUDIO_DIR / f"{visit_id}{suffix}")
+                persist_task = asyncio.create_task(spool.persist(audio_path))
+                source_name = audio_path
         elif not audio_path:
             raise ValueError("Either 'audio_path' or 'file' must be provided.")
-
-        if not Path(audio_path).exists():
-            raise FileNotFoundError(f"Audio file not found: {audio_path}")
+        else:
+            if not Path(audio_path).exists():
+                raise FileNotFoundError(f"Audio file not found: {audio_path}")
+            audio_source = source_name = str(audio_path)
 
         mode = "conversation" if is_conversation else "doctor"
-        api_key = Config.SPEECH_API_KEY or Config.FIREWORKS_API_KEY
+        api_key = Config.stage_api_key("speech")
 
         # Initialize final payload with metadata
         final_payload = {
             "visit_id": visit_id,
-            "source_audio": str(audio_path),
+            "source_audio": source_name,
             "language": language,
             "patient_name": patient_name,
             "patient_id": patient_id,
@@ -118,7 +139,7 @@ async def run_pipeline_streaming(
         meta = {}
         
         async for chunk, chunk_meta in SpeechService.transcribe_audio_stream(
-            str(audio_path),
+            audio_source,
             api_key=api_key,
             language=language,
             preprocess=True,
@@ -147,70 +168,52 @@ async def run_pipeline_streaming(
             "timing": timing
         }
 
-        # --- Phase 2: Medical validation ---
-        yield {
-            "phase": "validation",
-            "status": "processing",
-            "message": "Validating medical content..."
-        }
-
-        t0 = time.perf_counter()
-        validation = MedicalValidator.validate_medical_content(raw_text) or {}
-        timing = time.perf_counter() - t0
-        final_payload["meta"]["timings"]["validation"] = timing
-        final_payload["is_medical"] = bool(validation.get("is_medical"))
-        final_payload["classification"] = validation.get("classification")
-        final_payload["confidence"] = validation.get("confidence")
-
-        yield {
-            "phase": "validation",
-            "status": "complete",
-            "result": {
-                "is_medical": final_payload["is_medical"],
-                "classification": final_payload["classification"],
-                "confidence": final_payload["confidence"]
-            },
-            "timing": timing
-        }
-
-        # --- Phase 3: Refinement (STREAMING) ---
-        yield {
-            "phase": "refinement",
-            "status": "processing",
-            "message": f"Refining text ({mode} mode)...",
-            "stream_start": True
-        }
-
-        t0 = time.perf_counter()
-        refined_text = ""
-        
-        if language.lower().startswith("ar"):
+        # --- Phases 2 & 3: Medical validation overlapped with refinement (STREAMING) ---
+        # Refinement starts speculatively; a confident NON_MEDICAL verdict cancels it and ends the stream
+        if fused_refine_translate is None:
+            fused_refine_translate = Config.FUSED_REFINE_TRANSLATE
+        if language.lower().startswith("ar") and fused_refine_translate:
+            fused_stream = LLMService.refine_translate_ar_stream(
+                raw_text, Config.stage_api_key("refine"), is_conversation=is_conversation
+            )
+            final_payload["meta"]["fused_refine_translate"] = True
+            stream_generator = fused_stream.section("refinement")
+        elif language.lower().startswith("ar"):
             stream_generator = LLMService.refine_ar_transcription_stream(
-                raw_text, api_key, is_conversation=is_conversation
+                raw_text, Config.stage_api_key("refine"), is_conversation=is_conversation
             )
         else:
             stream_generator = LLMService.refine_en_transcription_stream(
-                raw_text, api_key, is_conversation=is_conversation
+                raw_text, Config.stage_api_key("refine"), is_conversation=is_conversation
             )
-        
-        async for chunk in stream_generator:
-            refined_text += chunk
+
+        short_circuit = False
+        async with aclosing(_interleave(
+            _validation_phase(raw_text, final_payload),
+            _refinement_phase(stream_generator, mode, final_payload),
+        )) as events:
+            async for event in events:
+                yield event
+                if event["phase"] == "validation" and event["status"] == "complete":
+                    short_circuit = _is_confidently_non_medical(final_payload)
+                    if short_circuit:
+                        break
+
+        if short_circuit:
+            logger.info(f"Non-medical audio for visit_id={visit_id}; skipping the remaining stages")
+            final_payload["meta"]["short_circuit"] = "non_medical"
+            final_payload["meta"]["timings"]["total"] = time.perf_counter() - pipeline_t0
+            if save:
+                await _save_output(final_payload, persist_task)
             yield {
-                "phase": "refinement",
-                "status": "streaming",
-                "chunk": chunk
+                "phase": "short_circuit",
+                "status": "complete",
+                "message": "The recording does not contain medical content; processing stopped.",
+                "result": final_payload
             }
-        
-        timing = time.perf_counter() - t0
-        final_payload["meta"]["timings"]["refine_text"] = timing
-        final_payload["refined_text"] = refined_text
+            return
 
-        yield {
-            "phase": "refinement",
-            "status": "complete",
-            "result": refined_text,
-            "timing": timing
-        }
+        refined_text = final_payload["refined_text"]
 
         # --- Phase 4: Translation (STREAMING) ---
         yield {
@@ -232,9 +235,14 @@ async def run_pipeline_streaming(
                 "timing": 0
             }
         else:
-            async for chunk in LLMService.translate_to_eng_stream(
-                refined_text, api_key, is_conversation=is_conversation
-            ):
+            if fused_stream is not None:
+                # The rest of the same completion
+                stream_generator = fused_stream.section("translation")
+            else:
+                stream_generator = LLMService.translate_to_eng_stream(
+                    refined_text, Config.stage_api_key("translation"), is_conversation=is_conversation
+                )
+            async for chunk in stream_generator:
                 translated_text += chunk
                 yield {
                     "phase": "translation",
@@ -258,110 +266,28 @@ async def run_pipeline_streaming(
         final_payload["translated_text"] = translated_text
 
 
-        # --- Phase 5: Feature Extraction (STREAMING) ---
-        # In your audio_preprocessing.py, update the extraction phase:
-
-        yield {
-            "phase": "extraction",
-            "status": "processing",
-            "message": "Extracting medical features...",
-            "stream_start": True
-        }
-
-        t0 = time.perf_counter()
-        extraction_json = ""
-
-        # Determine features schema
+        # --- Phases 5 & 6: Feature extraction and question generation (CONCURRENT, STREAMING) ---
+        # Both only need the translated text; their events are interleaved as they arrive
         if is_conversation and not features:
             schema_text = DEFAULT_CONVERSATION_FEATURES
         else:
             schema_text = features or DEFAULT_FEATURES
 
-        async for chunk in ExtractFeature.extract_stream(
-            translated_text, schema_text, is_conversation=is_conversation
-        ):
-            extraction_json += chunk
-            yield {
-                "phase": "extraction",
-                "status": "streaming",
-                "chunk": chunk
-            }
-
-        timing = time.perf_counter() - t0
-        final_payload["meta"]["timings"]["feature_extraction"] = timing
-
-        # Parse extraction JSON
-        try:
-            extraction_data = json.loads(extraction_json.strip())
-            final_payload["json_data"] = extraction_data.get("json_data", {})
-            final_payload["extraction_reasoning"] = extraction_data.get("reasoning", "")
-        except json.JSONDecodeError as e:
-            logger.error(f"Failed to parse extraction JSON: {e}")
-            final_payload["json_data"] = {}
-            final_payload["extraction_reasoning"] = f"Error parsing: {str(e)}"
-
-        yield {
-            "phase": "extraction",
-            "status": "complete",
-            "result": {
-                "json_data": final_payload["json_data"],
-                "reasoning": final_payload["extraction_reasoning"]
-            },
-            "timing": timing
-        }
-
-        # --- Phase 6: Question Generation (STREAMING) ---
-        yield {
-            "phase": "questions",
-            "status": "processing",
-            "message": "Generating medical questions...",
-            "stream_start": True
-        }
-
-        t0 = time.perf_counter()
-        questions_json = ""
-        
-        async for chunk in LLMService.generate_questions_stream(
-            translated_text, api_key, is_conversation=is_conversation
-        ):
-            questions_json += chunk
-            yield {
-                "phase": "questions",
-                "status": "streaming",
-                "chunk": chunk
-            }
-        
-        timing = time.perf_counter() - t0
-        final_payload["meta"]["timings"]["question_generation"] = timing
-        
-        # Parse questions JSON
-        try:
-            questions_data = json.loads(questions_json.strip())
-            final_payload["questions"] = questions_data.get("questions", [])
-            final_payload["reasoning"] = questions_data.get("reasoning", "")
-        except json.JSONDecodeError as e:
-            logger.error(f"Failed to parse questions JSON: {e}")
-            final_payload["questions"] = []
-            final_payload["reasoning"] = f"Error parsing: {str(e)}"
-
-        yield {
-            "phase": "questions",
-            "status": "complete",
-            "result": {
-                "questions": final_payload["questions"],
-                "reasoning": final_payload["reasoning"]
-            },
-            "timing": timing
-        }
+        # aclosing: on client disconnect both background LLM calls are cancelled right away
+        async with aclosing(_interleave(
+            _extraction_phase(translated_text, schema_text, is_conversation, final_payload),
+            _questions_phase(translated_text, is_conversation, final_payload),
+        )) as events:
+            async for event in events:
+                yield event
 
         # --- Calculate total time ---
-        total_time = sum(final_payload["meta"]["timings"].values())
-        final_payload["meta"]["timings"]["total"] = total_time
+        # Wall clock: phases 5 and 6 overlap, so their timings no longer add up
+        final_payload["meta"]["timings"]["total"] = time.perf_counter() - pipeline_t0
 
         # --- Save if requested ---
         if save:
-            await save_json(final_payload)
-            logger.info(f"Output saved for visit_id={visit_id} (mode: {mode})")
+            await _save_output(final_payload, persist_task)
 
         # --- Final complete event ---
         yield {
@@ -380,9 +306,218 @@ async def run_pipeline_streaming(
         raise
 
     finally:
-        if temp_path and not save:
-            try:
-                os.remove(temp_path)
-                logger.info(f"Temporary file deleted: {temp_path}")
-            except OSError:
-                pass
\ No newline at end of file
+        if fused_stream is not None:
+            await fused_stream.aclose()
+        if persist_task and not persist_task.done():
+            # Keep the original even if processing failed; the spool is still open here
+            await asyncio.gather(persist_task, return_exceptions=True)
+
+
+# ---- Concurrent phases ----
+async def _validation_phase(raw_text: str, final_payload: Dict[str, Any]) -> AsyncGenerator[Dict[str, Any], None]:
+    """Phase 2: classify the transcript as medical or not and record the verdict in final_payload."""
+    yield {
+        "phase": "validation",
+        "status": "processing",
+        "message": "Validating medical content..."
+    }
+
+    t0 = time.perf_counter()
+    validation = await MedicalValidator.validate_medical_content_async(raw_text) or {}
+    timing = time.perf_counter() - t0
+    final_payload["meta"]["timings"]["validation"] = timing
+    final_payload["is_medical"] = bool(validation.get("is_medical"))
+    final_payload["classification"] = validation.get("classification")
+    final_payload["confidence"] = validation.get("confidence")
+    # Which path decided: the local lexicon or the LLM (uncertain lexicon score)
+    final_payload["meta"]["validation_method"] = validation.get("method")
+    final_payload["meta"]["lexicon_score"] = validation.get("lexicon_score")
+
+    yield {
+        "phase": "validation",
+        "status": "complete",
+        "result": {
+            "is_medical": final_payload["is_medical"],
+            "classification": final_payload["classification"],
+            "confidence": final_payload["confidence"],
+            "method": validation.get("method")
+        },
+        "timing": timing
+    }
+
+
+def _is_confidently_non_medical(final_payload: Dict[str, Any]) -> bool:
+    """
+    A definite NON_MEDICAL verdict (not a failed validation) from the LLM, at or above the
+    configured confidence. Lexicon verdicts never stop the pipeline on their own.
+    """
+    return (
+        final_payload.get("meta", {}).get("validation_method") == "llm_validation"
+        and bool(final_payload.get("classification"))
+        and not final_payload.get("is_medical")
+        and (final_payload.get("confidence") or 0) >= Config.NON_MEDICAL_SHORT_CIRCUIT_CONFIDENCE
+    )
+
+
+async def _refinement_phase(
+    stream_generator: AsyncGenerator[str, None], mode: str, final_payload: Dict[str, Any]
+) -> AsyncGenerator[Dict[str, Any], None]:
+    """Phase 3: stream the refined text and record it in final_payload."""
+    yield {
+        "phase": "refinement",
+        "status": "processing",
+        "message": f"Refining text ({mode} mode)...",
+        "stream_start": True
+    }
+
+    t0 = time.perf_counter()
+    refined_text = ""
+
+    async for chunk in stream_generator:
+        refined_text += chunk
+        yield {
+            "phase": "refinement",
+            "status": "streaming",
+            "chunk": chunk
+        }
+
+    timing = time.perf_counter() - t0
+    final_payload["meta"]["timings"]["refine_text"] = timing
+    final_payload["refined_text"] = refined_text
+
+    yield {
+        "phase": "refinement",
+        "status": "complete",
+        "result": refined_text,
+        "timing": timing
+    }
+
+
+async def _extraction_phase(
+    translated_text: str, schema_text: str, is_conversation: bool, final_payload: Dict[str, Any]
+) -> AsyncGenerator[Dict[str, Any], None]:
+    """Phase 5: stream feature extraction and record its result in final_payload."""
+    yield {
+        "phase": "extraction",
+        "status": "processing",
+        "message": "Extracting medical features...",
+        "stream_start": True
+    }
+
+    t0 = time.perf_counter()
+    extraction_json = ""
+
+    async for chunk in ExtractFeature.extract_stream(
+        translated_text, schema_text, is_conversation=is_conversation
+    ):
+        extraction_json += chunk
+        yield {
+            "phase": "extraction",
+            "status": "streaming",
+            "chunk": chunk
+        }
+
+    timing = time.perf_counter() - t0
+    final_payload["meta"]["timings"]["feature_extraction"] = timing
+
+    # Parse extraction JSON
+    try:
+        extraction_data = json.loads(extraction_json.strip())
+        final_payload["json_data"] = extraction_data.get("json_data", {})
+        final_payload["extraction_reasoning"] = extraction_data.get("reasoning", "")
+    except json.JSONDecodeError as e:
+        logger.error(f"Failed to parse extraction JSON: {e}")
+        final_payload["json_data"] = {}
+        final_payload["extraction_reasoning"] = f"Error parsing: {str(e)}"
+
+    yield {
+        "phase": "extraction",
+        "status": "complete",
+        "result": {
+            "json_data": final_payload["json_data"],
+            "reasoning": final_payload["extraction_reasoning"]
+        },
+        "timing": timing
+    }
+
+
+async def _questions_phase(
+    translated_text: str, is_conversation: bool, final_payload: Dict[str, Any]
+) -> AsyncGenerator[Dict[str, Any], None]:
+    """Phase 6: stream question generation and record its result in final_payload."""
+    yield {
+        "phase": "questions",
+        "status": "processing",
+        "message": "Generating medical questions...",
+        "stream_start": True
+    }
+
+    t0 = time.perf_counter()
+    questions_json = ""
+
+    async for chunk in LLMService.generate_questions_stream(
+        translated_text, Config.stage_api_key("questions"), is_conversation=is_conversation
+    ):
+        questions_json += chunk
+        yield {
+            "phase": "questions",
+            "status": "streaming",
+            "chunk": chunk
+        }
+
+    timing = time.perf_counter() - t0
+    final_payload["meta"]["timings"]["question_generation"] = timing
+
+    # Parse questions JSON
+    try:
+        questions_data = json.loads(questions_json.strip())
+        final_payload["questions"] = questions_data.get("questions", [])
+        final_payload["reasoning"] = questions_data.get("reasoning", "")
+    except json.JSONDecodeError as e:
+        logger.error(f"Failed to parse questions JSON: {e}")
+        final_payload["questions"] = []
+        final_payload["reasoning"] = f"Error parsing: {str(e)}"
+
+    yield {
+        "phase": "questions",
+        "status": "complete",
+        "result": {
+            "questions": final_payload["questions"],
+            "reasoning": final_payload["reasoning"]
+        },
+        "timing": timing
+    }
+
+
+async def _interleave(*streams: AsyncGenerator[Dict[str, Any], None]) -> AsyncGenerator[Dict[str, Any], None]:
+    """
+    Run several event streams concurrently and yield their events in arrival order.
+
+    Ends once every stream is exhausted. The first error raised by a stream is re-raised
+    here; the remaining streams are then cancelled, as they are if the consumer stops early.
+    """
+    queue = asyncio.Queue()
+
+    async def pump(stream):
+        try:
+            async for event in stream:
+                await queue.put(("event", event))
+            await queue.put(("done", None))
+        except Exception as e:
+            await queue.put(("error", e))
+
+    tasks = [asyncio.create_task(pump(stream)) for stream in streams]
+    remaining = len(tasks)
+    try:
+        while remaining:
+            kind, value = await queue.get()
+            if kind == "event":
+                yield value
+            elif kind == "done":
+                remaining -= 1
+            else:
+                raise value
+    finally:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
@@ -0,0 +1,122 @@
+import asyncio
+import logging
+import time
+from typing import Any, AsyncGenerator, Dict, List, Optional
+
+import soundfile as sf
+
+from core.config import Config
+from model.speech_service import SpeechService
+from utils.key_limiter import KeyConcurrencyLimiter
+
+logger = logging.getLogger("medical_voice_assistant")
+
+# Shared by every batch in this process, so concurrent batches on one key respect one cap
+KEY_LIMITER = KeyConcurrencyLimiter(Config.BATCH_MAX_CONCURRENCY_PER_KEY)
+
+
+async def run_batch_transcription(
+    items: List[Dict[str, Any]],
+    *,
+    api_key: str,
+    language: str = "ar",
+    max_concurrency: Optional[int] = None,
+) -> AsyncGenerator[Dict[str, Any], None]:
+    """
+    Transcribe a manifest of recordings, yielding each result as soon as it completes.
+
+    Args:
+        items: Manifest entries: {"id", "source"} plus optional "language"; source is a
+            path or raw audio bytes (e.g. an upload spool)
+        api_key: Inference API key; concurrency is capped per key across all batches
+        language: Default language for entries without one
+        max_concurrency: Workers for this batch (never above Config.BATCH_MAX_CONCURRENCY_PER_KEY)
+
+    Yields:
+        A "started" event, one "file" event per entry (in completion order) and a final
+        "complete" event with aggregate throughput.
+    """
+    workers = max(1, min(max_concurrency or KEY_LIMITER.limit, KEY_LIMITER.limit, len(items) or 1))
+    pending = iter(enumerate(items))
+    results = asyncio.Queue()
+    started = time.perf_counter()
+
+    yield {"phase": "batch", "status": "started", "total": len(items), "concurrency": workers}
+
+    async def worker():
+        for index, item in pending:
+            async with KEY_LIMITER.slot(api_key):
+                result = await _transcribe_item(index, item, api_key, language)
+            await results.put(result)
+
+    tasks = [asyncio.create_task(worker()) for _ in range(workers)]
+    succeeded = failed = 0
+    audio_seconds = 0.0
+    try:
+        for _ in range(len(items)):
+            result = await results.get()
+            if result["status"] == "complete":
+                succeeded += 1
+                audio_seconds += result.get("audio_seconds") or 0.0
+            else:
+                failed += 1
+            yield result
+    finally:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    elapsed = time.perf_counter() - started
+    logger.info(
+        "Batch of %d transcribed in %.1fs (%d failed, key %s)",
+        len(items), elapsed, failed, KeyConcurrencyLimiter.fingerprint(api_key),
+    )
+    yield {
+        "phase": "batch",
+        "status": "complete",
+        "total": len(items),
+        "succeeded": succeeded,
+        "failed": failed,
+        "elapsed": elapsed,
+        "files_per_second": len(items) / elapsed if elapsed > 0 else None,
+        "audio_seconds": audio_seconds,
+        # Seconds of audio transcribed per wall-clock second
+        "realtime_factor": audio_seconds / elapsed if elapsed > 0 else None,
+    }
+
+
+async def _transcribe_item(index: int, item: Dict[str, Any], api_key: str, language: str) -> Dict[str, Any]:
+    """Transcribe one manifest entry; failures are reported in the result, not raised."""
+    t0 = time.perf_counter()
+    result = {"phase": "file", "index": index, "id": item.get("id", str(index))}
+    try:
+        text, meta = await SpeechService.transcribe_audio_async(
+            item["source"],
+            api_key=api_key,
+            language=item.get("language") or language,
+            return_meta=True,
+        )
+        result.update({
+            "status": "complete",
+            "text": text,
+            "audio_seconds": _audio_seconds(item["source"], meta),
+            "cache_hit": bool(meta.get("cache_hit")),
+        })
+    except Exception as e:
+        logger.warning("Batch item %s failed: %s", result["id"], e)
+        result.update({"status": "error", "error": str(e)})
+    result["timing"] = time.perf_counter() - t0
+    return result
+
+
+def _audio_seconds(source, meta: Dict[str, Any]) -> Optional[float]:
+    """Duration of the original recording, from the quality probe or the file header."""
+    probe = (meta.get("preprocessing_plan") or {}).get("probe") or {}
+    if probe.get("duration"):
+        return probe["duration"]
+    if isinstance(source, str):
+        try:
+            return sf.info(source).duration
+        except Exception:
+            return None
+    return None
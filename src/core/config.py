@@ -19,8 +19,91 @@ class Config:
     TRANSLATE_API_KEY = os.getenv("translation")
     EXTRACTION_API_KEY = os.getenv("extraction")
     QUESTIONS_API_KEY = os.getenv("questions")
+    VALIDATION_API_KEY = os.getenv("validation")
+
+    # Concurrent LLM requests per API key; every stage key gets its own budget
+    LLM_MAX_CONCURRENCY_PER_KEY = int(os.getenv("LLM_MAX_CONCURRENCY_PER_KEY", 8))
+
+    # Arabic visits: refine and translate in a single LLM call (opt-in)
+    FUSED_REFINE_TRANSLATE = os.getenv("FUSED_REFINE_TRANSLATE", "false").lower() == "true"
+
+    # Stop the pipeline after validation when it is NON_MEDICAL with at least this confidence (0-100)
+    NON_MEDICAL_SHORT_CIRCUIT_CONFIDENCE = float(os.getenv("NON_MEDICAL_SHORT_CIRCUIT_CONFIDENCE", 80))
+
+    # Medical validation: the local lexicon decides MEDICAL when its medical probability (0-100) is
+    # at or above this threshold; the LLM decides everything else (including every NON_MEDICAL)
+    VALIDATION_LEXICON_ENABLED = os.getenv("VALIDATION_LEXICON_ENABLED", "true").lower() == "true"
+    VALIDATION_LEXICON_MEDICAL_THRESHOLD = float(os.getenv("VALIDATION_LEXICON_MEDICAL_THRESHOLD", 85))
 
     DATABASE_PATH = "app_data.db"
+
+    # Inference backend for ASR and completions: "fireworks" or "local" (inference_stand_in.py)
+    INFERENCE_BACKEND = os.getenv("INFERENCE_BACKEND", "fireworks")
+    LOCAL_INFERENCE_URL = os.getenv("LOCAL_INFERENCE_URL", "http://localhost:8590")
+
+    # Audio preprocessing process pool (per API worker process)
+    PREPROCESS_WORKERS = int(os.getenv("PREPROCESS_WORKERS", os.cpu_count() or 1))
+    PREPROCESS_MAX_PENDING = int(os.getenv("PREPROCESS_MAX_PENDING", 2 * PREPROCESS_WORKERS))
+
+    # Scratch space for temporary audio artifacts (e.g. /dev/shm/medvoice for RAM-backed storage)
+    SCRATCH_DIR = os.getenv("SCRATCH_DIR")
+    SCRATCH_REQUEST_QUOTA_MB = int(os.getenv("SCRATCH_REQUEST_QUOTA_MB", 512))
+    SCRATCH_TOTAL_QUOTA_MB = int(os.getenv("SCRATCH_TOTAL_QUOTA_MB", 4096))
+
+    # Keep-alive connection pool for the transcription endpoint (per event loop)
+    TRANSCRIBE_MAX_CONNECTIONS = int(os.getenv("TRANSCRIBE_MAX_CONNECTIONS", 20))
+    TRANSCRIBE_MAX_KEEPALIVE = int(os.getenv("TRANSCRIBE_MAX_KEEPALIVE", 10))
+    TRANSCRIBE_KEEPALIVE_EXPIRY = float(os.getenv("TRANSCRIBE_KEEPALIVE_EXPIRY", 30))
+
+    # Segment-wise streaming transcription: max segment length and concurrent uploads per request
+    TRANSCRIBE_SEGMENT_SECONDS = float(os.getenv("TRANSCRIBE_SEGMENT_SECONDS", 30))
+    TRANSCRIBE_SEGMENT_CONCURRENCY = int(os.getenv("TRANSCRIBE_SEGMENT_CONCURRENCY", 4))
+
+    # Result cache shared by API and Celery workers (REDIS_CACHE_URL unset: in-process tier only)
+    REDIS_CACHE_URL = os.getenv("REDIS_CACHE_URL")
+    TRANSCRIPTION_CACHE_ENTRIES = int(os.getenv("TRANSCRIPTION_CACHE_ENTRIES", 256))
+    TRANSCRIPTION_CACHE_TTL = int(os.getenv("TRANSCRIPTION_CACHE_TTL", 7 * 24 * 3600))
+    COMPLETION_CACHE_ENTRIES = int(os.getenv("COMPLETION_CACHE_ENTRIES", 512))
+    COMPLETION_CACHE_TTL = int(os.getenv("COMPLETION_CACHE_TTL", 24 * 3600))
+
+    # Batch transcription: concurrent files per inference API key (shared by all batches) and manifest size
+    BATCH_MAX_CONCURRENCY_PER_KEY = int(os.getenv("BATCH_MAX_CONCURRENCY_PER_KEY", 4))
+    BATCH_MAX_ITEMS = int(os.getenv("BATCH_MAX_ITEMS", 500))
+
+    # SSE streaming: text chunks are merged and flushed every interval or once a phase buffers max bytes
+    SSE_FLUSH_INTERVAL_MS = float(os.getenv("SSE_FLUSH_INTERVAL_MS", 50))
+    SSE_FLUSH_MAX_BYTES = int(os.getenv("SSE_FLUSH_MAX_BYTES", 4096))
+
+    # Outbound inference calls: retries with backoff, hedging and per-endpoint circuit breakers
+    RETRY_MAX_ATTEMPTS = int(os.getenv("RETRY_MAX_ATTEMPTS", 3))
+    RETRY_BASE_DELAY = float(os.getenv("RETRY_BASE_DELAY", 0.5))
+    RETRY_MAX_DELAY = float(os.getenv("RETRY_MAX_DELAY", 8))
+    RETRY_AFTER_MAX_SECONDS = float(os.getenv("RETRY_AFTER_MAX_SECONDS", 30))
+    HEDGE_ENABLED = os.getenv("HEDGE_ENABLED", "false").lower() == "true"
+    HEDGE_PERCENTILE = float(os.getenv("HEDGE_PERCENTILE", 95))
+    HEDGE_MIN_SAMPLES = int(os.getenv("HEDGE_MIN_SAMPLES", 20))
+    HEDGE_MAX_THREADS = int(os.getenv("HEDGE_MAX_THREADS", 8))
+    BREAKER_FAILURE_THRESHOLD = int(os.getenv("BREAKER_FAILURE_THRESHOLD", 5))
+    BREAKER_RESET_SECONDS = float(os.getenv("BREAKER_RESET_SECONDS", 30))
+
+    @staticmethod
+    def stage_api_key(stage: str):
+        """
+        API key for a pipeline stage ("speech", "validation", "refine", "translation",
+        "extraction", "questions"), falling back to FIREWORKS_API_KEY when it is not set.
+        Validation runs on the refinement key unless it has one of its own.
+        """
+        keys = {
+            "speech": Config.SPEECH_API_KEY,
+            "validation": Config.VALIDATION_API_KEY or Config.REFINE_API_KEY,
+            "refine": Config.REFINE_API_KEY,
+            "translation": Config.TRANSLATE_API_KEY,
+            "extraction": Config.EXTRACTION_API_KEY,
+            "questions": Config.QUESTIONS_API_KEY,
+        }
+        if stage not in keys:
+            raise ValueError(f"Unknown pipeline stage: {stage}")
+        return keys[stage] or Config.FIREWORKS_API_KEY
     
     # Create upload folder if it doesn't exist
     if not os.path.exists(UPLOAD_FOLDER):
@@ -1,16 +1,21 @@
 import logging
 from pathlib import Path
 from typing import Optional, Dict, Any, List
-import asyncio
-import json
 
 import uvicorn
-from fastapi import FastAPI, HTTPException, UploadFile, File, Form
+from fastapi import FastAPI, HTTPException, UploadFile, File, Form, Header
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import FileResponse, StreamingResponse
 from fastapi.staticfiles import StaticFiles
 from pydantic import BaseModel, field_validator
 from core.audio_preprocessing import run_pipeline_streaming
+from core.batch_transcription import run_batch_transcription
+from core.config import Config
+from model.inference_backend import InferenceBackend
+from model.preprocessing_pool import PreprocessingPool
+from model.transcription_client import AsyncTranscriptionClient
+from utils.sse import coalesce_chunks, encode_event
+from utils.upload_spool import UploadSpool
 
 # ---- Setup ----
 logger = logging.getLogger("medical_voice_assistant")
@@ -45,6 +50,24 @@ class ProcessRequest(BaseModel):
         return path
 
 
+class BatchItem(BaseModel):
+    audio_path: str
+    id: Optional[str] = None
+    language: Optional[str] = None
+
+    @field_validator("audio_path")
+    def validate_path(cls, path):
+        if not Path(path).exists():
+            raise ValueError(f"Audio file not found: {path}")
+        return path
+
+
+class BatchTranscriptionRequest(BaseModel):
+    items: List[BatchItem]
+    language: str = "ar"
+    max_concurrency: Optional[int] = None
+
+
 class ProcessResponse(BaseModel):
     visit_id: str
     source_audio: str
@@ -78,6 +101,12 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+@app.on_event("shutdown")
+async def shutdown_worker_resources():
+    PreprocessingPool.shutdown()
+    await AsyncTranscriptionClient.aclose()
+    await InferenceBackend.get().aclose()
+
 @app.get("/")
 async def read_root():
     """Serve the frontend UI"""
@@ -106,7 +135,7 @@ async def process_via_upload_stream(
 
     async def event_generator():
         try:
-            async for event in run_pipeline_streaming(
+            async for event in coalesce_chunks(run_pipeline_streaming(
                 visit_id=visit_id,
                 language=language,
                 patient_name=patient_name,
@@ -115,9 +144,8 @@ async def process_via_upload_stream(
                 is_conversation=is_conversation,
                 features=features,
                 uploaded_file=file,
-            ):
-                yield f"data: {json.dumps(event, ensure_ascii=False)}\n\n"
-                await asyncio.sleep(0.01)  # Small delay for client processing
+            )):
+                yield encode_event(event)
         except Exception as e:
             logger.exception(f"Error in streaming pipeline: {e}")
             error_event = {
@@ -125,7 +153,37 @@ async def process_via_upload_stream(
                 "status": "error",
                 "error": str(e)
             }
-            yield f"data: {json.dumps(error_event)}\n\n"
+            yield encode_event(error_event)
+
+    return StreamingResponse(
+        event_generator(),
+        media_type="text/event-stream",
+        headers={
+            "Cache-Control": "no-cache",
+            "Connection": "keep-alive",
+            "X-Accel-Buffering": "no"
+        }
+    )
+
+
+
+# ---- Batch transcription ----
+def _batch_response(items: List[Dict[str, Any]], api_key: Optional[str], language: str, max_concurrency: Optional[int]):
+    if not items:
+        raise HTTPException(status_code=422, detail="The manifest is empty")
+    if len(items) > Config.BATCH_MAX_ITEMS:
+        raise HTTPException(status_code=413, detail=f"At most {Config.BATCH_MAX_ITEMS} files per batch")
+    api_key = api_key or Config.stage_api_key("speech")
+
+    async def event_generator():
+        try:
+            async for event in run_batch_transcription(
+                items, api_key=api_key, language=language, max_concurrency=max_concurrency
+            ):
+                yield encode_event(event)
+        except Exception as e:
+            logger.exception(f"Error in batch transcription: {e}")
+            yield encode_event({"phase": "error", "status": "error", "error": str(e)})
 
     return StreamingResponse(
         event_generator(),
@@ -138,5 +196,37 @@ async def process_via_upload_stream(
     )
 
 
+@app.post("/api/v1/transcribe/batch")
+async def transcribe_batch(req: BatchTranscriptionRequest, x_api_key: Optional[str] = Header(None)):
+    """
+    Transcribe a manifest of audio files on disk, streaming each result as it completes.
+
+    Files run concurrently, capped per inference API key (X-API-Key, default: the server's
+    speech key) across all batches; the last event reports aggregate throughput.
+    """
+    items = [
+        {"id": item.id or item.audio_path, "source": item.audio_path, "language": item.language}
+        for item in req.items
+    ]
+    return _batch_response(items, x_api_key, req.language, req.max_concurrency)
+
+
+@app.post("/api/v1/transcribe/batch/upload")
+async def transcribe_batch_upload(
+    files: List[UploadFile] = File(...),
+    language: str = Form("ar"),
+    max_concurrency: Optional[int] = Form(None),
+    x_api_key: Optional[str] = Header(None),
+):
+    """Upload several audio files and transcribe them as one batch (see /api/v1/transcribe/batch)."""
+    for file in files:
+        if not file.content_type.startswith("audio/"):
+            raise HTTPException(status_code=415, detail=f"Unsupported type for {file.filename}: {file.content_type}")
+    items = [
+        {"id": file.filename or str(index), "source": UploadSpool(file).source()}
+        for index, file in enumerate(files)
+    ]
+    return _batch_response(items, x_api_key, language, max_concurrency)
+
 if __name__ == "__main__":
     uvicorn.run("fastapi_app:app", host="0.0.0.0", port=2222)
\ No newline at end of file
@@ -1,5 +1,4 @@
 import logging
-import aiofiles
 from pathlib import Path
 from typing import Optional, Dict, Any
 
@@ -9,6 +8,7 @@ from pydantic import BaseModel, Field, validator
 
 from core.audio_preprocessing import run_pipeline
 from utils.metrics import setup_metrics
+from utils.upload_spool import UploadSpool
 from tasks.audio_uploading import upload_audio_files
 
 # ---- Setup ----
@@ -105,10 +105,10 @@ async def process_via_upload(
     if not file.content_type.startswith("audio/"):
         raise HTTPException(status_code=415, detail=f"Unsupported type: {file.content_type}")
     
+    # The worker runs in another process, so the file must exist before the task is queued;
+    # copy it from the upload spool in-kernel rather than through 8 KB Python reads
     audio_path = AUDIO_DIR / f"{visit_id}{Path(file.filename).suffix}"
-    async with aiofiles.open(audio_path, "wb") as out:
-        while chunk := await file.read(8192):
-            await out.write(chunk)
+    await UploadSpool(file).persist(audio_path)
 
     # Send Celery background task
     task = upload_audio_files.delay(
@@ -0,0 +1,229 @@
+"""
+Local stand-in for the inference provider.
+
+Speaks the same HTTP shapes as the Fireworks endpoints the pipeline uses, so the whole
+pipeline can be driven offline and at load (INFERENCE_BACKEND=local):
+
+    POST /inference/v1/audio/transcriptions   multipart upload -> {"text": ...}
+    POST /inference/v1/completions            JSON or SSE stream of completion chunks
+
+Latency, token rate and error injection are configured with STANDIN_* environment
+variables or command line flags, and can be changed at runtime via POST /standin/config.
+
+Run from src/:
+    python inference_stand_in.py --port 8590 --latency-ms 300 --tokens-per-second 80 --error-rate 0.05
+"""
+import argparse
+import asyncio
+import io
+import json
+import os
+import random
+import re
+import time
+import uuid
+from typing import Optional
+
+import soundfile as sf
+import uvicorn
+from fastapi import FastAPI, File, Form, Request, UploadFile
+from fastapi.responses import JSONResponse, StreamingResponse
+from pydantic import BaseModel
+
+# ---- Settings ----
+class StandInSettings(BaseModel):
+    latency_ms: float = float(os.getenv("STANDIN_LATENCY_MS", 200))
+    jitter_ms: float = float(os.getenv("STANDIN_JITTER_MS", 50))
+    # Extra ASR latency per second of uploaded audio
+    asr_ms_per_audio_second: float = float(os.getenv("STANDIN_ASR_MS_PER_AUDIO_SECOND", 20))
+    asr_words_per_second: float = float(os.getenv("STANDIN_ASR_WORDS_PER_SECOND", 2.5))
+    tokens_per_second: float = float(os.getenv("STANDIN_TOKENS_PER_SECOND", 60))
+    completion_tokens: int = int(os.getenv("STANDIN_COMPLETION_TOKENS", 120))
+    error_rate: float = float(os.getenv("STANDIN_ERROR_RATE", 0))
+    error_status: int = int(os.getenv("STANDIN_ERROR_STATUS", 503))
+    retry_after: Optional[float] = float(os.environ["STANDIN_RETRY_AFTER"]) if os.getenv("STANDIN_RETRY_AFTER") else None
+
+
+settings = StandInSettings()
+
+VOCABULARY = (
+    "patient reports mild headache and fever since two days with no cough or chest pain "
+    "blood pressure is normal and the doctor recommends rest fluids and paracetamol "
+    "follow up in one week if symptoms persist"
+).split()
+
+app = FastAPI(title="Inference stand-in")
+
+
+# ---- Helpers ----
+async def _wait(extra_seconds: float = 0.0):
+    jitter = random.uniform(-settings.jitter_ms, settings.jitter_ms) if settings.jitter_ms else 0.0
+    await asyncio.sleep(max(0.0, (settings.latency_ms + jitter) / 1000 + extra_seconds))
+
+
+def _injected_error() -> Optional[JSONResponse]:
+    if settings.error_rate <= 0 or random.random() >= settings.error_rate:
+        return None
+    headers = {"Retry-After": str(settings.retry_after)} if settings.retry_after is not None else None
+    return JSONResponse(
+        {"error": {"object": "error", "type": "internal_server_error", "message": "Injected stand-in error"}},
+        status_code=settings.error_status,
+        headers=headers,
+    )
+
+
+def _words(count: int) -> list:
+    return [VOCABULARY[i % len(VOCABULARY)] for i in range(max(0, count))]
+
+
+def _schema_instance(schema: dict, root: dict):
+    """Smallest value that validates against a (pydantic-generated) JSON schema."""
+    if "$ref" in schema:
+        return _schema_instance(root.get("$defs", {}).get(schema["$ref"].rsplit("/", 1)[-1], {}), root)
+    if "const" in schema:
+        return schema["const"]
+    if schema.get("enum"):
+        return schema["enum"][0]
+    for key in ("anyOf", "oneOf", "allOf"):
+        if key in schema:
+            return _schema_instance(schema[key][0], root)
+    kind = schema.get("type")
+    if kind == "object":
+        return {name: _schema_instance(sub, root) for name, sub in schema.get("properties", {}).items()}
+    if kind == "array":
+        return [_schema_instance(schema.get("items", {}), root)]
+    if kind == "boolean":
+        return False
+    if kind in ("integer", "number"):
+        return 0
+    if kind == "null":
+        return None
+    return " ".join(_words(3))
+
+
+def _completion_text(body: dict) -> str:
+    response_format = body.get("response_format") or {}
+    if response_format.get("schema"):
+        schema = response_format["schema"]
+        return json.dumps(_schema_instance(schema, schema))
+    prompt = body.get("prompt") or ""
+    count = min(int(body.get("max_tokens") or settings.completion_tokens), settings.completion_tokens)
+    markers = list(dict.fromkeys(re.findall(r"^<<[A-Z]+>>$", prompt, re.MULTILINE)))
+    if len(markers) > 1:
+        # Sectioned output (fused refine + translate): the prompt ends with the first marker
+        per_section = max(1, count // len(markers))
+        return "\n".join(
+            (f"{marker}\n" if i else "") + " ".join(_words(per_section)) for i, marker in enumerate(markers)
+        )
+    if "JSON" in prompt:
+        # Prompts that ask for bare JSON carry an example object; answer with it
+        match = re.search(r"\{[^{}]*\}", prompt)
+        if match:
+            return match.group(0)
+    return " ".join(_words(count))
+
+
+def _chunk(completion_id: str, model: str, text: str, finish_reason=None) -> dict:
+    return {
+        "id": completion_id,
+        "object": "text_completion",
+        "created": int(time.time()),
+        "model": model,
+        "choices": [{"index": 0, "text": text, "finish_reason": finish_reason}],
+    }
+
+
+def _usage(prompt: str, text: str) -> dict:
+    prompt_tokens, completion_tokens = len(prompt.split()), len(text.split())
+    return {
+        "prompt_tokens": prompt_tokens,
+        "completion_tokens": completion_tokens,
+        "total_tokens": prompt_tokens + completion_tokens,
+    }
+
+
+# ---- Endpoints ----
+@app.post("/inference/v1/audio/transcriptions")
+async def transcriptions(file: UploadFile = File(...), model: str = Form("whisper-v3"), language: str = Form(None)):
+    audio = await file.read()
+    try:
+        duration = sf.info(io.BytesIO(audio)).duration
+    except Exception:
+        # Undecodable upload: assume 16 kHz 16-bit PCM
+        duration = len(audio) / 32000
+    await _wait(duration * settings.asr_ms_per_audio_second / 1000)
+    error = _injected_error()
+    if error is not None:
+        return error
+    return {"text": " ".join(_words(max(1, int(duration * settings.asr_words_per_second))))}
+
+
+@app.post("/inference/v1/completions")
+async def completions(request: Request):
+    body = await request.json()
+    await _wait()
+    error = _injected_error()
+    if error is not None:
+        return error
+
+    completion_id = f"cmpl-{uuid.uuid4().hex}"
+    model = body.get("model", "stand-in")
+    text = _completion_text(body)
+    if not body.get("stream"):
+        response = _chunk(completion_id, model, text, "stop")
+        response["usage"] = _usage(body.get("prompt") or "", text)
+        return response
+
+    async def events():
+        # One token per word, paced at tokens_per_second
+        tokens = re.findall(r"\S+\s*", text)
+        interval = 1 / settings.tokens_per_second if settings.tokens_per_second > 0 else 0
+        for token in tokens:
+            yield f"data: {json.dumps(_chunk(completion_id, model, token))}\n\n"
+            if interval:
+                await asyncio.sleep(interval)
+        final = _chunk(completion_id, model, "", "stop")
+        final["usage"] = _usage(body.get("prompt") or "", text)
+        yield f"data: {json.dumps(final)}\n\n"
+        yield "data: [DONE]\n\n"
+
+    return StreamingResponse(events(), media_type="text/event-stream")
+
+
+@app.get("/standin/config")
+async def get_config():
+    return settings.model_dump()
+
+
+@app.post("/standin/config")
+async def update_config(update: dict):
+    """Change latency, token rate or error injection without restarting."""
+    global settings
+    settings = settings.model_copy(update={k: v for k, v in update.items() if k in StandInSettings.model_fields})
+    return settings.model_dump()
+
+
+@app.get("/health")
+async def health():
+    return {"status": "ok"}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=8590)
+    parser.add_argument("--latency-ms", type=float)
+    parser.add_argument("--jitter-ms", type=float)
+    parser.add_argument("--tokens-per-second", type=float)
+    parser.add_argument("--completion-tokens", type=int)
+    parser.add_argument("--error-rate", type=float)
+    parser.add_argument("--error-status", type=int)
+    parser.add_argument("--retry-after", type=float)
+    args = parser.parse_args()
+
+    overrides = {
+        name: value for name, value in vars(args).items()
+        if name in StandInSettings.model_fields and value is not None
+    }
+    settings = settings.model_copy(update=overrides)
+    uvicorn.run(app, host=args.host, port=args.port)
@@ -0,0 +1,220 @@
+"""
+Bulk audio preprocessing for backfills, without going through the HTTP stack.
+
+Usage (from src/):
+    python -m model.audio_batch /archive/2024/*.ogg --output-dir /data/processed --workers 8
+    python -m model.audio_batch --manifest paths.txt --output-dir /data/processed --format opus
+"""
+import argparse
+import itertools
+import json
+import logging
+import multiprocessing
+import os
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+from pathlib import Path
+
+from model.audio_filters import SpeechFilterBank
+from model.audio_preprocessing import AudioPreprocessingService
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+class BatchPreprocessingService:
+    """Fan AudioPreprocessingService.preprocess_audio out over a pool of long-lived worker processes."""
+
+    @staticmethod
+    def preprocess_batch(paths, output_dir, workers=None, **options):
+        """
+        Preprocess many audio files into one output directory.
+
+        Workers stay alive for the whole batch, so filter designs (SpeechFilterBank) and
+        librosa's cached FFT windows are built once per worker rather than once per file.
+        A worker killed by the OS (e.g. OOM on a long file) fails only the file that killed it;
+        the files in flight alongside it are retried one at a time and the rest continue in a
+        fresh pool.
+
+        Args:
+            paths: Iterable of input audio paths
+            output_dir: Directory for the processed files (created if missing)
+            workers: Number of worker processes (defaults to the CPU count)
+            **options: Keyword arguments forwarded to AudioPreprocessingService.preprocess_audio
+
+        Returns:
+            Dict with per-file "results" (input, output, seconds, error) and batch totals
+        """
+        paths = [str(path) for path in paths]
+        output_dir = Path(output_dir)
+        output_dir.mkdir(parents=True, exist_ok=True)
+        output_format = options.get("output_format", "flac")
+        if output_format not in AudioPreprocessingService.OUTPUT_FORMATS:
+            raise ValueError(f"Unsupported output format: {output_format}")
+        extension = AudioPreprocessingService.OUTPUT_FORMATS[output_format][2]
+        outputs = BatchPreprocessingService._output_paths(paths, output_dir, extension)
+
+        workers = max(1, min(workers or os.cpu_count() or 1, len(paths) or 1))
+        results = []
+
+        def record(result):
+            results.append(result)
+            if result["error"]:
+                logger.warning("[%d/%d] %s failed: %s", len(results), len(paths), result["input"], result["error"])
+            else:
+                logger.info("[%d/%d] %s (%.2fs)", len(results), len(paths), result["input"], result["seconds"])
+
+        t0 = time.perf_counter()
+        pending = list(zip(paths, outputs))
+        while pending:
+            suspects, pending = BatchPreprocessingService._run_pool(pending, workers, options, record)
+            # A worker died (e.g. OOM-killed) with these in flight: rerun each on its own so only
+            # the file that kills its worker is failed; the rest continue in a fresh pool
+            for path, output in suspects:
+                record(BatchPreprocessingService._run_isolated(path, output, options))
+
+        wall = time.perf_counter() - t0
+        order = {path: index for index, path in enumerate(paths)}
+        results.sort(key=lambda result: order[result["input"]])
+        failed = sum(1 for result in results if result["error"])
+        return {
+            "results": results,
+            "total": len(results),
+            "succeeded": len(results) - failed,
+            "failed": failed,
+            "workers": workers,
+            "wall_seconds": wall,
+            "files_per_second": len(results) / wall if wall > 0 else 0.0,
+        }
+
+    # --- Private Helpers --- #
+    @staticmethod
+    def _executor(workers, options):
+        return ProcessPoolExecutor(
+            max_workers=workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=BatchPreprocessingService._init_worker,
+            initargs=(options.get("target_sr", 16000),),
+        )
+
+    @staticmethod
+    def _run_pool(jobs, workers, options, record):
+        """
+        Run (path, output) jobs on one pool, keeping at most 2 * workers submitted at a time.
+
+        Returns:
+            ([], []) once every job is recorded; if the pool breaks, the jobs that were in
+            flight (one of them killed its worker) and the jobs not yet submitted
+        """
+        jobs = iter(jobs)
+        in_flight = {}
+        with BatchPreprocessingService._executor(workers, options) as executor:
+
+            def submit(count):
+                for path, output in itertools.islice(jobs, count):
+                    future = executor.submit(BatchPreprocessingService._process_one, path, output, options)
+                    in_flight[future] = (path, output)
+
+            submit(2 * workers)
+            while in_flight:
+                done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                broken = []
+                for future in done:
+                    job = in_flight.pop(future)
+                    try:
+                        record(future.result())
+                    except BrokenProcessPool:
+                        broken.append(job)
+                if broken:
+                    logger.error("Preprocessing worker died; retrying %d in-flight file(s) one at a time",
+                                 len(broken) + len(in_flight))
+                    return broken + list(in_flight.values()), list(jobs)
+                submit(len(done))
+        return [], []
+
+    @staticmethod
+    def _run_isolated(path, output_path, options):
+        """Process one file in a pool of its own, recording a dead worker as that file's error."""
+        t0 = time.perf_counter()
+        with BatchPreprocessingService._executor(1, options) as executor:
+            try:
+                return executor.submit(BatchPreprocessingService._process_one, path, output_path, options).result()
+            except BrokenProcessPool as e:
+                error = f"worker process died: {e}"
+        return {"input": path, "output": None, "seconds": time.perf_counter() - t0, "error": error}
+
+    @staticmethod
+    def _init_worker(target_sr):
+        # Design the band-pass cascade up front; inputs resampled to target_sr all share it
+        if target_sr:
+            SpeechFilterBank.design(target_sr)
+
+    @staticmethod
+    def _process_one(path, output_path, options):
+        t0 = time.perf_counter()
+        try:
+            AudioPreprocessingService.preprocess_audio(path, output_path, **options)
+            error = None
+        except Exception as e:
+            output_path, error = None, str(e)
+        return {"input": path, "output": output_path, "seconds": time.perf_counter() - t0, "error": error}
+
+    @staticmethod
+    def _output_paths(paths, output_dir, extension):
+        """One output per input, named after the input stem; duplicate stems get a numeric suffix."""
+        seen = {}
+        outputs = []
+        for path in paths:
+            stem = Path(path).stem
+            count = seen.get(stem, 0)
+            seen[stem] = count + 1
+            name = f"{stem}{extension}" if count == 0 else f"{stem}_{count}{extension}"
+            outputs.append(str(output_dir / name))
+        return outputs
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("paths", nargs="*", help="Input audio files")
+    parser.add_argument("--manifest", help="Text file with one input path per line")
+    parser.add_argument("--output-dir", required=True)
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--format", dest="output_format", default="flac",
+                        choices=sorted(AudioPreprocessingService.OUTPUT_FORMATS))
+    parser.add_argument("--sample-rate", dest="target_sr", type=int, default=16000)
+    parser.add_argument("--strip-pauses", action="store_true")
+    parser.add_argument("--no-denoise", dest="remove_noise", action="store_false")
+    parser.add_argument("--report", help="Write the per-file results as JSON to this path")
+    args = parser.parse_args(argv)
+
+    paths = list(args.paths)
+    if args.manifest:
+        with open(args.manifest, encoding="utf-8") as f:
+            paths += [line.strip() for line in f if line.strip()]
+    if not paths:
+        parser.error("no input files given")
+
+    summary = BatchPreprocessingService.preprocess_batch(
+        paths,
+        args.output_dir,
+        workers=args.workers,
+        output_format=args.output_format,
+        target_sr=args.target_sr,
+        strip_pauses=args.strip_pauses,
+        remove_noise=args.remove_noise,
+    )
+    if args.report:
+        with open(args.report, "w", encoding="utf-8") as f:
+            json.dump(summary, f, indent=2)
+
+    print(
+        f"{summary['succeeded']}/{summary['total']} files in {summary['wall_seconds']:.1f}s "
+        f"({summary['files_per_second']:.2f} files/s, {summary['workers']} workers)"
+    )
+    return 1 if summary["failed"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
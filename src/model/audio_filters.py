@@ -0,0 +1,71 @@
+from functools import lru_cache
+import numpy as np
+from scipy import signal
+
+
+class SpeechFilterBank:
+    """
+    Precomputed speech band-pass filters, cached per sample rate.
+
+    The 300Hz high-pass and 8kHz low-pass Butterworth filters are designed once per
+    (sample rate, stage) combination and stacked into a single second-order-section
+    cascade, so both stages run as one float32 pass over the signal.
+    """
+
+    HIGHPASS_HZ = 300
+    LOWPASS_HZ = 8000
+    ORDER = 5
+
+    # --- Public API --- #
+    @staticmethod
+    @lru_cache(maxsize=32)
+    def design(sr, apply_highpass=True, apply_lowpass=True):
+        """
+        Return the cascaded SOS coefficients for the requested stages.
+
+        The low-pass stage is skipped when its cutoff is at or above Nyquist. The array
+        is shared between callers and must not be modified in place.
+
+        Returns:
+            Shared float32 array of shape (n_sections, 6), or None if no stage applies
+        """
+        sections = []
+        nyquist = sr / 2
+        if apply_highpass:
+            sections.append(signal.butter(SpeechFilterBank.ORDER, SpeechFilterBank.HIGHPASS_HZ / nyquist,
+                                          'highpass', output='sos'))
+        if apply_lowpass and SpeechFilterBank.LOWPASS_HZ < nyquist:
+            sections.append(signal.butter(SpeechFilterBank.ORDER, SpeechFilterBank.LOWPASS_HZ / nyquist,
+                                          'lowpass', output='sos'))
+        if not sections:
+            return None
+
+        return np.vstack(sections).astype(np.float32)
+
+    @staticmethod
+    def apply(y, sr, apply_highpass=True, apply_lowpass=True, zero_phase=False):
+        """
+        Filter a mono signal with the cached cascade.
+
+        Args:
+            y: Input signal
+            sr: Sample rate of y
+            apply_highpass: Whether to include the high-pass stage
+            apply_lowpass: Whether to include the low-pass stage
+            zero_phase: Run forward and backward (like filtfilt) instead of a single causal pass
+
+        Returns:
+            Filtered float32 signal
+        """
+        y = np.asarray(y, dtype=np.float32)
+        sos = SpeechFilterBank.design(sr, apply_highpass, apply_lowpass)
+        if sos is None or not len(y):
+            return y
+        if zero_phase:
+            return signal.sosfiltfilt(sos, y).astype(np.float32, copy=False)
+        return signal.sosfilt(sos, y)
+
+    @staticmethod
+    def initial_state(sos):
+        """Zero filter state for block-wise filtering with signal.sosfilt(..., zi=...)."""
+        return np.zeros((sos.shape[0], 2), dtype=sos.dtype)
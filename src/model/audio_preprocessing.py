@@ -1,134 +1,344 @@
+import io
 import os
-import tempfile
+import shutil
+import struct
+import subprocess
 import numpy as np
 import librosa
 import soundfile as sf
-from pydub import AudioSegment
-from scipy import signal
+import soxr
+
+from model.audio_filters import SpeechFilterBank
+from model.audio_probe import AudioQualityProbe
+from model.audio_streaming import StreamingAudioPreprocessor
+from model.voice_activity import VoiceActivityDetector
+from model.wav_mmap import WavMemmap
+from utils.scratch_space import ScratchSpace
 
 class AudioPreprocessingService:
     """Service for audio preprocessing and enhancement."""
     
+    # Upload encodings for the processed audio: name -> (container, subtype, extension)
+    OUTPUT_FORMATS = {
+        "wav": ("WAV", "PCM_16", ".wav"),
+        "flac": ("FLAC", "PCM_16", ".flac"),
+        "opus": ("OGG", "OPUS", ".ogg"),
+    }
+    
+    @staticmethod
+    def decode_audio(source, target_sr=None, mono=True):
+        """
+        Decode an audio source into a float32 NumPy buffer in a single pass.
+        
+        Formats libsndfile understands (WAV, FLAC, OGG/Vorbis, ...) are read directly;
+        anything else is piped through ffmpeg, so nothing is written to disk. PCM/float
+        WAV files are memory-mapped and converted (and resampled) block by block, so only
+        the final mono buffer is ever allocated.
+        
+        Args:
+            source: Path to an audio file, raw audio bytes, or a binary file object
+            target_sr: Sample rate to resample to (None keeps the native rate)
+            mono: Whether to downmix to a single channel
+            
+        Returns:
+            Tuple of (samples, sample_rate); samples are float32, shaped (channels, n) when mono=False
+        """
+        if isinstance(source, (bytes, bytearray, memoryview)):
+            source = io.BytesIO(source)
+        
+        if mono:
+            wav = WavMemmap.open(source)
+            if wav is not None:
+                return AudioPreprocessingService._decode_memmap(wav, target_sr)
+        
+        try:
+            y, sr = AudioPreprocessingService._decode_with_soundfile(source)
+        except (RuntimeError, TypeError):
+            y, sr = AudioPreprocessingService._decode_with_ffmpeg(source, target_sr)
+        
+        if mono and y.ndim > 1:
+            y = y.mean(axis=0, dtype=np.float32)
+        if target_sr and sr != target_sr:
+            y = librosa.resample(y, orig_sr=sr, target_sr=target_sr).astype(np.float32, copy=False)
+            sr = target_sr
+        return y, sr
+    
+    @staticmethod
+    def _decode_memmap(wav, target_sr=None, block_seconds=10):
+        """Fill a mono float32 buffer from a memory-mapped WAV, resampling block by block."""
+        block_frames = max(1, int(wav.samplerate * block_seconds))
+        if not target_sr or target_sr == wav.samplerate:
+            y = np.empty(wav.frames, dtype=np.float32)
+            for index, block in enumerate(wav.blocks(block_frames)):
+                y[index * block_frames:index * block_frames + len(block)] = block
+            return y, wav.samplerate
+        
+        resampler = soxr.ResampleStream(wav.samplerate, target_sr, 1, dtype='float32')
+        y = np.empty(int(np.ceil(wav.frames * target_sr / wav.samplerate)) + 64, dtype=np.float32)
+        written = 0
+        for index, block in enumerate(wav.blocks(block_frames)):
+            last = (index + 1) * block_frames >= wav.frames
+            out = resampler.resample_chunk(block, last=last)
+            if written + len(out) > len(y):
+                y = np.resize(y, written + len(out))
+            y[written:written + len(out)] = out
+            written += len(out)
+        return y[:written], target_sr
+    
+    @staticmethod
+    def _decode_with_soundfile(source):
+        """Read a libsndfile-supported source; rewinds file objects so a fallback decoder can retry."""
+        position = source.tell() if hasattr(source, "read") else None
+        try:
+            y, sr = sf.read(source, dtype="float32", always_2d=True)
+        except Exception:
+            if position is not None:
+                source.seek(position)
+            raise
+        return y.T, sr
+    
+    @staticmethod
+    def _decode_with_ffmpeg(source, target_sr=None):
+        """Decode any ffmpeg-supported source through a pipe into float32 samples."""
+        if shutil.which("ffmpeg") is None:
+            raise RuntimeError("ffmpeg is required to decode this audio format but was not found on PATH")
+        
+        cmd = ["ffmpeg", "-hide_banner", "-loglevel", "error"]
+        stdin_data = None
+        if hasattr(source, "read"):
+            cmd += ["-i", "pipe:0"]
+            stdin_data = source.read()
+        else:
+            cmd += ["-nostdin", "-i", os.fspath(source)]
+        cmd += ["-vn", "-map", "0:a:0"]
+        if target_sr:
+            cmd += ["-ar", str(target_sr)]
+        # Sun AU carries the sample rate and channel count in a tiny header and,
+        # unlike WAV, is well-defined when the total length is unknown (pipe output)
+        cmd += ["-acodec", "pcm_f32be", "-f", "au", "pipe:1"]
+        
+        proc = subprocess.run(cmd, input=stdin_data, capture_output=True)
+        if proc.returncode != 0:
+            raise RuntimeError(f"ffmpeg decoding failed: {proc.stderr.decode(errors='replace').strip()}")
+        
+        magic, data_offset, _, encoding, sr, channels = struct.unpack(">4sIIIII", proc.stdout[:24])
+        if magic != b".snd" or encoding != 6:
+            raise RuntimeError("Unexpected output from ffmpeg decoder")
+        y = np.frombuffer(proc.stdout, dtype=">f4", offset=data_offset)
+        y = y[: len(y) - len(y) % channels].astype(np.float32)
+        return y.reshape(-1, channels).T, sr
+    
     @staticmethod
     def preprocess_audio(input_file_path, output_file_path=None, 
                         normalize=True, remove_noise=True, trim_silence=True,
-                        apply_highpass=True, apply_lowpass=True):
+                        apply_highpass=True, apply_lowpass=True, zero_phase=False,
+                        streaming=False, target_sr=16000, output_format="flac",
+                        strip_pauses=False, adaptive=False, segment_seconds=None,
+                        return_meta=False):
         """
         Preprocess audio file to improve quality for transcription.
         
+        The input is decoded once into memory and every stage runs on that buffer,
+        so no intermediate conversion files are written. With streaming=True the
+        stages run block by block instead (see StreamingAudioPreprocessor), which
+        keeps memory flat for long recordings.
+        
+        Audio is resampled to target_sr (16kHz mono, what Whisper expects) while it is
+        decoded, so the filters and STFT run on the smaller signal, and the result is
+        written in a compact upload encoding.
+        
+        With adaptive=True a quick AudioQualityProbe decides which of the enabled
+        stages the recording actually needs (e.g. clean audio skips the STFT denoise).
+        
         Args:
-            input_file_path: Path to the input audio file
-            output_file_path: Path to save the processed audio file (if None, a temp file is created)
+            input_file_path: Path to the input audio file, raw audio bytes, or a binary file object
+            output_file_path: Path to save the processed audio file (if None, a scratch file is
+                created that the caller must remove)
             normalize: Whether to normalize audio volume
             remove_noise: Whether to apply noise reduction
             trim_silence: Whether to trim silence from the beginning and end
             apply_highpass: Whether to apply high-pass filter (remove low frequencies)
             apply_lowpass: Whether to apply low-pass filter (remove high frequencies)
+            zero_phase: Whether to run the band-pass forward and backward (in-memory path only)
+            streaming: Whether to process in fixed-size blocks with bounded memory
+            target_sr: Output sample rate (None keeps the native rate)
+            output_format: Output encoding, one of OUTPUT_FORMATS ("wav", "flac", "opus")
+            strip_pauses: Whether to cut internal pauses with VoiceActivityDetector (in-memory path only)
+            adaptive: Whether to let the quality probe switch off stages the audio does not need
+            segment_seconds: If set, split the processed audio at pauses into segments of at most
+                this length, written next to the output file instead of it; a recording that fits
+                in one segment is written to the output file (in-memory path only)
+            return_meta: If True, returns (path, meta_dict) instead of just the path
             
         Returns:
-            Path to the processed audio file
+            Path to the processed audio file, or (path, meta) if return_meta is set. meta holds
+            the chosen "plan" (stage flags and probe metrics) and the "offset_map": a list of
+            [output_start, input_start, duration] segments in seconds (None when streaming);
+            see VoiceActivityDetector.to_original_time. With segment_seconds, meta["segments"]
+            lists {"path", "start", "duration"} per segment, timed on the processed audio, and
+            the returned path only exists if it is the single segment.
         """
-        # Create temp file if output path not provided
+        if output_format not in AudioPreprocessingService.OUTPUT_FORMATS:
+            raise ValueError(f"Unsupported output format: {output_format}")
+        container, subtype, extension = AudioPreprocessingService.OUTPUT_FORMATS[output_format]
+        
+        # Create a scratch file if output path not provided
         if not output_file_path:
-            temp_dir = tempfile.mkdtemp()
-            output_file_path = os.path.join(temp_dir, "processed_audio.wav")
+            output_file_path = ScratchSpace.temp_file(extension)
         
-        # Load audio file using librosa
         try:
-            # Check if input_file_path is None or empty
-            if not input_file_path:
+            # Check if the input is None or empty
+            if input_file_path is None or (isinstance(input_file_path, (str, bytes)) and not input_file_path):
                 raise ValueError("Input file path is None or empty")
             
-            # Use pydub to convert any format to WAV first if needed
-            if not input_file_path.lower().endswith('.wav'):
-                audio = AudioSegment.from_file(input_file_path)
-                temp_wav = os.path.join(os.path.dirname(input_file_path), "temp_conversion.wav")
-                audio.export(temp_wav, format="wav")
-                input_file_path = temp_wav
-                
-            # Load the audio with librosa
-            y, sr = librosa.load(input_file_path, sr=None)
-            
-            # Apply preprocessing steps
-            if trim_silence:
-                # Trim leading and trailing silence
-                y, _ = librosa.effects.trim(y, top_db=20)
-            
-            if apply_highpass:
-                # Apply high-pass filter (300Hz cutoff to keep speech but remove some low rumble)
-                b, a = signal.butter(5, 300/(sr/2), 'highpass')
-                y = signal.filtfilt(b, a, y)
-            
-            if apply_lowpass:
-                # Apply low-pass filter (8000Hz cutoff, most speech content is below this)
-                b, a = signal.butter(5, 8000/(sr/2), 'lowpass')
-                y = signal.filtfilt(b, a, y)
-            
-            if remove_noise:
-                # Simple noise reduction using spectral gating
-                # This is a simplified approach - for more advanced noise reduction, consider using librosa.decompose.nn_filter
-                # or a dedicated library like noisereduce
-                
-                # Estimate noise from a small segment (assuming first 0.5 seconds might be noise/silence)
-                noise_sample = y[:int(sr * 0.5)] if len(y) > sr * 0.5 else y[:int(len(y) * 0.1)]
-                
-                # Compute noise profile
-                noise_stft = librosa.stft(noise_sample)
-                noise_power = np.mean(np.abs(noise_stft)**2, axis=1)
-                
-                # Compute STFT of the signal
-                speech_stft = librosa.stft(y)
-                speech_power = np.abs(speech_stft)**2
-                
-                # Apply simple spectral subtraction with a floor
-                mask = (speech_power - 2 * noise_power.reshape(-1, 1)) / speech_power
-                mask = np.maximum(mask, 0.1)  # Apply floor to avoid extreme attenuation
-                
-                # Apply the mask and reconstruct the signal
-                speech_stft_denoised = speech_stft * mask
-                y = librosa.istft(speech_stft_denoised)
-            
-            if normalize:
-                # Normalize audio to have consistent volume
-                y = librosa.util.normalize(y)
-            
-            # Save the processed audio
-            sf.write(output_file_path, y, sr)
-            
-            # Clean up temporary conversion file if created
-            if input_file_path.endswith("temp_conversion.wav"):
-                os.remove(input_file_path)
+            stages = {
+                "normalize": normalize,
+                "remove_noise": remove_noise,
+                "trim_silence": trim_silence,
+                "apply_highpass": apply_highpass,
+                "apply_lowpass": apply_lowpass,
+            }
+            probe = None
+            if adaptive:
+                probe = AudioQualityProbe.probe(input_file_path)
+                chosen = AudioQualityProbe.plan(probe, target_sr)
+                # The probe only switches stages off, never on
+                stages = {stage: enabled and chosen[stage] for stage, enabled in stages.items()}
+            meta = {"plan": {"adaptive": adaptive, "stages": stages, "probe": probe}, "offset_map": None}
+            
+            if streaming:
+                if strip_pauses:
+                    raise ValueError("strip_pauses is not supported with streaming=True")
+                if segment_seconds:
+                    raise ValueError("segment_seconds is not supported with streaming=True")
+                StreamingAudioPreprocessor.process_file(
+                    input_file_path,
+                    output_file_path,
+                    target_sr=target_sr,
+                    output_format=container,
+                    output_subtype=subtype,
+                    **stages,
+                )
+                return (output_file_path, meta) if return_meta else output_file_path
+            
+            # Decode straight into a float32 buffer (no temp WAV, no second read),
+            # downsampling before any of the stages run
+            y, sr = AudioPreprocessingService.decode_audio(input_file_path, target_sr=target_sr)
             
+            y, meta["offset_map"] = AudioPreprocessingService._apply_stages(
+                y, sr,
+                zero_phase=zero_phase,
+                strip_pauses=strip_pauses,
+                **stages,
+            )
+            
+            if segment_seconds:
+                # The segments replace the full file (written only when there is a single segment)
+                meta["segments"] = AudioPreprocessingService._write_segments(
+                    y, sr, output_file_path, segment_seconds, meta["offset_map"], container, subtype
+                )
+            else:
+                # Save the processed audio in the upload encoding
+                sf.write(output_file_path, y, sr, format=container, subtype=subtype)
+            
+            if return_meta:
+                return output_file_path, meta
             return output_file_path
             
         except Exception as e:
             raise Exception(f"Audio preprocessing failed: {str(e)}")
     
     @staticmethod
-    def convert_to_optimal_format(input_file_path, target_sr=16000):
+    def _apply_stages(y, sr, normalize=True, remove_noise=True, trim_silence=True,
+                      apply_highpass=True, apply_lowpass=True, zero_phase=False, strip_pauses=False):
+        """Run the enhancement stages on an in-memory mono signal; returns (signal, offset_map)."""
+        offset = 0.0
+        if trim_silence:
+            # Trim leading and trailing silence
+            y, (start, _) = librosa.effects.trim(y, top_db=20)
+            offset = start / sr
+        
+        if apply_highpass or apply_lowpass:
+            # Band-pass as one cached SOS cascade: 300Hz high-pass removes low rumble,
+            # 8000Hz low-pass keeps the band where most speech content lives
+            y = SpeechFilterBank.apply(y, sr, apply_highpass, apply_lowpass, zero_phase=zero_phase)
+        
+        if remove_noise:
+            # Simple noise reduction using spectral gating
+            # This is a simplified approach - for more advanced noise reduction, consider using librosa.decompose.nn_filter
+            # or a dedicated library like noisereduce
+            
+            # Estimate noise from a small segment (assuming first 0.5 seconds might be noise/silence)
+            noise_sample = y[:int(sr * 0.5)] if len(y) > sr * 0.5 else y[:int(len(y) * 0.1)]
+            
+            # Compute noise profile
+            noise_stft = librosa.stft(noise_sample)
+            noise_power = np.mean(np.abs(noise_stft)**2, axis=1)
+            
+            # Compute STFT of the signal
+            speech_stft = librosa.stft(y)
+            speech_power = np.abs(speech_stft)**2
+            
+            # Apply simple spectral subtraction with a floor
+            mask = (speech_power - 2 * noise_power.reshape(-1, 1)) / speech_power
+            mask = np.maximum(mask, 0.1)  # Apply floor to avoid extreme attenuation
+            
+            # Apply the mask and reconstruct the signal
+            speech_stft_denoised = speech_stft * mask
+            y = librosa.istft(speech_stft_denoised)
+        
+        if strip_pauses:
+            # Cut internal pauses, keeping a map back to the original timeline
+            y, offset_map = VoiceActivityDetector().strip_silence(y, sr, offset=offset)
+        else:
+            offset_map = VoiceActivityDetector.identity_map(len(y) / sr, offset=offset)
+        
+        if normalize:
+            # Normalize audio to have consistent volume
+            y = librosa.util.normalize(y)
+        
+        return y, offset_map
+    
+    @staticmethod
+    def _write_segments(y, sr, output_file_path, segment_seconds, offset_map, container, subtype):
+        """Split y at pauses and write each segment beside output_file_path (or to it, if only one); returns segment meta."""
+        cuts = VoiceActivityDetector().split_points(y, sr, segment_seconds, offset_map)
+        if len(cuts) == 1:
+            sf.write(output_file_path, y, sr, format=container, subtype=subtype)
+            return [{"path": output_file_path, "start": 0.0, "duration": float(len(y) / sr)}]
+        
+        stem, extension = os.path.splitext(output_file_path)
+        segments = []
+        for index, (start, end) in enumerate(zip(cuts, cuts[1:] + [len(y)])):
+            path = f"{stem}_{index:03d}{extension}"
+            sf.write(path, y[start:end], sr, format=container, subtype=subtype)
+            segments.append({"path": path, "start": float(start / sr), "duration": float((end - start) / sr)})
+        return segments
+    
+    @staticmethod
+    def convert_to_optimal_format(input_file_path, target_sr=16000, output_format="wav"):
         """
-        Convert audio to an optimal format for Whisper (16kHz mono WAV).
+        Convert audio to an optimal format for Whisper (16kHz mono, 16-bit PCM by default).
         
         Args:
             input_file_path: Path to the input audio file
             target_sr: Target sample rate (Whisper works best with 16kHz)
+            output_format: Output encoding, one of OUTPUT_FORMATS ("wav", "flac", "opus")
             
         Returns:
             Path to the converted audio file
         """
-        temp_dir = tempfile.mkdtemp()
-        output_file_path = os.path.join(temp_dir, "whisper_optimized.wav")
+        if output_format not in AudioPreprocessingService.OUTPUT_FORMATS:
+            raise ValueError(f"Unsupported output format: {output_format}")
+        container, subtype, extension = AudioPreprocessingService.OUTPUT_FORMATS[output_format]
+        
+        output_file_path = ScratchSpace.temp_file(extension)
         
         try:
-            # Load audio
-            y, sr = librosa.load(input_file_path, sr=None, mono=True)
-            
-            # Resample if needed
-            if sr != target_sr:
-                y = librosa.resample(y, orig_sr=sr, target_sr=target_sr)
+            # Decode and resample in one pass
+            y, _ = AudioPreprocessingService.decode_audio(input_file_path, target_sr=target_sr)
             
-            # Save as 16-bit PCM WAV (optimal for Whisper)
-            sf.write(output_file_path, y, target_sr, subtype='PCM_16')
+            sf.write(output_file_path, y, target_sr, format=container, subtype=subtype)
             
             return output_file_path
             
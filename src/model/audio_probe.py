@@ -0,0 +1,140 @@
+import io
+import numpy as np
+import soundfile as sf
+
+
+class AudioQualityProbe:
+    """
+    Cheap quality estimate used to decide which preprocessing stages a recording needs.
+
+    The probe reads the header plus a handful of short windows spread over the file
+    (never the whole signal) and estimates SNR, clipping, bandwidth and low-frequency
+    rumble. plan() turns those numbers into stage flags for preprocess_audio, so clean
+    recordings skip the STFT denoise and filters they do not need. Clipping is reported
+    for the pipeline meta only; no stage can repair it.
+    """
+
+    N_WINDOWS = 8
+    WINDOW_SECONDS = 0.5
+    FRAME_SECONDS = 0.02
+    SPECTRUM_SECONDS = 0.064
+    RUMBLE_BELOW_HZ = 100
+
+    # Plan thresholds
+    DENOISE_BELOW_SNR_DB = 25.0
+    HIGHPASS_ABOVE_RUMBLE_RATIO = 0.02
+    LOWPASS_ABOVE_BANDWIDTH_HZ = 8000
+
+    # --- Public API --- #
+    @staticmethod
+    def probe(source):
+        """
+        Estimate quality metrics of an audio source.
+
+        Args:
+            source: Path to an audio file, raw audio bytes, or a seekable binary file object
+
+        Returns:
+            Dict of metrics, or None if the format cannot be probed without a full decode
+        """
+        if isinstance(source, (bytes, bytearray, memoryview)):
+            source = io.BytesIO(source)
+        position = source.tell() if hasattr(source, "read") else None
+        try:
+            with sf.SoundFile(source) as f:
+                sr, channels, frames = f.samplerate, f.channels, f.frames
+                windows = AudioQualityProbe._read_windows(f)
+        except (RuntimeError, TypeError):
+            return None
+        finally:
+            if position is not None:
+                source.seek(position)
+
+        result = {
+            "sample_rate": sr,
+            "channels": channels,
+            "duration": frames / sr if sr else 0.0,
+        }
+        if not windows:
+            return result
+
+        y = np.concatenate(windows)
+        frame = max(1, int(sr * AudioQualityProbe.FRAME_SECONDS))
+        usable = len(y) - len(y) % frame
+        energy = np.mean(y[:usable].reshape(-1, frame) ** 2, axis=1) if usable else np.zeros(1)
+        noise, speech = np.percentile(energy, 10), np.percentile(energy, 90)
+
+        # Longer frames for the spectrum so the rumble band spans a few bins
+        n_fft = max(1, int(sr * AudioQualityProbe.SPECTRUM_SECONDS))
+        spectrum = np.zeros(n_fft // 2 + 1)
+        for window in windows:
+            n = len(window) - len(window) % n_fft
+            if n:
+                spectrum += np.sum(np.abs(np.fft.rfft(window[:n].reshape(-1, n_fft), axis=1)) ** 2, axis=0)
+        freqs = np.fft.rfftfreq(n_fft, 1 / sr)
+        total = spectrum.sum()
+        cumulative = np.cumsum(spectrum) / total if total > 0 else np.ones_like(spectrum)
+
+        result.update({
+            "peak": float(np.max(np.abs(y))) if len(y) else 0.0,
+            "clipping_ratio": float(np.mean(np.abs(y) >= 0.999)) if len(y) else 0.0,
+            "snr_db": float(10 * np.log10((speech + 1e-12) / (noise + 1e-12))),
+            # Frequency below which 99% of the energy lies
+            "bandwidth_hz": float(freqs[min(np.searchsorted(cumulative, 0.99), len(freqs) - 1)]),
+            "rumble_ratio": (float(spectrum[freqs < AudioQualityProbe.RUMBLE_BELOW_HZ].sum() / total)
+                             if total > 0 else 0.0),
+        })
+        return result
+
+    @staticmethod
+    def plan(probe, target_sr=None):
+        """
+        Choose preprocessing stages from probe metrics.
+
+        Args:
+            probe: Result of probe() (None selects every stage)
+            target_sr: Sample rate the audio will be processed at, if resampled
+
+        Returns:
+            Dict of preprocess_audio stage flags
+        """
+        if not probe or "snr_db" not in probe:
+            return {
+                "trim_silence": True,
+                "apply_highpass": True,
+                "apply_lowpass": True,
+                "remove_noise": True,
+                "normalize": True,
+            }
+        nyquist = (target_sr or probe["sample_rate"]) / 2
+        return {
+            "trim_silence": True,
+            "apply_highpass": probe["rumble_ratio"] > AudioQualityProbe.HIGHPASS_ABOVE_RUMBLE_RATIO,
+            "apply_lowpass": (probe["bandwidth_hz"] > AudioQualityProbe.LOWPASS_ABOVE_BANDWIDTH_HZ
+                              and nyquist > AudioQualityProbe.LOWPASS_ABOVE_BANDWIDTH_HZ),
+            "remove_noise": probe["snr_db"] < AudioQualityProbe.DENOISE_BELOW_SNR_DB,
+            # Trimming and normalization are linear-time and keep the output consistent
+            "normalize": True,
+        }
+
+    # --- Private Helpers --- #
+    @staticmethod
+    def _read_windows(f):
+        """Read N_WINDOWS short mono windows spread evenly across an open SoundFile."""
+        length = max(1, int(f.samplerate * AudioQualityProbe.WINDOW_SECONDS))
+        if f.frames <= 0:
+            return []
+        if f.frames <= length * AudioQualityProbe.N_WINDOWS or not f.seekable():
+            starts = [0]
+            length = f.frames if f.frames <= length * AudioQualityProbe.N_WINDOWS else length
+        else:
+            starts = np.linspace(0, f.frames - length, AudioQualityProbe.N_WINDOWS).astype(int)
+
+        windows = []
+        for start in starts:
+            if f.seekable():
+                f.seek(int(start))
+            block = f.read(length, dtype="float32", always_2d=True)
+            if len(block):
+                windows.append(block.mean(axis=1, dtype=np.float32))
+        return windows
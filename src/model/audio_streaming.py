@@ -0,0 +1,391 @@
+import os
+import shutil
+import struct
+import subprocess
+import threading
+import numpy as np
+import soundfile as sf
+import soxr
+from scipy import signal
+
+from model.audio_filters import SpeechFilterBank
+from model.wav_mmap import WavMemmap
+
+
+class StreamingAudioPreprocessor:
+    """
+    Block-wise version of AudioPreprocessingService.preprocess_audio for long recordings.
+
+    The signal is read, filtered and denoised in fixed-size blocks, so peak memory depends
+    on the block size rather than on the recording length:
+    - high/low-pass filters are causal IIR sections whose state is carried between blocks
+    - spectral subtraction is a streaming STFT with overlap-add and a running noise profile
+    - output is written incrementally; trimming and normalization are applied in a second
+      block-wise pass over the written file, once the global peak and speech bounds are known
+    """
+
+    def __init__(self, sr, normalize=True, remove_noise=True, trim_silence=True,
+                 apply_highpass=True, apply_lowpass=True, top_db=20,
+                 n_fft=2048, hop_length=512, noise_seconds=0.5, noise_update=0.05):
+        """
+        Args:
+            sr: Sample rate of the incoming blocks
+            normalize: Whether to peak-normalize the output
+            remove_noise: Whether to apply spectral-subtraction noise reduction
+            trim_silence: Whether to trim silence from the beginning and end
+            apply_highpass: Whether to apply the 300Hz high-pass filter
+            apply_lowpass: Whether to apply the 8kHz low-pass filter
+            top_db: Threshold (dB below the loudest frame) used for trimming
+            n_fft: STFT frame length
+            hop_length: STFT hop length
+            noise_seconds: Length of the initial segment used to seed the noise profile
+            noise_update: Smoothing factor for updating the noise profile from quiet frames
+        """
+        self.sr = sr
+        self.normalize = normalize
+        self.remove_noise = remove_noise
+        self.trim_silence = trim_silence
+        self.n_fft = n_fft
+        self.hop = hop_length
+        self.noise_frames = max(1, int(sr * noise_seconds) // hop_length)
+        self.noise_update = noise_update
+        self.trim_ratio = 10 ** (-top_db / 20)
+
+        # Stateful IIR filters (cached second-order sections, causal)
+        self._sos = SpeechFilterBank.design(sr, apply_highpass, apply_lowpass)
+        self._zi = SpeechFilterBank.initial_state(self._sos) if self._sos is not None else None
+
+        # Streaming STFT state; frames are centered like librosa (zero padding at the start)
+        self._window = signal.get_window('hann', n_fft).astype(np.float32)
+        self._window_sq = self._window ** 2
+        self._pending = np.zeros(n_fft // 2, dtype=np.float32)
+        self._ola = np.zeros(n_fft - hop_length, dtype=np.float32)
+        self._ola_norm = np.zeros(n_fft - hop_length, dtype=np.float32)
+        self._to_skip = n_fft // 2
+        self._noise_power = None
+        self._frame_index = 0
+
+        # Bookkeeping for trimming / normalization without keeping the signal
+        self.samples_in = 0
+        self.samples_out = 0
+        self.peak = 0.0
+        self._max_rms = 0.0
+        self._rising = []   # (frame, rms) each time a new loudest frame is seen
+        self._falling = []  # strictly decreasing suffix maxima (frame, rms)
+
+    # --- Public API --- #
+    @staticmethod
+    def process_file(input_source, output_file_path, block_seconds=2.0, target_sr=None,
+                     output_format=None, output_subtype=None, **options):
+        """
+        Preprocess an audio source block by block and write the result to output_file_path.
+
+        Args:
+            input_source: Path to the input audio file, raw audio bytes, or a binary file object
+            output_file_path: Path of the processed audio file
+            block_seconds: Length of each processing block
+            target_sr: Sample rate to resample to while reading (None keeps the native rate)
+            output_format: soundfile container of the output (None infers it from the extension)
+            output_subtype: soundfile subtype of the output (None uses the container default)
+            **options: Stage flags forwarded to StreamingAudioPreprocessor
+
+        Returns:
+            Path to the processed audio file
+        """
+        sr, blocks = StreamingAudioPreprocessor.open_blocks(input_source, block_seconds, target_sr)
+        processor = StreamingAudioPreprocessor(sr, **options)
+        needs_second_pass = processor.normalize or processor.trim_silence
+        first_pass_path = output_file_path + ".partial.wav" if needs_second_pass else output_file_path
+
+        try:
+            if needs_second_pass:
+                first_pass = dict(format='WAV', subtype='FLOAT')
+            else:
+                first_pass = dict(format=output_format, subtype=output_subtype)
+            with sf.SoundFile(first_pass_path, 'w', samplerate=sr, channels=1, **first_pass) as out:
+                for block in blocks:
+                    processed = processor.process_block(block)
+                    if processed.size:
+                        out.write(processed)
+                tail = processor.flush()
+                if tail.size:
+                    out.write(tail)
+
+            if needs_second_pass:
+                processor._finalize(first_pass_path, output_file_path, block_seconds,
+                                    output_format, output_subtype)
+        finally:
+            blocks.close()
+            if needs_second_pass and os.path.exists(first_pass_path):
+                os.remove(first_pass_path)
+
+        return output_file_path
+
+    def process_block(self, block):
+        """Filter and denoise one block; returns the samples that are final so far."""
+        block = np.asarray(block, dtype=np.float32)
+        self.samples_in += len(block)
+
+        if self._sos is not None and len(block):
+            block, self._zi = signal.sosfilt(self._sos, block, zi=self._zi)
+            block = block.astype(np.float32, copy=False)
+
+        if not (self.remove_noise or self.trim_silence):
+            return self._emit(block)
+
+        buffered = np.concatenate([self._pending, block])
+        n_frames = self._frames_ready(len(buffered))
+        # Hold back output until the initial noise profile can be estimated
+        if self.remove_noise and self._noise_power is None and n_frames < self.noise_frames:
+            self._pending = buffered
+            return np.zeros(0, dtype=np.float32)
+        return self._process_frames(buffered, n_frames, block)
+
+    def flush(self):
+        """Process the remaining buffered samples at the end of the stream."""
+        if not (self.remove_noise or self.trim_silence):
+            return np.zeros(0, dtype=np.float32)
+
+        # Pad with zeros so every real sample is covered by a complete set of frames
+        buffered = np.concatenate([self._pending, np.zeros(self.n_fft, dtype=np.float32)])
+        return self._process_frames(buffered, self._frames_ready(len(buffered)), None)
+
+    @staticmethod
+    def open_blocks(source, block_seconds=2.0, target_sr=None):
+        """
+        Open an audio source for block-wise mono reading, optionally resampling on the fly.
+
+        Returns:
+            Tuple of (sample_rate, generator of float32 blocks); close the generator to
+            release the underlying file or decoder process early.
+        """
+        if isinstance(source, (bytes, bytearray, memoryview)):
+            import io
+            source = io.BytesIO(source)
+
+        # PCM WAV: convert blocks straight from a memory map instead of reading through libsndfile
+        wav = WavMemmap.open(source)
+        if wav is not None:
+            blocks = wav.blocks(max(1, int(wav.samplerate * block_seconds)))
+            if not target_sr or target_sr == wav.samplerate:
+                return wav.samplerate, blocks
+            return target_sr, StreamingAudioPreprocessor._resample_blocks(blocks, wav.samplerate, target_sr)
+
+        position = source.tell() if hasattr(source, "read") else None
+        try:
+            info = sf.info(source)
+        except (RuntimeError, TypeError):
+            if position is not None:
+                source.seek(position)
+            return StreamingAudioPreprocessor._ffmpeg_blocks(source, block_seconds, target_sr)
+
+        if position is not None:
+            source.seek(position)
+        block_frames = max(1, int(info.samplerate * block_seconds))
+
+        def blocks():
+            for block in sf.blocks(source, blocksize=block_frames, dtype='float32', always_2d=True):
+                yield block.mean(axis=1, dtype=np.float32) if block.shape[1] > 1 else block[:, 0]
+
+        if not target_sr or target_sr == info.samplerate:
+            return info.samplerate, blocks()
+        return target_sr, StreamingAudioPreprocessor._resample_blocks(blocks(), info.samplerate, target_sr)
+
+    # --- Private Helpers --- #
+    def _frames_ready(self, n_samples):
+        if n_samples < self.n_fft:
+            return 0
+        return (n_samples - self.n_fft) // self.hop + 1
+
+    def _process_frames(self, buffered, n_frames, passthrough):
+        # Without denoising, frames are only used for loudness tracking and the
+        # filtered block passes straight through
+        if not self.remove_noise:
+            if n_frames:
+                frames = np.lib.stride_tricks.sliding_window_view(buffered, self.n_fft)[::self.hop][:n_frames]
+                self._track_rms(np.sqrt(np.mean(frames ** 2, axis=1)))
+                self._frame_index += n_frames
+            self._pending = buffered[n_frames * self.hop:]
+            return self._emit(passthrough)
+
+        if n_frames == 0:
+            self._pending = buffered
+            return np.zeros(0, dtype=np.float32)
+
+        frames = np.lib.stride_tricks.sliding_window_view(buffered, self.n_fft)[::self.hop][:n_frames]
+        self._pending = buffered[n_frames * self.hop:]
+
+        if self.trim_silence:
+            self._track_rms(np.sqrt(np.mean(frames ** 2, axis=1)))
+        self._frame_index += n_frames
+
+        spec = np.fft.rfft(frames * self._window, axis=1)
+        power = spec.real ** 2 + spec.imag ** 2
+        self._update_noise_profile(power)
+
+        # Spectral subtraction with a floor, as in the in-memory path
+        mask = np.divide(power - 2 * self._noise_power, power, out=np.ones_like(power), where=power > 0)
+        np.maximum(mask, 0.1, out=mask)
+        frames_out = np.fft.irfft(spec * mask, n=self.n_fft, axis=1).astype(np.float32) * self._window
+
+        # Overlap-add into an accumulator that starts at the first pending frame
+        span = (n_frames - 1) * self.hop + self.n_fft
+        acc = np.zeros(span, dtype=np.float32)
+        norm = np.zeros(span, dtype=np.float32)
+        acc[:len(self._ola)] += self._ola
+        norm[:len(self._ola_norm)] += self._ola_norm
+        for i in range(n_frames):
+            start = i * self.hop
+            acc[start:start + self.n_fft] += frames_out[i]
+            norm[start:start + self.n_fft] += self._window_sq
+
+        ready = n_frames * self.hop
+        out = acc[:ready] / np.where(norm[:ready] > 1e-8, norm[:ready], 1.0)
+        self._ola = acc[ready:]
+        self._ola_norm = norm[ready:]
+
+        # Drop the leading padding that centers the first frame
+        if self._to_skip:
+            skipped = min(self._to_skip, len(out))
+            out = out[skipped:]
+            self._to_skip -= skipped
+
+        remaining = self.samples_in - self.samples_out
+        return self._emit(out[:max(remaining, 0)])
+
+    def _update_noise_profile(self, power):
+        if self._noise_power is None:
+            self._noise_power = power[:self.noise_frames].mean(axis=0)
+            return
+        # Refresh the profile from frames that look like background noise
+        quiet = power.sum(axis=1) < 2 * self._noise_power.sum()
+        if np.any(quiet):
+            a = self.noise_update
+            self._noise_power = (1 - a) * self._noise_power + a * power[quiet].mean(axis=0)
+
+    def _track_rms(self, rms):
+        """Keep just enough frame loudness history to trim like librosa.effects.trim at the end."""
+        for offset, value in enumerate(rms):
+            frame = self._frame_index + offset
+            value = float(value)
+            if value > self._max_rms:
+                self._max_rms = value
+                self._rising.append((frame, value))
+            while self._falling and self._falling[-1][1] <= value:
+                self._falling.pop()
+            self._falling.append((frame, value))
+
+        # Frames quieter than the threshold implied by the current maximum can never be bounds
+        floor = self._max_rms * self.trim_ratio
+        if self._falling and self._falling[0][1] < floor:
+            self._falling = [item for item in self._falling if item[1] >= floor]
+
+    def _emit(self, out):
+        if out is None:
+            return np.zeros(0, dtype=np.float32)
+        self.samples_out += len(out)
+        if len(out):
+            self.peak = max(self.peak, float(np.max(np.abs(out))))
+        return out
+
+    def _trim_bounds(self):
+        if not self.trim_silence:
+            return 0, self.samples_out
+        threshold = self._max_rms * self.trim_ratio
+        if self._max_rms <= 0:
+            return 0, 0
+        first = next(frame for frame, value in self._rising if value >= threshold)
+        last = max(frame for frame, value in self._falling if value >= threshold)
+        return first * self.hop, min(self.samples_out, (last + 1) * self.hop)
+
+    def _finalize(self, first_pass_path, output_file_path, block_seconds, output_format=None, output_subtype=None):
+        """Second pass: apply trimming bounds and normalization gain block by block."""
+        start, end = self._trim_bounds()
+        gain = 1.0 / self.peak if self.normalize and self.peak > 0 else 1.0
+        block_frames = max(1, int(self.sr * block_seconds))
+
+        with sf.SoundFile(output_file_path, 'w', samplerate=self.sr, channels=1,
+                          format=output_format, subtype=output_subtype) as out:
+            if end <= start:
+                return
+            for block in sf.blocks(first_pass_path, blocksize=block_frames, start=start, stop=end, dtype='float32'):
+                out.write(block * gain)
+
+    @staticmethod
+    def _resample_blocks(blocks, orig_sr, target_sr):
+        """Resample a block generator with a stateful resampler (no seams between blocks)."""
+        resampler = soxr.ResampleStream(orig_sr, target_sr, 1, dtype='float32')
+        try:
+            for block in blocks:
+                out = resampler.resample_chunk(block)
+                if out.size:
+                    yield out
+            tail = resampler.resample_chunk(np.zeros(0, dtype=np.float32), last=True)
+            if tail.size:
+                yield tail
+        finally:
+            blocks.close()
+
+    @staticmethod
+    def _ffmpeg_blocks(source, block_seconds, target_sr=None):
+        """Stream-decode any ffmpeg-supported source without materializing it."""
+        if shutil.which("ffmpeg") is None:
+            raise RuntimeError("ffmpeg is required to decode this audio format but was not found on PATH")
+
+        feed = hasattr(source, "read")
+        cmd = ["ffmpeg", "-hide_banner", "-loglevel", "error"]
+        cmd += ["-i", "pipe:0"] if feed else ["-nostdin", "-i", os.fspath(source)]
+        cmd += ["-vn", "-map", "0:a:0", "-ac", "1"]
+        if target_sr:
+            cmd += ["-ar", str(target_sr)]
+        cmd += ["-acodec", "pcm_f32be", "-f", "au", "pipe:1"]
+        proc = subprocess.Popen(
+            cmd,
+            stdin=subprocess.PIPE if feed else subprocess.DEVNULL,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+        )
+
+        if feed:
+            def _feed():
+                try:
+                    while chunk := source.read(1 << 16):
+                        proc.stdin.write(chunk)
+                except (BrokenPipeError, ValueError):
+                    pass
+                finally:
+                    try:
+                        proc.stdin.close()
+                    except OSError:
+                        pass
+            threading.Thread(target=_feed, daemon=True).start()
+
+        header = proc.stdout.read(24)
+        if len(header) < 24:
+            proc.wait()
+            raise RuntimeError(f"ffmpeg decoding failed: {proc.stderr.read().decode(errors='replace').strip()}")
+        magic, data_offset, _, encoding, sr, _ = struct.unpack(">4sIIIII", header)
+        if magic != b".snd" or encoding != 6:
+            proc.kill()
+            raise RuntimeError("Unexpected output from ffmpeg decoder")
+        proc.stdout.read(data_offset - 24)
+        block_bytes = max(1, int(sr * block_seconds)) * 4
+
+        def blocks():
+            try:
+                while True:
+                    data = proc.stdout.read(block_bytes)
+                    if not data:
+                        break
+                    data = data[: len(data) - len(data) % 4]
+                    yield np.frombuffer(data, dtype=">f4").astype(np.float32)
+                if proc.wait() != 0:
+                    raise RuntimeError(f"ffmpeg decoding failed: {proc.stderr.read().decode(errors='replace').strip()}")
+            finally:
+                if proc.poll() is None:
+                    proc.kill()
+                    proc.wait()
+                proc.stdout.close()
+                proc.stderr.close()
+
+        return sr, blocks()
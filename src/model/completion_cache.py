@@ -0,0 +1,145 @@
+import asyncio
+import hashlib
+import json
+import logging
+import weakref
+from typing import Any, AsyncIterator, Callable, Dict, Optional
+
+from prometheus_client import Counter
+
+from core.config import Config
+from utils.tiered_cache import TieredCache
+
+logger = logging.getLogger(__name__)
+
+COMPLETIONS_COALESCED = Counter(
+    "llm_completions_coalesced_total", "Completion requests served by an identical in-flight request"
+)
+
+
+class CompletionCache:
+    """
+    Cache of deterministic (temperature 0) LLM completions.
+
+    Entries are keyed by the backend, model, a hash of the prompt, a hash of the response
+    schema and the sampling parameters, so re-processing a visit, a Celery retry or a second
+    tab opening the same visit reuses the earlier refinement, translation, extraction and
+    question output. Identical requests that arrive while one is still streaming are
+    coalesced onto it (stream()), so only one upstream call is made for them.
+    """
+
+    _cache = TieredCache(
+        "completion",
+        max_entries=Config.COMPLETION_CACHE_ENTRIES,
+        ttl_seconds=Config.COMPLETION_CACHE_TTL,
+        redis_url=Config.REDIS_CACHE_URL,
+    )
+    # In-flight streams per event loop (asyncio tasks and queues are bound to one loop)
+    _inflight = weakref.WeakKeyDictionary()
+
+    # --- Public API --- #
+    @staticmethod
+    def cacheable(params: Dict[str, Any]) -> bool:
+        """Only greedy decoding is deterministic enough to replay."""
+        return not params.get("temperature")
+
+    @staticmethod
+    def key(backend: str, params: Dict[str, Any]) -> str:
+        """Cache key for a completion request (the keyword arguments of create_completion)."""
+        schema = (params.get("response_format") or {}).get("schema")
+        sampling = {k: v for k, v in params.items() if k not in ("model", "prompt", "response_format", "stream")}
+        parts = {
+            "backend": backend,
+            "model": params.get("model"),
+            "prompt": CompletionCache._digest(params.get("prompt") or ""),
+            "schema": CompletionCache._digest(json.dumps(schema, sort_keys=True)) if schema else None,
+            "params": sampling,
+        }
+        return CompletionCache._digest(json.dumps(parts, sort_keys=True))
+
+    @staticmethod
+    async def aget(key: str) -> Optional[str]:
+        """Cached completion text, or None."""
+        entry = await CompletionCache._cache.aget(key)
+        return entry["text"] if entry else None
+
+    @staticmethod
+    async def aset(key: str, text: str) -> None:
+        await CompletionCache._cache.aset(key, {"text": text})
+
+    @staticmethod
+    async def stream(key: str, source: Callable[[], AsyncIterator[str]]) -> AsyncIterator[str]:
+        """
+        Stream the completion for key, sharing one upstream stream among identical requests.
+
+        The first request starts source() in a background task; later identical requests
+        replay the chunks received so far and then follow it live. A completed stream is
+        written to the cache; an upstream error is raised in every subscriber and not cached.
+        """
+        inflight = CompletionCache._inflight.setdefault(asyncio.get_running_loop(), {})
+        shared = inflight.get(key)
+        if shared is None or shared.abandoned:
+            shared = inflight[key] = _SharedStream(key, source(), inflight)
+        else:
+            COMPLETIONS_COALESCED.inc()
+        async for chunk in shared.subscribe():
+            yield chunk
+
+    # --- Private Helpers --- #
+    @staticmethod
+    def _digest(text: str) -> str:
+        return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+class _SharedStream:
+    """One upstream completion stream fanned out to every subscriber."""
+
+    def __init__(self, key: str, source: AsyncIterator[str], registry: Dict[str, "_SharedStream"]):
+        self.key = key
+        self.chunks = []
+        self.done = False
+        self.error: Optional[BaseException] = None
+        # Set when every subscriber left early; the upstream call is cancelled
+        self.abandoned = False
+        self._registry = registry
+        self._subscribers = set()
+        self._task = asyncio.create_task(self._pump(source))
+
+    async def subscribe(self) -> AsyncIterator[str]:
+        queue = asyncio.Queue()
+        for chunk in self.chunks:
+            queue.put_nowait(chunk)
+        if self.done:
+            queue.put_nowait(None)
+        self._subscribers.add(queue)
+        try:
+            while (chunk := await queue.get()) is not None:
+                yield chunk
+            if self.error is not None:
+                raise self.error
+        finally:
+            self._subscribers.discard(queue)
+            if not self._subscribers and not self.done:
+                # The last client went away: stop paying for tokens nobody reads
+                self.abandoned = True
+                self._task.cancel()
+
+    async def _pump(self, source: AsyncIterator[str]) -> None:
+        try:
+            try:
+                async for chunk in source:
+                    self.chunks.append(chunk)
+                    for queue in self._subscribers:
+                        queue.put_nowait(chunk)
+            except Exception as e:
+                self.error = e
+            finally:
+                self.done = True
+                for queue in self._subscribers:
+                    queue.put_nowait(None)
+            if self.error is None:
+                # Requests arriving meanwhile still join this (complete) stream
+                await CompletionCache.aset(self.key, "".join(self.chunks))
+        finally:
+            if self._registry.get(self.key) is self:
+                del self._registry[self.key]
@@ -26,7 +26,7 @@ class ExtractFeature:
             # Parse features schema
             features_list = json.loads(schema_text) if isinstance(schema_text, str) else schema_text
             
-            api_key = Config.FIREWORKS_API_KEY
+            api_key = Config.stage_api_key("extraction")
             
             # Stream the extraction
             async for chunk in LLMService.extract_features_stream(
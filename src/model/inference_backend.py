@@ -0,0 +1,148 @@
+import asyncio
+import logging
+import os
+import threading
+import weakref
+
+import fireworks.client
+from fireworks.client.api_client import FireworksClient
+
+from core.config import Config
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+class InferenceBackend:
+    """
+    Where ASR and completion requests are sent.
+
+    SpeechService uploads audio to transcription_url and LLMService creates completions via
+    create_completion(), which takes the API key to bill plus the same keyword arguments as
+    fireworks.client.Completion.create and returns the same response objects (or stream of
+    chunks). The active backend is chosen by Config.INFERENCE_BACKEND; see get().
+    """
+
+    name = "base"
+    requires_api_key = True
+
+    @property
+    def transcription_url(self) -> str:
+        raise NotImplementedError
+
+    def create_completion(self, api_key: str = None, **params):
+        raise NotImplementedError
+
+    def acreate_completion(self, api_key: str = None, **params):
+        """Async counterpart of create_completion: an async iterator of chunks when
+        stream=True, otherwise an awaitable response."""
+        raise NotImplementedError
+
+    async def aclose(self, loop: asyncio.AbstractEventLoop = None) -> None:
+        """Release connections held for the given (default: running) event loop."""
+
+    # --- Registry --- #
+    _registry = {}
+    _instances = {}
+    _lock = threading.Lock()
+
+    @staticmethod
+    def register(name: str, backend_class) -> None:
+        """Make a backend selectable as INFERENCE_BACKEND=<name>."""
+        InferenceBackend._registry[name] = backend_class
+
+    @staticmethod
+    def get(name: str = None) -> "InferenceBackend":
+        """The configured backend (one shared instance per name)."""
+        name = name or Config.INFERENCE_BACKEND
+        with InferenceBackend._lock:
+            if name not in InferenceBackend._instances:
+                if name not in InferenceBackend._registry:
+                    raise ValueError(
+                        f"Unknown inference backend: {name} (available: {', '.join(InferenceBackend._registry)})"
+                    )
+                InferenceBackend._instances[name] = InferenceBackend._registry[name]()
+                logger.info("Using %s inference backend", name)
+            return InferenceBackend._instances[name]
+
+
+class FireworksBackend(InferenceBackend):
+    """
+    Fireworks AI: Whisper transcription and the fireworks.client completions API.
+
+    Completions go through a pool of FireworksClient instances, one per API key (and, for
+    the async path, per event loop), instead of the process-global fireworks.client.api_key:
+    concurrent requests on different keys cannot overwrite each other's key, and each key
+    keeps its own keep-alive connections.
+    """
+
+    name = "fireworks"
+
+    def __init__(self, base_url: str = None):
+        self.base_url = (base_url or os.getenv("FIREWORKS_BASE_URL", "https://api.fireworks.ai")).rstrip("/")
+        self._clients = {}
+        # The client's async connection pool must not be shared across event loops
+        self._async_clients = weakref.WeakKeyDictionary()
+        self._clients_lock = threading.Lock()
+
+    @property
+    def transcription_url(self) -> str:
+        return f"{self.base_url}/inference/v1/audio/transcriptions"
+
+    def create_completion(self, api_key: str = None, **params):
+        return fireworks.client.Completion.create(client=self.client(api_key), **params)
+
+    def acreate_completion(self, api_key: str = None, **params):
+        return fireworks.client.Completion.acreate(client=self.async_client(api_key), **params)
+
+    def client(self, api_key: str = None) -> FireworksClient:
+        """Pooled client for api_key, for synchronous calls."""
+        api_key = self._client_key(api_key)
+        with self._clients_lock:
+            if api_key not in self._clients:
+                self._clients[api_key] = self._new_client(api_key)
+            return self._clients[api_key]
+
+    def async_client(self, api_key: str = None) -> FireworksClient:
+        """Pooled client for api_key on the running event loop."""
+        api_key = self._client_key(api_key)
+        clients = self._async_clients.setdefault(asyncio.get_running_loop(), {})
+        if api_key not in clients:
+            clients[api_key] = self._new_client(api_key)
+        return clients[api_key]
+
+    async def aclose(self, loop: asyncio.AbstractEventLoop = None) -> None:
+        """Close the async clients of the given (default: running) event loop."""
+        clients = self._async_clients.pop(loop or asyncio.get_running_loop(), {})
+        for client in clients.values():
+            await client.aclose()
+
+    def _client_key(self, api_key: str = None) -> str:
+        # No key: fall back to fireworks.client.api_key / FIREWORKS_API_KEY as the SDK would
+        return api_key or fireworks.client.api_key or Config.FIREWORKS_API_KEY
+
+    def _new_client(self, api_key: str) -> FireworksClient:
+        return FireworksClient(api_key=api_key, base_url=f"{self.base_url}/inference/v1")
+
+
+class LocalBackend(FireworksBackend):
+    """
+    The bundled stand-in server (inference_stand_in.py) at Config.LOCAL_INFERENCE_URL.
+
+    It speaks the Fireworks HTTP shapes, so requests are built exactly as for Fireworks and
+    only the base URL differs; no real API key is needed.
+    """
+
+    name = "local"
+    requires_api_key = False
+
+    def __init__(self, base_url: str = None):
+        super().__init__(base_url or Config.LOCAL_INFERENCE_URL)
+
+    def _client_key(self, api_key: str = None) -> str:
+        # Stage keys are still passed through, so per-key pooling and limits behave as in production
+        return api_key or "local"
+
+
+InferenceBackend.register(FireworksBackend.name, FireworksBackend)
+InferenceBackend.register(LocalBackend.name, LocalBackend)
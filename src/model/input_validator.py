@@ -1,13 +1,36 @@
 import json
 import logging
-import re
+from typing import Literal, Optional
+
+from prometheus_client import Counter
+from pydantic import BaseModel, Field
+
 from model.llm_service import LLMService
+from model.medical_lexicon import MedicalLexiconClassifier
 from core.config import Config
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+VALIDATION_DECISIONS = Counter(
+    "medical_validation_decisions_total", "Medical validation verdicts by deciding path", ["method", "classification"]
+)
+
+
+class MedicalClassification(BaseModel):
+    classification: Literal["MEDICAL", "NON_MEDICAL"]
+    confidence: int = Field(ge=0, le=100)
+
+
 class MedicalValidator:
+    """
+    MEDICAL / NON_MEDICAL gate for transcripts.
+
+    The in-process MedicalLexiconClassifier decides clearly medical transcripts; everything
+    else is sent to the LLM. NON_MEDICAL stops the pipeline, so only the LLM may decide it.
+    The result's "method" says which path decided ("lexicon" or "llm_validation").
+    """
+
     VALIDATION_PROMPT = """
 You are a medical content classifier.
 Determine if the following text contains medical content such as symptoms, diagnoses, treatments, medications, or other clinical information.
@@ -15,6 +38,7 @@ Determine if the following text contains medical content such as symptoms, diagn
 Text:
 {text}
 
+Classify the text as "MEDICAL" or "NON_MEDICAL", with your confidence from 0 to 100.
 Respond ONLY in valid JSON (no explanations, no extra text).
 JSON format example:
 {{
@@ -23,46 +47,87 @@ JSON format example:
 }}
 """
 
+    MODEL_ACCOUNT = "accounts/fireworks/models/deepseek-v3-0324"
+
     @staticmethod
     def validate_medical_content(text: str) -> dict:
-        try:
-            formatted_prompt = MedicalValidator.VALIDATION_PROMPT.format(text=text)
-            logger.info("Validating medical content with LLM")
+        verdict = MedicalValidator._lexicon_verdict(text)
+        if verdict and verdict["classification"] == "MEDICAL":
+            return MedicalValidator._from_lexicon(verdict)
+
+        logger.info("Validating medical content with LLM")
+        # Use the non-streaming method
+        response = LLMService._call_llm_api(
+            model_account=MedicalValidator.MODEL_ACCOUNT,
+            prompt=MedicalValidator.VALIDATION_PROMPT.format(text=text),
+            pydantic_model=MedicalClassification,
+            temperature=0.1,
+            api_key=Config.stage_api_key("validation"),
+        )
+        return MedicalValidator._parse_response(response, verdict)
 
-            # Use the non-streaming method
-            response = LLMService._call_llm_api(
-                model_account="accounts/fireworks/models/deepseek-v3-0324",
-                prompt=formatted_prompt,
-                temperature=0.1
-            )
+    @staticmethod
+    async def validate_medical_content_async(text: str) -> dict:
+        """validate_medical_content for the streaming pipeline, without blocking the event loop."""
+        verdict = MedicalValidator._lexicon_verdict(text)
+        if verdict and verdict["classification"] == "MEDICAL":
+            return MedicalValidator._from_lexicon(verdict)
 
+        logger.info("Validating medical content with LLM")
+        response = await LLMService._call_llm_api_async(
+            model_account=MedicalValidator.MODEL_ACCOUNT,
+            prompt=MedicalValidator.VALIDATION_PROMPT.format(text=text),
+            pydantic_model=MedicalClassification,
+            temperature=0.1,
+            api_key=Config.stage_api_key("validation"),
+        )
+        return MedicalValidator._parse_response(response, verdict)
+
+    @staticmethod
+    def _lexicon_verdict(text: str) -> Optional[dict]:
+        """First-pass lexicon classification (its classification is MEDICAL or None)."""
+        if not Config.VALIDATION_LEXICON_ENABLED:
+            return None
+        return MedicalLexiconClassifier.classify(text, medical_threshold=Config.VALIDATION_LEXICON_MEDICAL_THRESHOLD)
+
+    @staticmethod
+    def _from_lexicon(verdict: dict) -> dict:
+        logger.info(
+            f"Medical content decided by lexicon: {verdict['classification']} "
+            f"(score {verdict['lexicon_score']}, terms {verdict['matched_terms'][:10]})"
+        )
+        VALIDATION_DECISIONS.labels(method="lexicon", classification=verdict["classification"]).inc()
+        return {
+            "is_medical": verdict["classification"] == "MEDICAL",
+            "confidence": verdict["confidence"],
+            "classification": verdict["classification"],
+            "method": "lexicon",
+            "lexicon_score": verdict["lexicon_score"],
+            "raw_response": None
+        }
+
+    @staticmethod
+    def _parse_response(response, verdict: Optional[dict] = None) -> dict:
+        lexicon_score = verdict["lexicon_score"] if verdict else None
+        try:
             if not response:
                 logger.warning("LLM returned empty response")
                 return {"is_medical": False, "confidence": 0, "classification": None, "raw_response": None}
 
-            response = response.strip()
             logger.info(f"LLM raw response:\n{response}")
+            # Schema-constrained output, already validated against MedicalClassification
+            result_json = json.loads(response)
 
-            # Ensure we have a JSON-like string
-            match = re.search(r'\{.*\}', response, re.DOTALL)
-            if match:
-                json_text = match.group(0)
-            else:
-                # Attempt to wrap missing braces
-                json_text = "{" + response.strip().strip(',') + "}"
-
-            # Optional: fix unquoted keys
-            json_text = re.sub(r'(\w+):', r'"\1":', json_text)  # converts classification: -> "classification":
-            result_json = json.loads(json_text)
-
-            classification = result_json.get("classification", "").upper()
-            confidence = int(result_json.get("confidence", 0))
+            classification = result_json["classification"].upper()
+            confidence = int(result_json["confidence"])
+            VALIDATION_DECISIONS.labels(method="llm_validation", classification=classification).inc()
 
             return {
                 "is_medical": classification == "MEDICAL",
                 "confidence": confidence,
                 "classification": classification,
                 "method": "llm_validation",
+                "lexicon_score": lexicon_score,
                 "raw_response": response
             }
 
@@ -72,5 +137,5 @@ JSON format example:
                 "is_medical": False,
                 "confidence": 0,
                 "classification": None,
-                "raw_response": response if 'response' in locals() else None
-            }
\ No newline at end of file
+                "raw_response": response
+            }
@@ -1,10 +1,14 @@
-import fireworks.client
 import logging
 import json
 from typing import Optional, Type, AsyncGenerator
 from pydantic import BaseModel, ValidationError
 
+from core.config import Config
+from model.completion_cache import CompletionCache
+from model.inference_backend import InferenceBackend
 from utils import prompt as prompt_utils
+from utils.key_limiter import KeyConcurrencyLimiter
+from utils.resilience import Resilience
 
 # ---------------- Logger ---------------- #
 logging.basicConfig(level=logging.INFO)
@@ -26,14 +30,105 @@ class ExtractedFeatures(BaseModel):
     json_data: dict
     reasoning: str
 
+# ---------------- Sectioned Streams ---------------- #
+class SectionedStream:
+    """
+    Splits one marker-delimited completion stream into consecutive sections.
+
+    section(name) streams the text of one section; sections are read in order, from the
+    same upstream stream. Text before the first marker belongs to the first section, and
+    markers split across chunks are recognised. Whitespace around markers is dropped.
+    """
+
+    def __init__(self, chunks: AsyncGenerator[str, None], markers: dict, fallbacks: Optional[dict] = None):
+        """
+        Args:
+            chunks: Upstream text chunks
+            markers: Section name by marker, in output order
+            fallbacks: Per section, a factory for a stream to use when the section comes back empty
+        """
+        self._chunks = chunks
+        self._markers = markers
+        self._fallbacks = fallbacks or {}
+        self._order = list(markers.values())
+        self._current = self._order[0]
+        self._pending = {name: [] for name in self._order}
+        self._buffer = ""
+        self._exhausted = False
+        self.text = {name: "" for name in self._order}
+
+    async def section(self, name: str) -> AsyncGenerator[str, None]:
+        """Stream one section's text; ends when the next section starts or the stream ends."""
+        while True:
+            while self._pending[name]:
+                chunk = self._pending[name].pop(0)
+                self.text[name] += chunk
+                yield chunk
+            if self._exhausted or self._order.index(self._current) > self._order.index(name):
+                break
+            chunk = await anext(self._chunks, None)
+            if chunk is None:
+                self._exhausted = True
+                self._flush(final=True)
+            else:
+                self._feed(chunk)
+
+        if not self.text[name].strip() and name in self._fallbacks:
+            async for chunk in self._fallbacks[name]():
+                self.text[name] += chunk
+                yield chunk
+
+    async def aclose(self) -> None:
+        await self._chunks.aclose()
+
+    def _feed(self, chunk: str) -> None:
+        self._buffer += chunk
+        while True:
+            found = [(self._buffer.find(marker), marker) for marker in self._markers]
+            found = [(index, marker) for index, marker in found if index >= 0]
+            if not found:
+                break
+            index, marker = min(found)
+            self._emit(self._buffer[:index].rstrip())
+            self._current = self._markers[marker]
+            self._buffer = self._buffer[index + len(marker):].lstrip()
+        self._flush()
+
+    def _flush(self, final: bool = False) -> None:
+        """Emit buffered text except what may still turn out to be (or precede) a marker."""
+        if final:
+            self._emit(self._buffer.rstrip())
+            self._buffer = ""
+            return
+        text = self._buffer.rstrip()
+        for marker in self._markers:
+            for size in range(min(len(marker) - 1, len(text)), 0, -1):
+                if text.endswith(marker[:size]):
+                    text = text[:-size].rstrip()
+                    break
+        self._emit(text)
+        self._buffer = self._buffer[len(text):]
+
+    def _emit(self, text: str) -> None:
+        if not text:
+            return
+        if not self.text[self._current] and not self._pending[self._current]:
+            text = text.lstrip()
+        if text:
+            self._pending[self._current].append(text)
+
+
 # ---------------- LLM Service ---------------- #
 class LLMService:
     """Service wrapper around Fireworks LLM API for refinement, translation, and question generation."""
 
+    # Caps in-flight completions per API key; with a key per stage, each stage has its own budget
+    _key_limiter = KeyConcurrencyLimiter(Config.LLM_MAX_CONCURRENCY_PER_KEY)
+
     # --- Public APIs --- #
     @staticmethod
     async def refine_en_transcription_stream(raw_text: str, api_key: str, is_conversation: bool = False):
-        """Stream refined English text word by word."""
+        """Stream refined English text."""
         async for chunk in LLMService.process_text_stream(
             text=raw_text, api_key=api_key, model="deepseek",
             prompt_type="refine_english", is_conversation=is_conversation
@@ -42,7 +137,7 @@ class LLMService:
 
     @staticmethod
     async def refine_ar_transcription_stream(raw_text: str, api_key: str, is_conversation: bool = False):
-        """Stream refined Arabic text word by word."""
+        """Stream refined Arabic text."""
         async for chunk in LLMService.process_text_stream(
             text=raw_text, api_key=api_key, model="deepseek",
             prompt_type="refine_arabic", is_conversation=is_conversation
@@ -51,7 +146,7 @@ class LLMService:
 
     @staticmethod
     async def translate_to_eng_stream(refined_text: str, api_key: str, is_conversation: bool = False):
-        """Stream translation word by word."""
+        """Stream translation."""
         async for chunk in LLMService.process_text_stream(
             text=refined_text, api_key=api_key, model="deepseek",
             prompt_type="translate", is_conversation=is_conversation
@@ -82,6 +177,35 @@ class LLMService:
             yield chunk
 
 
+    @staticmethod
+    def refine_translate_ar_stream(raw_text: str, api_key: str, is_conversation: bool = False) -> SectionedStream:
+        """
+        Refine Arabic text and translate it to English in one call.
+
+        Returns a SectionedStream with a "refinement" and a "translation" section. If the
+        model leaves out the translation, that section falls back to a separate translation
+        call on the refined text.
+        """
+        async def translate_separately():
+            logger.warning("Fused refine+translate returned no translation; translating separately")
+            async for chunk in LLMService.translate_to_eng_stream(
+                stream.text["refinement"], api_key, is_conversation=is_conversation
+            ):
+                yield chunk
+
+        stream = SectionedStream(
+            LLMService.process_text_stream(
+                text=raw_text, api_key=api_key, model="deepseek",
+                prompt_type="refine_translate_arabic", is_conversation=is_conversation
+            ),
+            {
+                prompt_utils.REFINED_ARABIC_MARKER: "refinement",
+                prompt_utils.ENGLISH_TRANSLATION_MARKER: "translation",
+            },
+            fallbacks={"translation": translate_separately},
+        )
+        return stream
+
     # --- Core Logic --- #
     @staticmethod
     async def process_text_stream(
@@ -93,8 +217,7 @@ class LLMService:
         pydantic_model: Optional[Type[BaseModel]] = None,
         is_conversation: bool = False,
     ) -> AsyncGenerator[str, None]:
-        """Generic method to stream text processing word by word."""
-        fireworks.client.api_key = api_key
+        """Generic method to stream text processing."""
         if model == "deepseek":
             model_account = "accounts/fireworks/models/deepseek-v3-0324"
         else:
@@ -111,10 +234,16 @@ class LLMService:
             model_account=model_account,
             prompt=prompt,
             pydantic_model=pydantic_model,
+            api_key=api_key,
         ):
             yield chunk
 
     # --- Private Helpers --- #
+    @staticmethod
+    def _resilience_endpoint(model_account: str) -> str:
+        """Circuit breaker / latency key: each model is served by its own deployment."""
+        return f"{InferenceBackend.get().name}-completions:{model_account.rsplit('/', 1)[-1]}"
+
     @staticmethod
     def _get_prompt(prompt_type: str, text: str, features: Optional[list], is_conversation: bool):
         """Select prompt dynamically from utils.prompt based on mode and conversation flag."""
@@ -131,6 +260,10 @@ class LLMService:
             ("translate", False): prompt_utils.get_translation_prompt_deepseek,
             ("translate", True): prompt_utils.get_translation_prompt_deepseek_conversation,
 
+            # --- Fused Arabic Refinement + Translation ---
+            ("refine_translate_arabic", False): prompt_utils.get_refine_translate_arabic_prompt_deepseek,
+            ("refine_translate_arabic", True): prompt_utils.get_refine_translate_arabic_prompt_deepseek_conversation,
+
             # --- Question Generation ---
             ("generate_questions", False): prompt_utils.get_question_generation_prompt_llama,
             ("generate_questions", True): prompt_utils.get_question_generation_prompt_llama_conversation,
@@ -154,9 +287,16 @@ class LLMService:
         model_account: str, 
         prompt: str, 
         pydantic_model: Optional[Type[BaseModel]] = None,
-        temperature: float = 0
+        temperature: float = 0,
+        api_key: Optional[str] = None,
     ) -> AsyncGenerator[str, None]:
-        """Stream LLM API response word by word."""
+        """
+        Stream the LLM API response as the provider's text deltas, unmodified.
+
+        Batching for the client is left to utils.sse.coalesce_chunks. Deterministic requests
+        go through CompletionCache: a cached completion is replayed as a single chunk, and
+        identical concurrent requests share one upstream call.
+        """
         
         params = {
             "model": model_account,
@@ -170,36 +310,100 @@ class LLMService:
             params["response_format"] = {"type": "json_object", "schema": pydantic_model.schema()}
 
         try:
-            response = fireworks.client.Completion.create(**params)
-            
-            buffer = ""
-            for chunk in response:
-                if hasattr(chunk, 'choices') and len(chunk.choices) > 0:
-                    delta = chunk.choices[0].text
-                    if delta:
-                        buffer += delta
-                        # Yield word by word
-                        words = buffer.split(' ')
-                        # Keep last incomplete word in buffer
-                        for word in words[:-1]:
-                            if word:
-                                yield word + ' '
-                        buffer = words[-1] if words else ''
-            
-            # Yield remaining buffer
-            if buffer:
-                yield buffer
-                
+            if not CompletionCache.cacheable(params):
+                async for chunk in LLMService._stream_deltas(params, api_key):
+                    yield chunk
+                return
+
+            key = CompletionCache.key(InferenceBackend.get().name, params)
+            cached = await CompletionCache.aget(key)
+            if cached is not None:
+                if cached:
+                    yield cached
+                return
+
+            async for chunk in CompletionCache.stream(key, lambda: LLMService._stream_deltas(params, api_key)):
+                yield chunk
+
         except Exception as e:
             logger.error(f"Streaming API error: {e}")
             yield f"[Error: {str(e)}]"
 
+    @staticmethod
+    async def _stream_deltas(params: dict, api_key: Optional[str]) -> AsyncGenerator[str, None]:
+        """Upstream completion stream as text deltas; errors are raised."""
+
+        async def open_stream():
+            # Errors (429/5xx) surface when the first event is read, so that is what gets retried
+            stream = InferenceBackend.get().acreate_completion(api_key=api_key, **params)
+            try:
+                first = await anext(stream, None)
+            except BaseException:
+                await stream.aclose()
+                raise
+            return stream, first
+
+        stream = None
+        try:
+            async with LLMService._key_limiter.slot(api_key):
+                # Retried only before any text is yielded; a stream cannot be replayed once emitted
+                stream, first = await Resilience.call(
+                    LLMService._resilience_endpoint(params["model"]), open_stream, hedge=False
+                )
+
+                chunk = first
+                while chunk is not None:
+                    if hasattr(chunk, 'choices') and len(chunk.choices) > 0:
+                        delta = chunk.choices[0].text
+                        if delta:
+                            yield delta
+                    chunk = await anext(stream, None)
+
+        finally:
+            # Release the connection if the consumer stops early (client disconnect)
+            if stream is not None:
+                await stream.aclose()
+
+    @staticmethod
+    async def _call_llm_api_async(
+        model_account: str,
+        prompt: str,
+        pydantic_model: Optional[Type[BaseModel]] = None,
+        temperature: float = 0,
+        api_key: Optional[str] = None,
+    ) -> Optional[str]:
+        """Non-streaming LLM API call for the async pipeline; same result as _call_llm_api."""
+
+        params = {
+            "model": model_account,
+            "prompt": prompt,
+            "max_tokens": 2000,
+            "temperature": temperature,
+            "stream": False,
+        }
+
+        if pydantic_model:
+            params["response_format"] = {"type": "json_object", "schema": pydantic_model.schema()}
+
+        try:
+            async with LLMService._key_limiter.slot(api_key):
+                response = await Resilience.call(
+                    LLMService._resilience_endpoint(model_account),
+                    lambda: InferenceBackend.get().acreate_completion(api_key=api_key, **params),
+                )
+            return LLMService._parse_completion(response, pydantic_model)
+
+        except Exception as e:
+            logger.error(f"LLM API error: {e}")
+            return None
+
     @staticmethod
     def _call_llm_api(
         model_account: str, 
         prompt: str, 
         pydantic_model: Optional[Type[BaseModel]] = None,
-        temperature: float = 0
+        temperature: float = 0,
+        api_key: Optional[str] = None,
     ) -> Optional[str]:
         """Non-streaming LLM API call for synchronous operations."""
         
@@ -215,25 +419,33 @@ class LLMService:
             params["response_format"] = {"type": "json_object", "schema": pydantic_model.schema()}
 
         try:
-            response = fireworks.client.Completion.create(**params)
+            response = Resilience.call_sync(
+                LLMService._resilience_endpoint(model_account),
+                lambda: InferenceBackend.get().create_completion(api_key=api_key, **params),
+            )
             
-            if not response.choices or not response.choices[0].text.strip():
-                logger.warning("LLM returned empty response")
-                return None
-
-            raw_output = response.choices[0].text.strip()
-
-            if pydantic_model:
-                try:
-                    parsed_output = json.loads(raw_output)
-                    validated_output = pydantic_model(**parsed_output)
-                    return json.dumps(validated_output.dict())
-                except (json.JSONDecodeError, ValidationError) as e:
-                    logger.error(f"Structured output validation failed: {e}")
-                    return None
+            return LLMService._parse_completion(response, pydantic_model)
 
-            return raw_output
-                
         except Exception as e:
             logger.error(f"LLM API error: {e}")
-            return None
\ No newline at end of file
+            return None
+
+    @staticmethod
+    def _parse_completion(response, pydantic_model: Optional[Type[BaseModel]]) -> Optional[str]:
+        """Completion text, or the validated JSON when a schema was requested."""
+        if not response.choices or not response.choices[0].text.strip():
+            logger.warning("LLM returned empty response")
+            return None
+
+        raw_output = response.choices[0].text.strip()
+
+        if pydantic_model:
+            try:
+                parsed_output = json.loads(raw_output)
+                validated_output = pydantic_model(**parsed_output)
+                return json.dumps(validated_output.dict())
+            except (json.JSONDecodeError, ValidationError) as e:
+                logger.error(f"Structured output validation failed: {e}")
+                return None
+
+        return raw_output
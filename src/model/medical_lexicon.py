@@ -0,0 +1,244 @@
+import math
+import re
+from typing import Dict, List
+
+
+class MedicalLexiconClassifier:
+    """
+    In-process first-pass classifier that recognises clearly medical transcripts.
+
+    Tokens of the (normalised) transcript are matched against a bilingual Arabic/English
+    clinical lexicon of drug names, diagnoses, symptoms and clinical vocabulary. Weighted
+    hits and their density, minus hits on everyday off-topic vocabulary, feed a logistic
+    score: the probability that the text is medical. A phrase hit ("chest pain") is counted
+    once, not again for its words.
+
+    classify() only ever says MEDICAL, on a high score. A low score is not evidence of
+    non-medical text (a visit can use words the lexicon lacks), so that and everything
+    else is left to the LLM validator.
+    """
+
+    # Term weights by category
+    WEIGHTS = {"drug": 2.0, "diagnosis": 2.0, "symptom": 1.5, "clinical": 1.0, "generic": 0.5}
+    # Repeats of one term stop adding evidence after this many occurrences
+    MAX_HITS_PER_TERM = 2
+
+    # Logistic score: z = EVIDENCE_SLOPE * min(weight, EVIDENCE_CAP) + DENSITY_SLOPE * density
+    #                    - OFF_TOPIC_SLOPE * off_topic_hits + BIAS
+    EVIDENCE_SLOPE = 1.2
+    EVIDENCE_CAP = 6.0
+    DENSITY_SLOPE = 25.0
+    OFF_TOPIC_SLOPE = 1.5
+    BIAS = -3.0
+
+    # Density is taken over at least this many tokens, so one term in a short utterance is not decisive
+    MIN_DENSITY_TOKENS = 20
+    # Shorter texts, or texts with fewer distinct matched terms, are never labelled MEDICAL by the lexicon
+    MIN_TOKENS_FOR_MEDICAL = 15
+    MIN_TERMS_FOR_MEDICAL = 2
+
+    LEXICON = {
+        "drug": [
+            # English
+            "paracetamol", "acetaminophen", "panadol", "ibuprofen", "brufen", "aspirin", "diclofenac",
+            "amoxicillin", "augmentin", "azithromycin", "ciprofloxacin", "ceftriaxone", "antibiotic",
+            "antibiotics", "metformin", "insulin", "glucophage", "atorvastatin", "lipitor", "amlodipine",
+            "lisinopril", "losartan", "bisoprolol", "omeprazole", "esomeprazole", "pantoprazole",
+            "nexium", "salbutamol", "ventolin", "prednisolone", "prednisone", "hydrocortisone",
+            "warfarin", "clopidogrel", "heparin", "levothyroxine", "thyroxine", "cetirizine",
+            "loratadine", "antihistamine", "tramadol", "morphine", "vitamin", "supplements",
+            # Arabic
+            "باراسيتامول", "بنادول", "ايبوبروفين", "بروفين", "اسبرين", "فولتارين", "اموكسيسيلين",
+            "اوجمنتين", "مضاد حيوي", "مضادات حيويه", "ميتفورمين", "جلوكوفاج", "انسولين", "كونكور",
+            "اوميبرازول", "نيكسيوم", "فنتولين", "كورتيزون", "وارفارين", "فيتامين", "مسكن", "مسكنات",
+        ],
+        "diagnosis": [
+            # English
+            "diabetes", "diabetic", "hypertension", "hypotension", "asthma", "copd", "pneumonia",
+            "bronchitis", "infection", "inflammation", "fracture", "migraine", "anemia", "anaemia",
+            "arthritis", "gastritis", "ulcer", "reflux", "hepatitis", "cancer", "tumor", "tumour",
+            "stroke", "angina", "arrhythmia", "thyroid", "hypothyroidism", "hyperthyroidism",
+            "kidney stones", "appendicitis", "sinusitis", "tonsillitis", "otitis", "dermatitis",
+            "eczema", "psoriasis", "depression", "epilepsy", "allergy", "obesity",
+            "covid", "influenza", "flu", "heart failure", "heart attack",
+            # Arabic
+            "سكري", "ضغط الدم", "ارتفاع الضغط", "ربو", "التهاب", "التهاب رئوي",
+            "التهاب الحلق", "التهاب اللوز", "شقيقه", "انيميا", "فقر الدم", "روماتيزم",
+            "قرحه", "ارتجاع", "جرثومه", "سرطان", "ورم", "جلطه", "ذبحه", "الغده", "الغده الدرقيه",
+            "حصوات", "حصوه", "الزايده", "جيوب انفيه", "اكزيما", "صدفيه", "اكتئاب",
+            "صرع", "حساسيه", "سمنه", "كورونا", "انفلونزا", "عدوي",
+        ],
+        "symptom": [
+            # English
+            "headache", "fever", "cough", "coughing", "nausea",
+            "vomiting", "diarrhea", "diarrhoea", "constipation", "dizziness", "dizzy", "fatigue",
+            "weakness", "rash", "itching", "swelling", "swollen", "bleeding", "numbness",
+            "shortness of breath", "chest pain", "abdominal pain", "back pain", "sore throat",
+            "palpitations", "insomnia", "chills", "sweating", "wheezing", "cramps",
+            "spasm", "blurred vision", "runny nose", "vomit",
+            # Arabic
+            "صداع", "حمي", "سخونيه", "سخونه", "كحه", "سعال",
+            "غثيان", "ترجيع", "استفراغ", "قيء", "اسهال", "امساك", "دوخه", "دوار", "ارهاق",
+            "طفح", "حكه", "هرش", "تورم", "انتفاخ", "نزيف", "تنميل", "ضيق تنفس", "ضيق في التنفس",
+            "كتمه", "خفقان", "ارق", "رعشه", "تعرق", "صفير", "حرقان", "حموضه", "تقلصات", "مغص",
+            "زغلله", "رشح", "زكام", "احتقان", "بلغم",
+        ],
+        "clinical": [
+            # English
+            "physician", "diagnosis", "diagnosed",
+            "symptoms", "symptom", "medication", "medications", "prescription",
+            "prescribed", "dose", "dosage", "mg", "capsule", "syrup", "injection",
+            "surgery", "examination", "blood pressure", "blood test",
+            "x-ray", "xray", "mri", "ultrasound", "ecg", "follow up", "follow-up",
+            "allergic", "chronic", "acute", "referral", "pulse", "sugar level", "cholesterol",
+            # Arabic
+            "طبيب", "الطبيب",
+            "تشخيص", "اعراض", "ادويه", "روشته",
+            "جرعه", "ملجم", "مليجرام", "حبوب", "اقراص", "قرص", "كبسول", "حقنه",
+            "ابره", "جراحه", "فحص", "تحليل", "تحاليل", "اشعه", "رنين", "سونار",
+            "ايكو", "رسم قلب", "متابعه", "مزمن", "طوارئ", "نبض", "السكري", "كوليسترول",
+        ],
+        # Clinical, but also common in everyday speech ("be patient", "a real pain")
+        "generic": [
+            # English
+            "pain", "painful", "ache", "aches", "patient", "hospital", "clinic", "medicine", "treatment",
+            "tablet", "tablets",
+            # Arabic
+            "الم", "الام", "وجع", "اوجاع", "مريض", "مريضه", "المريض", "علاج", "العلاج", "دواء", "الدواء",
+            "مستشفي", "عياده",
+        ],
+    }
+
+    # Everyday, non-clinical vocabulary: evidence against a transcript being a visit
+    OFF_TOPIC_LEXICON = [
+        # English
+        "football", "match", "movie", "film", "series", "episode", "music", "song", "concert",
+        "shopping", "mall", "sale", "discount", "restaurant", "cafe", "recipe", "cooking", "dinner",
+        "weather", "beach", "holiday", "vacation", "trip", "hotel", "flight", "party", "birthday",
+        "wedding", "gift", "gifts", "salary", "rent", "traffic", "car", "politics", "election",
+        "stocks", "school", "homework", "exam", "game", "team", "goal", "weekend",
+        # Arabic
+        "كوره", "مباراه", "ماتش", "فيلم", "مسلسل", "حلقه", "اغنيه", "موسيقي", "حفله", "تسوق", "مول",
+        "تخفيضات", "مطعم", "كافيه", "طبخ", "عشاء", "الطقس", "بحر", "شاطئ", "اجازه", "رحله", "سفر",
+        "فندق", "طياره", "عيد ميلاد", "فرح", "زفاف", "هديه", "هدايا", "مرتب", "راتب", "ايجار", "زحمه",
+        "عربيه", "سياره", "سياسه", "انتخابات", "البورصه", "مدرسه", "امتحان", "لعبه", "فريق", "هدف",
+    ]
+    # Arabic clitics stripped when a token does not match as is (longest first)
+    _ARABIC_PREFIXES = ("وبال", "وال", "بال", "فال", "كال", "لل", "ال", "و", "ب", "ف", "ل")
+    _ARABIC_DIACRITICS = re.compile(r"[\u0610-\u061A\u064B-\u065F\u0670\u06D6-\u06ED\u0640]")
+    _TOKEN = re.compile(r"[^\W_]+(?:-[^\W_]+)*")
+
+    _terms = None
+
+    # --- Public API --- #
+    @staticmethod
+    def score(text: str) -> Dict:
+        """Lexicon evidence and the probability (0-1) that the text is medical."""
+        tokens = MedicalLexiconClassifier._tokens(text)
+        unigrams, phrases = MedicalLexiconClassifier._lexicon()
+        counts = {}
+        i = 0
+        while i < len(tokens):
+            term, size = MedicalLexiconClassifier._match_at(tokens, i, unigrams, phrases)
+            if term:
+                counts[term] = counts.get(term, 0) + 1
+            i += size
+
+        terms = {**unigrams, **phrases}
+        medical = {term: count for term, count in counts.items() if terms[term] in MedicalLexiconClassifier.WEIGHTS}
+        weight = sum(
+            MedicalLexiconClassifier.WEIGHTS[terms[term]] * min(count, MedicalLexiconClassifier.MAX_HITS_PER_TERM)
+            for term, count in medical.items()
+        )
+        off_topic = sum(
+            min(count, MedicalLexiconClassifier.MAX_HITS_PER_TERM)
+            for term, count in counts.items() if term not in medical
+        )
+        density = weight / max(len(tokens), MedicalLexiconClassifier.MIN_DENSITY_TOKENS)
+        z = (
+            MedicalLexiconClassifier.EVIDENCE_SLOPE * min(weight, MedicalLexiconClassifier.EVIDENCE_CAP)
+            + MedicalLexiconClassifier.DENSITY_SLOPE * density
+            - MedicalLexiconClassifier.OFF_TOPIC_SLOPE * off_topic
+            + MedicalLexiconClassifier.BIAS
+        )
+        return {
+            "probability": 1 / (1 + math.exp(-z)),
+            "weight": weight,
+            "tokens": len(tokens),
+            "matched_terms": sorted(medical),
+            "off_topic_terms": sorted(term for term in counts if term not in medical),
+        }
+
+    @staticmethod
+    def classify(text: str, medical_threshold: float) -> Dict:
+        """
+        Label text MEDICAL if the lexicon is confident enough.
+
+        Args:
+            text: Transcript to classify
+            medical_threshold: Probability (0-100) at or above which the text is MEDICAL
+
+        Returns:
+            Dict with "classification" (MEDICAL, or None when the LLM should decide),
+            "confidence" and "lexicon_score" (both the medical probability, 0-100)
+        """
+        result = MedicalLexiconClassifier.score(text)
+        probability = round(result["probability"] * 100)
+        classification = None
+        if (
+            probability >= medical_threshold
+            and len(result["matched_terms"]) >= MedicalLexiconClassifier.MIN_TERMS_FOR_MEDICAL
+            and result["tokens"] >= MedicalLexiconClassifier.MIN_TOKENS_FOR_MEDICAL
+        ):
+            classification = "MEDICAL"
+        return {
+            "classification": classification,
+            "confidence": probability,
+            "lexicon_score": probability,
+            "matched_terms": result["matched_terms"],
+        }
+
+    # --- Private Helpers --- #
+    @staticmethod
+    def _normalize(text: str) -> str:
+        text = MedicalLexiconClassifier._ARABIC_DIACRITICS.sub("", text.lower())
+        # Unify letter variants that transcripts spell inconsistently
+        return (
+            text.replace("أ", "ا").replace("إ", "ا").replace("آ", "ا")
+            .replace("ة", "ه").replace("ى", "ي").replace("ؤ", "و").replace("ئ", "ي")
+        )
+
+    @staticmethod
+    def _tokens(text: str) -> List[str]:
+        return MedicalLexiconClassifier._TOKEN.findall(MedicalLexiconClassifier._normalize(text or ""))
+
+    @staticmethod
+    def _lexicon():
+        """Normalised single-word terms and phrases, each mapped to its category ("off_topic" included)."""
+        if MedicalLexiconClassifier._terms is None:
+            unigrams, phrases = {}, {}
+            categories = {**MedicalLexiconClassifier.LEXICON, "off_topic": MedicalLexiconClassifier.OFF_TOPIC_LEXICON}
+            for category, terms in categories.items():
+                for term in terms:
+                    normalized = " ".join(MedicalLexiconClassifier._tokens(term))
+                    (phrases if " " in normalized else unigrams)[normalized] = category
+            MedicalLexiconClassifier._terms = (unigrams, phrases)
+        return MedicalLexiconClassifier._terms
+
+    @staticmethod
+    def _match_at(tokens: List[str], i: int, unigrams: Dict[str, str], phrases: Dict[str, str]):
+        """Longest term starting at tokens[i] and the number of tokens it covers (1 if none)."""
+        for size in (3, 2):
+            phrase = " ".join(tokens[i:i + size])
+            if i + size <= len(tokens) and phrase in phrases:
+                return phrase, size
+        return MedicalLexiconClassifier._match(tokens[i], unigrams), 1
+
+    @staticmethod
+    def _match(token: str, unigrams: Dict[str, str]):
+        if token in unigrams:
+            return token
+        for prefix in MedicalLexiconClassifier._ARABIC_PREFIXES:
+            if token.startswith(prefix) and len(token) - len(prefix) >= 2 and token[len(prefix):] in unigrams:
+                return token[len(prefix):]
+        return None
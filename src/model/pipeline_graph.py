@@ -51,7 +51,7 @@ class PipelineState(TypedDict, total=False):
 
 def transcribe_node(state: PipelineState) -> PipelineState:
     file_path = state["file_path"]
-    api_key = state.get("api_key") or Config.FIREWORKS_API_KEY
+    api_key = state.get("api_key") or Config.stage_api_key("speech")
     language = state.get("language", "ar")
 
     text = SpeechService.transcribe_audio(file_path, api_key=api_key, language=language, preprocess=True)
@@ -0,0 +1,105 @@
+import asyncio
+import logging
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from core.config import Config
+from model.audio_preprocessing import AudioPreprocessingService
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+class PreprocessingPool:
+    """
+    Bounded process pool that runs AudioPreprocessingService.preprocess_audio off the event loop.
+
+    Workers receive the input path and return the output path, so the audio itself is never
+    pickled across the process boundary. At most PREPROCESS_MAX_PENDING jobs are submitted at
+    once; further callers wait for a slot instead of growing the executor queue without bound.
+    """
+
+    _executor = None
+    _slots = None
+    _loop = None
+    _pending = 0
+
+    # --- Public API --- #
+    @staticmethod
+    async def preprocess(input_file_path, output_file_path=None, **options):
+        """
+        Preprocess an audio file in a worker process.
+
+        Args:
+            input_file_path: Path to the input audio file (or raw bytes, which are pickled once)
+            output_file_path: Path to save the processed audio file (if None, a temp file is created)
+            **options: Keyword arguments forwarded to AudioPreprocessingService.preprocess_audio
+
+        Returns:
+            Path to the processed audio file
+        """
+        slots = PreprocessingPool._get_slots()
+        async with slots:
+            PreprocessingPool._pending += 1
+            try:
+                loop = asyncio.get_running_loop()
+                executor = PreprocessingPool._get_executor()
+                try:
+                    return await loop.run_in_executor(
+                        executor,
+                        PreprocessingPool._run,
+                        input_file_path,
+                        output_file_path,
+                        options,
+                    )
+                except BrokenProcessPool:
+                    # A worker died (e.g. OOM-killed); start a fresh pool for the next caller.
+                    # Every job in flight on the broken pool lands here: only the first may
+                    # retire it, not a fresh pool another caller has already submitted to
+                    if PreprocessingPool._executor is executor:
+                        logger.error("Preprocessing worker pool broke; recreating it")
+                        PreprocessingPool._executor = None
+                        executor.shutdown(wait=False, cancel_futures=True)
+                    raise
+            finally:
+                PreprocessingPool._pending -= 1
+
+    @staticmethod
+    def pending():
+        """Number of jobs currently submitted to or running in the pool."""
+        return PreprocessingPool._pending
+
+    @staticmethod
+    def shutdown(wait=True):
+        """Stop the worker processes; the pool is recreated lazily on next use."""
+        executor, PreprocessingPool._executor = PreprocessingPool._executor, None
+        if executor is not None:
+            executor.shutdown(wait=wait, cancel_futures=True)
+
+    # --- Private Helpers --- #
+    @staticmethod
+    def _run(input_file_path, output_file_path, options):
+        # Runs in the worker process
+        return AudioPreprocessingService.preprocess_audio(input_file_path, output_file_path, **options)
+
+    @staticmethod
+    def _get_executor():
+        if PreprocessingPool._executor is None:
+            workers = max(1, Config.PREPROCESS_WORKERS)
+            # spawn: forking a process that runs an event loop and threads is not safe
+            PreprocessingPool._executor = ProcessPoolExecutor(
+                max_workers=workers,
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+            logger.info("Started audio preprocessing pool with %d workers", workers)
+        return PreprocessingPool._executor
+
+    @staticmethod
+    def _get_slots():
+        # asyncio primitives are bound to the loop they are first used on
+        loop = asyncio.get_running_loop()
+        if PreprocessingPool._slots is None or PreprocessingPool._loop is not loop:
+            PreprocessingPool._slots = asyncio.Semaphore(max(1, Config.PREPROCESS_MAX_PENDING))
+            PreprocessingPool._loop = loop
+        return PreprocessingPool._slots
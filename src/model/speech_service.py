@@ -1,9 +1,18 @@
+import io
 import os
 import logging
 import asyncio
 from typing import Optional, Tuple, Dict, Any, AsyncGenerator
+import httpx
 import requests
 
+from core.config import Config
+from model.inference_backend import InferenceBackend
+from model.transcription_cache import TranscriptionCache
+from model.transcription_client import AsyncTranscriptionClient
+from utils.resilience import RETRY_STATUSES, Resilience
+from utils.scratch_space import ScratchSpace
+
 # Configure logger
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -16,30 +25,39 @@ class TranscriptionError(Exception):
 class SpeechService:
     """Service for speech recognition with optional audio preprocessing."""
 
-    FIREWORKS_BASE_URL = os.getenv("FIREWORKS_BASE_URL", "https://api.fireworks.ai")
-    TRANSCRIBE_ENDPOINT = f"{FIREWORKS_BASE_URL}/inference/v1/audio/transcriptions"
-
     @staticmethod
     def transcribe_audio(
-        audio_file_path: str,
+        audio_file_path: str | bytes,
         api_key: str,
         language: str = "en",
         preprocess: bool = True,
         model: str = "whisper-v3",
         timeout: int = 300,
         return_meta: bool = False,
+        upload_format: str = "flac",
+        strip_pauses: bool = False,
+        adaptive: bool = True,
     ) -> str | Tuple[str, Dict[str, Any]]:
         """
         Transcribe an audio file using Fireworks Whisper.
 
+        Results are looked up in TranscriptionCache (keyed by the audio bytes, model, language
+        and preprocessing options) before anything is preprocessed or uploaded; cached
+        results carry meta["cache_hit"] = True.
+
         Args:
-            audio_file_path: Path to the audio file.
+            audio_file_path: Path to the audio file, or the raw audio bytes (e.g. an upload spool).
             api_key: Fireworks API key.
             language: ISO language code used by Whisper (e.g., "en", "ar").
             preprocess: Whether to apply audio preprocessing (uses audio_preprocessing module if present).
             model: Fireworks Whisper model name. Default: "whisper-v3".
             timeout: HTTP request timeout in seconds.
             return_meta: If True, returns (text, meta_dict) instead of just text.
+            upload_format: Encoding of the preprocessed upload ("flac", "opus" or "wav"; 16kHz mono).
+            strip_pauses: Whether preprocessing cuts internal pauses; the offset map back to the
+                original timeline is returned in meta["offset_map"].
+            adaptive: Whether a quality probe picks the preprocessing stages; the chosen plan
+                is returned in meta["preprocessing_plan"].
 
         Returns:
             Transcribed text (or (text, metadata) if return_meta=True).
@@ -49,153 +67,419 @@ class SpeechService:
             ValueError: If inputs are invalid.
             TranscriptionError: For HTTP/JSON or service errors.
         """
-        if not api_key:
-            raise ValueError("Missing Fireworks API key.")
-        if not audio_file_path:
-            raise ValueError("audio_file_path must be provided.")
+        SpeechService._validate_inputs(audio_file_path, api_key)
 
-        if not os.path.exists(audio_file_path):
-            raise FileNotFoundError(f"Audio file not found: {audio_file_path}")
+        cache_key = TranscriptionCache.key(
+            audio_file_path, model, language,
+            SpeechService._cache_plan(preprocess, upload_format, strip_pauses, adaptive),
+        )
+        cached = TranscriptionCache.get(cache_key)
+        if cached:
+            logger.info("Transcription cache hit: %s", SpeechService._describe(audio_file_path))
+            return SpeechService._from_cache(cached, return_meta)
 
-        processed_file_path = audio_file_path
-        temp_file_created = False
+        # Intermediate files live in a per-request scratch directory that is removed on exit
+        with ScratchSpace.request("transcribe") as scratch:
+            processed_file_path = audio_file_path
+            preprocess_meta = None
 
-        # Optional preprocessing
-        if preprocess:
-            try:
-                from .audio_preprocessing import AudioPreprocessingService  # optional
-                processed_file_path = AudioPreprocessingService.preprocess_audio(audio_file_path)
-                temp_file_created = processed_file_path != audio_file_path
-                logger.info("Audio preprocessing applied: %s → %s", audio_file_path, processed_file_path)
-            except Exception as e:
-                # Preprocessing is optional; you can choose to fail or continue.
-                # Here we *fail fast* to keep behavior explicit.
-                raise TranscriptionError(f"Audio preprocessing failed: {e}") from e
+            # Optional preprocessing
+            if preprocess:
+                try:
+                    from .audio_preprocessing import AudioPreprocessingService  # optional
+                    processed_file_path, preprocess_meta = AudioPreprocessingService.preprocess_audio(
+                        audio_file_path,
+                        scratch.path(SpeechService._processed_file_name(upload_format)),
+                        output_format=upload_format,
+                        strip_pauses=strip_pauses,
+                        adaptive=adaptive,
+                        return_meta=True,
+                    )
+                    scratch.check_quota()
+                    logger.info("Audio preprocessing applied: %s → %s", SpeechService._describe(audio_file_path), processed_file_path)
+                except Exception as e:
+                    # Preprocessing is optional; you can choose to fail or continue.
+                    # Here we *fail fast* to keep behavior explicit.
+                    raise TranscriptionError(f"Audio preprocessing failed: {e}") from e
 
-        try:
-            headers = {"Authorization": f"Bearer {api_key}"}
-
-            # Build multipart form-data
-            data = {"model": model}
-            if language:
-                data["language"] = language
-
-            logger.info("Starting transcription: file=%s, model=%s, language=%s", processed_file_path, model, language)
-
-            with open(processed_file_path, "rb") as f:
-                files = {"file": (os.path.basename(processed_file_path), f, "application/octet-stream")}
-                resp = requests.post(
-                    SpeechService.TRANSCRIBE_ENDPOINT,
-                    headers=headers,
-                    files=files,                                                         
-                    data=data,
-                    timeout=timeout,
+            try:
+                data = SpeechService._form_data(model, language)
+                upload_bytes = SpeechService._source_size(processed_file_path)
+                logger.info(
+                    "Starting transcription: file=%s (%d bytes), model=%s, language=%s",
+                    SpeechService._describe(processed_file_path), upload_bytes, model, language,
                 )
 
-            if resp.status_code >= 400:
-                # Try to surface server error details
-                try:
-                    detail = resp.json()
-                except Exception:
-                    detail = resp.text
-                raise TranscriptionError(
-                    f"Fireworks transcription error [{resp.status_code}]: {detail}"
-                )
+                def upload():
+                    with SpeechService._open_source(processed_file_path) as f:
+                        files = {"file": (SpeechService._upload_name(processed_file_path), f, "application/octet-stream")}
+                        resp = requests.post(
+                            InferenceBackend.get().transcription_url,
+                            headers={"Authorization": f"Bearer {api_key}"},
+                            files=files,
+                            data=data,
+                            timeout=timeout,
+                        )
+                    if resp.status_code in RETRY_STATUSES:
+                        resp.raise_for_status()
+                    return resp
 
-            # Parse JSON
-            try:
-                payload = resp.json()
+                resp = Resilience.call_sync(SpeechService._resilience_endpoint(), upload)
+
+                text = SpeechService._parse_response(resp)
+                meta = SpeechService._build_meta(model, language, resp.status_code, upload_bytes, preprocess_meta)
+                TranscriptionCache.set(cache_key, text, meta)
+                if return_meta:
+                    return text, meta
+                return text
+
+            except (FileNotFoundError, ValueError, TranscriptionError):
+                # bubble up these explicitly
+                raise
+            except requests.Timeout as e:
+                raise TranscriptionError(f"Transcription timed out after {timeout}s") from e
+            except requests.HTTPError as e:
+                # Transient status that outlasted the retries
+                SpeechService._parse_response(e.response)
+            except requests.RequestException as e:
+                raise TranscriptionError(f"HTTP error during transcription: {e}") from e
             except Exception as e:
-                raise TranscriptionError(f"Invalid JSON response from Fireworks: {e}") from e
+                raise TranscriptionError(f"Audio transcription failed: {e}") from e
+
+    @staticmethod
+    async def transcribe_audio_async(
+        audio_file_path: str | bytes,
+        api_key: str,
+        language: str = "en",
+        preprocess: bool = True,
+        model: str = "whisper-v3",
+        timeout: int = 300,
+        return_meta: bool = False,
+        upload_format: str = "flac",
+        strip_pauses: bool = False,
+        adaptive: bool = True,
+    ) -> str | Tuple[str, Dict[str, Any]]:
+        """
+        Async variant of transcribe_audio for the streaming pipeline.
 
-            text = payload.get("text")
-            if not isinstance(text, str) or not text.strip():
-                raise TranscriptionError(f"Fireworks response missing 'text': {payload}")
+        Preprocessing runs in the shared PreprocessingPool and the upload goes through the
+        pooled keep-alive AsyncTranscriptionClient, so neither blocks the event loop.
+        Arguments, return value and errors are the same as transcribe_audio.
+        """
+        SpeechService._validate_inputs(audio_file_path, api_key)
 
-            logger.info("Transcription completed successfully: %d characters", len(text))
+        cache_key = await TranscriptionCache.akey(
+            audio_file_path, model, language,
+            SpeechService._cache_plan(preprocess, upload_format, strip_pauses, adaptive),
+        )
+        cached = await TranscriptionCache.aget(cache_key)
+        if cached:
+            logger.info("Transcription cache hit: %s", SpeechService._describe(audio_file_path))
+            return SpeechService._from_cache(cached, return_meta)
+
+        with ScratchSpace.request("transcribe") as scratch:
+            processed_file_path = audio_file_path
+            preprocess_meta = None
+            if preprocess:
+                try:
+                    from .preprocessing_pool import PreprocessingPool
+                    processed_file_path, preprocess_meta = await PreprocessingPool.preprocess(
+                        audio_file_path,
+                        scratch.path(SpeechService._processed_file_name(upload_format)),
+                        output_format=upload_format,
+                        strip_pauses=strip_pauses,
+                        adaptive=adaptive,
+                        return_meta=True,
+                    )
+                    scratch.check_quota()
+                    logger.info("Audio preprocessing applied: %s → %s", SpeechService._describe(audio_file_path), processed_file_path)
+                except Exception as e:
+                    raise TranscriptionError(f"Audio preprocessing failed: {e}") from e
 
+            upload_bytes = SpeechService._source_size(processed_file_path)
+            text, status_code = await SpeechService._post_async(
+                processed_file_path, api_key, model, language, timeout
+            )
+            meta = SpeechService._build_meta(model, language, status_code, upload_bytes, preprocess_meta)
+            await TranscriptionCache.aset(cache_key, text, meta)
             if return_meta:
-                meta = {
-                    "model": model,
-                    "language": language,
-                    "endpoint": SpeechService.TRANSCRIBE_ENDPOINT,
-                    "status_code": resp.status_code,
-                }
                 return text, meta
             return text
 
-        except (FileNotFoundError, ValueError):
-            # bubble up these explicitly
-            raise
-        except requests.Timeout as e:
-            raise TranscriptionError(f"Transcription timed out after {timeout}s") from e
-        except requests.RequestException as e:
-            raise TranscriptionError(f"HTTP error during transcription: {e}") from e
-        except Exception as e:
-            raise TranscriptionError(f"Audio transcription failed: {e}") from e
-        finally:
-            # Clean up temporary processed file if we created one
-            try:
-                if temp_file_created and processed_file_path != audio_file_path and os.path.exists(processed_file_path):
-                    os.remove(processed_file_path)
-                    logger.debug("Removed temporary preprocessed file: %s", processed_file_path)
-            except Exception as cleanup_err:
-                logger.warning("Failed to remove temporary file %s: %s", processed_file_path, cleanup_err)
-
     @staticmethod
     async def transcribe_audio_stream(
-        audio_file_path: str,
+        audio_file_path: str | bytes,
         api_key: str,
         language: str = "en",
         preprocess: bool = True,
         model: str = "whisper-v3",
         timeout: int = 300,
-        chunk_size: int = 5,  # Words per chunk
-        delay: float = 0.1,  # Delay between chunks in seconds
+        upload_format: str = "flac",
+        strip_pauses: bool = False,
+        adaptive: bool = True,
+        segment_seconds: Optional[float] = None,
+        max_concurrency: Optional[int] = None,
     ) -> AsyncGenerator[Tuple[str, Optional[Dict[str, Any]]], None]:
         """
-        Transcribe audio and stream the result word-by-word for visual effect.
+        Transcribe audio segment by segment and stream each segment's text as it is ready.
         
-        Note: Whisper API returns complete transcription, so this simulates streaming
-        by chunking the response for better UX.
+        Preprocessing cuts the audio at pauses into segments of at most segment_seconds,
+        which are uploaded concurrently (at most max_concurrency at a time). Text is yielded
+        in segment order: a segment is emitted as soon as it and every earlier segment are
+        transcribed, so the first text arrives after the first segment rather than the
+        whole file. Without preprocessing the file is sent as a single segment.
         
         Args:
-            audio_file_path: Path to the audio file.
+            audio_file_path: Path to the audio file, or the raw audio bytes (e.g. an upload spool).
             api_key: Fireworks API key.
             language: ISO language code.
-            preprocess: Whether to apply audio preprocessing.
+            preprocess: Whether to apply audio preprocessing (and segmentation).
             model: Whisper model name.
-            timeout: HTTP request timeout.
-            chunk_size: Number of words per chunk.
-            delay: Delay between chunks (seconds).
+            timeout: HTTP request timeout per segment.
+            upload_format: Encoding of the preprocessed upload.
+            strip_pauses: Whether preprocessing cuts internal pauses.
+            adaptive: Whether a quality probe picks the preprocessing stages.
+            segment_seconds: Maximum segment length (default: Config.TRANSCRIBE_SEGMENT_SECONDS).
+            max_concurrency: Concurrent segment uploads (default: Config.TRANSCRIBE_SEGMENT_CONCURRENCY).
             
         Yields:
-            Tuple of (text_chunk, metadata or None)
+            Tuple of (text_chunk, metadata or None); metadata comes first, with
+            meta["segments"] giving the start and duration of each segment.
         """
-        # First, get the complete transcription
-        text, meta = SpeechService.transcribe_audio(
-            audio_file_path=audio_file_path,
-            api_key=api_key,
-            language=language,
-            preprocess=preprocess,
-            model=model,
-            timeout=timeout,
-            return_meta=True,
+        SpeechService._validate_inputs(audio_file_path, api_key)
+        segment_seconds = segment_seconds or Config.TRANSCRIBE_SEGMENT_SECONDS
+        max_concurrency = max(1, max_concurrency or Config.TRANSCRIBE_SEGMENT_CONCURRENCY)
+
+        cache_key = await TranscriptionCache.akey(
+            audio_file_path, model, language,
+            SpeechService._cache_plan(preprocess, upload_format, strip_pauses, adaptive, segment_seconds),
         )
-        
-        # Split into words
-        words = text.split()
-        
-        # Yield metadata first
-        yield ("", meta)
-        
-        # Stream words in chunks
-        for i in range(0, len(words), chunk_size):
-            chunk = words[i:i + chunk_size]
-            chunk_text = ' '.join(chunk) + ' '
-            
-            yield (chunk_text, None)
-            
-            # Add delay for streaming effect
-            if i + chunk_size < len(words):
-                await asyncio.sleep(delay)
\ No newline at end of file
+        cached = await TranscriptionCache.aget(cache_key)
+        if cached:
+            logger.info("Transcription cache hit: %s", SpeechService._describe(audio_file_path))
+            text, meta = SpeechService._from_cache(cached, return_meta=True)
+            yield ("", meta)
+            yield (text + " ", None)
+            return
+
+        with ScratchSpace.request("transcribe") as scratch:
+            preprocess_meta = None
+            segments = [{"path": audio_file_path, "start": 0.0, "duration": None}]
+            if preprocess:
+                try:
+                    from .preprocessing_pool import PreprocessingPool
+                    _, preprocess_meta = await PreprocessingPool.preprocess(
+                        audio_file_path,
+                        scratch.path(SpeechService._processed_file_name(upload_format)),
+                        output_format=upload_format,
+                        strip_pauses=strip_pauses,
+                        adaptive=adaptive,
+                        segment_seconds=segment_seconds,
+                        return_meta=True,
+                    )
+                    scratch.check_quota()
+                    segments = preprocess_meta.pop("segments")
+                    logger.info("Audio preprocessing applied: %s → %d segment(s)", SpeechService._describe(audio_file_path), len(segments))
+                except Exception as e:
+                    raise TranscriptionError(f"Audio preprocessing failed: {e}") from e
+
+            upload_bytes = sum(SpeechService._source_size(segment["path"]) for segment in segments)
+            meta = SpeechService._build_meta(model, language, None, upload_bytes, preprocess_meta)
+            meta["segments"] = [
+                {"start": segment["start"], "duration": segment["duration"]} for segment in segments
+            ]
+            yield ("", meta)
+
+            slots = asyncio.Semaphore(max_concurrency)
+
+            async def transcribe_segment(segment):
+                async with slots:
+                    text, _ = await SpeechService._post_async(
+                        segment["path"], api_key, model, language, timeout,
+                        # A segment may legitimately hold no words
+                        allow_empty=len(segments) > 1,
+                    )
+                    return text
+
+            tasks = [asyncio.ensure_future(transcribe_segment(segment)) for segment in segments]
+            texts = []
+            try:
+                for task in tasks:
+                    text = (await task).strip()
+                    if text:
+                        texts.append(text)
+                        yield (text + " ", None)
+                await TranscriptionCache.aset(cache_key, " ".join(texts), meta)
+            finally:
+                # Stop outstanding uploads if a segment failed or the client went away
+                for task in tasks:
+                    task.cancel()
+                await asyncio.gather(*tasks, return_exceptions=True)
+
+    @staticmethod
+    async def _post_async(
+        file_path: str | bytes,
+        api_key: str,
+        model: str,
+        language: str,
+        timeout: int,
+        allow_empty: bool = False,
+    ) -> Tuple[str, int]:
+        """Upload one audio file over the pooled client; returns (text, status_code)."""
+        try:
+            logger.info(
+                "Starting transcription: file=%s (%d bytes), model=%s, language=%s",
+                SpeechService._describe(file_path), SpeechService._source_size(file_path), model, language,
+            )
+
+            async def upload():
+                resp = await AsyncTranscriptionClient.post_file(
+                    InferenceBackend.get().transcription_url,
+                    file_path,
+                    api_key,
+                    data=SpeechService._form_data(model, language),
+                    timeout=timeout,
+                )
+                if resp.status_code in RETRY_STATUSES:
+                    resp.raise_for_status()
+                return resp
+
+            resp = await Resilience.call(SpeechService._resilience_endpoint(), upload)
+            return SpeechService._parse_response(resp, allow_empty=allow_empty), resp.status_code
+
+        except (FileNotFoundError, ValueError, TranscriptionError):
+            raise
+        except httpx.TimeoutException as e:
+            raise TranscriptionError(f"Transcription timed out after {timeout}s") from e
+        except httpx.HTTPStatusError as e:
+            # Transient status that outlasted the retries
+            SpeechService._parse_response(e.response)
+        except httpx.HTTPError as e:
+            raise TranscriptionError(f"HTTP error during transcription: {e}") from e
+        except Exception as e:
+            raise TranscriptionError(f"Audio transcription failed: {e}") from e
+
+    @staticmethod
+    def _processed_file_name(upload_format: str) -> str:
+        """File name for the preprocessed upload; the extension tells the API the encoding."""
+        from .audio_preprocessing import AudioPreprocessingService
+        if upload_format not in AudioPreprocessingService.OUTPUT_FORMATS:
+            raise ValueError(f"Unsupported upload format: {upload_format}")
+        return "processed_audio" + AudioPreprocessingService.OUTPUT_FORMATS[upload_format][2]
+
+    @staticmethod
+    def _cache_plan(
+        preprocess: bool,
+        upload_format: str,
+        strip_pauses: bool,
+        adaptive: bool,
+        segment_seconds: Optional[float] = None,
+    ) -> Dict[str, Any]:
+        """Requested preprocessing options that make up the transcription cache key."""
+        if not preprocess:
+            return {"preprocess": False}
+        return {
+            "preprocess": True,
+            "upload_format": upload_format,
+            "strip_pauses": strip_pauses,
+            "adaptive": adaptive,
+            "segment_seconds": segment_seconds,
+        }
+
+    @staticmethod
+    def _from_cache(entry: Dict[str, Any], return_meta: bool) -> str | Tuple[str, Dict[str, Any]]:
+        if not return_meta:
+            return entry["text"]
+        meta = dict(entry["meta"])
+        meta["cache_hit"] = True
+        return entry["text"], meta
+
+    @staticmethod
+    def _resilience_endpoint() -> str:
+        return f"{InferenceBackend.get().name}-transcription"
+
+    @staticmethod
+    def _validate_inputs(audio_file_path: str | bytes, api_key: str) -> None:
+        if not api_key and InferenceBackend.get().requires_api_key:
+            raise ValueError("Missing Fireworks API key.")
+        if not audio_file_path:
+            raise ValueError("audio_file_path must be provided.")
+
+        if not SpeechService._is_buffer(audio_file_path) and not os.path.exists(audio_file_path):
+            raise FileNotFoundError(f"Audio file not found: {audio_file_path}")
+
+    @staticmethod
+    def _is_buffer(source) -> bool:
+        return isinstance(source, (bytes, bytearray, memoryview))
+
+    @staticmethod
+    def _describe(source) -> str:
+        """Log-friendly name of an audio source (never the bytes themselves)."""
+        return f"<{len(source)} bytes in memory>" if SpeechService._is_buffer(source) else str(source)
+
+    @staticmethod
+    def _source_size(source) -> int:
+        return len(source) if SpeechService._is_buffer(source) else os.path.getsize(source)
+
+    @staticmethod
+    def _open_source(source):
+        return io.BytesIO(source) if SpeechService._is_buffer(source) else open(source, "rb")
+
+    @staticmethod
+    def _upload_name(source) -> str:
+        return "audio" if SpeechService._is_buffer(source) else os.path.basename(source)
+
+    @staticmethod
+    def _form_data(model: str, language: str) -> Dict[str, str]:
+        """Multipart form fields sent alongside the audio file."""
+        data = {"model": model}
+        if language:
+            data["language"] = language
+        return data
+
+    @staticmethod
+    def _parse_response(resp, allow_empty: bool = False) -> str:
+        """Extract the transcript from a requests or httpx response, raising TranscriptionError on failure."""
+        if resp.status_code >= 400:
+            # Try to surface server error details
+            try:
+                detail = resp.json()
+            except Exception:
+                detail = resp.text
+            raise TranscriptionError(
+                f"Fireworks transcription error [{resp.status_code}]: {detail}"
+            )
+
+        # Parse JSON
+        try:
+            payload = resp.json()
+        except Exception as e:
+            raise TranscriptionError(f"Invalid JSON response from Fireworks: {e}") from e
+
+        text = payload.get("text")
+        if not isinstance(text, str) or (not allow_empty and not text.strip()):
+            raise TranscriptionError(f"Fireworks response missing 'text': {payload}")
+
+        logger.info("Transcription completed successfully: %d characters", len(text))
+        return text
+
+    @staticmethod
+    def _build_meta(
+        model: str,
+        language: str,
+        status_code: Optional[int],
+        upload_bytes: int,
+        preprocess_meta: Optional[Dict[str, Any]],
+    ) -> Dict[str, Any]:
+        meta = {
+            "model": model,
+            "language": language,
+            "endpoint": InferenceBackend.get().transcription_url,
+            "upload_bytes": upload_bytes,
+        }
+        if status_code is not None:
+            meta["status_code"] = status_code
+        if preprocess_meta is not None:
+            meta["offset_map"] = preprocess_meta["offset_map"]
+            meta["preprocessing_plan"] = preprocess_meta["plan"]
+        return meta
@@ -0,0 +1,66 @@
+import asyncio
+import hashlib
+import json
+from typing import Any, Dict, Optional
+
+from core.config import Config
+from utils.tiered_cache import TieredCache
+
+
+class TranscriptionCache:
+    """
+    Content-addressed cache of transcription results.
+
+    Entries are keyed by a hash of the original audio bytes together with the model,
+    language and the requested preprocessing plan, so Celery retries, repeated uploads of
+    the same visit and re-submits after a dropped stream reuse the earlier result instead
+    of running preprocessing and Whisper again. The requested plan is used rather than the
+    plan the quality probe picks: the probe is deterministic for the same bytes, and using
+    the request lets a hit skip preprocessing entirely.
+    """
+
+    HASH_CHUNK_BYTES = 1024 * 1024
+
+    _cache = TieredCache(
+        "transcription",
+        max_entries=Config.TRANSCRIPTION_CACHE_ENTRIES,
+        ttl_seconds=Config.TRANSCRIPTION_CACHE_TTL,
+        redis_url=Config.REDIS_CACHE_URL,
+    )
+
+    # --- Public API --- #
+    @staticmethod
+    def key(audio_source: str | bytes, model: str, language: str, plan: Dict[str, Any]) -> str:
+        """Cache key for a transcription request (audio given as a path or raw bytes)."""
+        digest = hashlib.sha256()
+        if isinstance(audio_source, (bytes, bytearray, memoryview)):
+            digest.update(audio_source)
+        else:
+            with open(audio_source, "rb") as f:
+                while chunk := f.read(TranscriptionCache.HASH_CHUNK_BYTES):
+                    digest.update(chunk)
+        params = json.dumps({"model": model, "language": language, "plan": plan}, sort_keys=True)
+        digest.update(params.encode("utf-8"))
+        return digest.hexdigest()
+
+    @staticmethod
+    async def akey(audio_source: str | bytes, model: str, language: str, plan: Dict[str, Any]) -> str:
+        """key() for async callers; the audio is hashed in a worker thread."""
+        return await asyncio.to_thread(TranscriptionCache.key, audio_source, model, language, plan)
+
+    @staticmethod
+    def get(key: str) -> Optional[Dict[str, Any]]:
+        """Cached {"text", "meta"} entry, or None."""
+        return TranscriptionCache._cache.get(key)
+
+    @staticmethod
+    def set(key: str, text: str, meta: Dict[str, Any]) -> None:
+        TranscriptionCache._cache.set(key, {"text": text, "meta": meta})
+
+    @staticmethod
+    async def aget(key: str) -> Optional[Dict[str, Any]]:
+        return await TranscriptionCache._cache.aget(key)
+
+    @staticmethod
+    async def aset(key: str, text: str, meta: Dict[str, Any]) -> None:
+        await TranscriptionCache._cache.aset(key, {"text": text, "meta": meta})
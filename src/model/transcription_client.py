@@ -0,0 +1,79 @@
+import asyncio
+import io
+import logging
+import os
+import weakref
+from typing import Dict, Optional
+
+import httpx
+
+from core.config import Config
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+class AsyncTranscriptionClient:
+    """
+    Shared keep-alive HTTP client for the transcription endpoint.
+
+    One httpx.AsyncClient (and so one connection pool) is kept per event loop: the API
+    process reuses a single pool for every request, while Celery tasks that run their own
+    loop via asyncio.run get a pool of their own. Pool limits come from Config.
+    """
+
+    _clients = weakref.WeakKeyDictionary()
+
+    # --- Public API --- #
+    @staticmethod
+    def get_client() -> httpx.AsyncClient:
+        """Return the pooled client for the running event loop, creating it on first use."""
+        loop = asyncio.get_running_loop()
+        client = AsyncTranscriptionClient._clients.get(loop)
+        if client is None or client.is_closed:
+            client = httpx.AsyncClient(
+                limits=httpx.Limits(
+                    max_connections=Config.TRANSCRIBE_MAX_CONNECTIONS,
+                    max_keepalive_connections=Config.TRANSCRIBE_MAX_KEEPALIVE,
+                    keepalive_expiry=Config.TRANSCRIBE_KEEPALIVE_EXPIRY,
+                ),
+            )
+            AsyncTranscriptionClient._clients[loop] = client
+        return client
+
+    @staticmethod
+    async def post_file(
+        url: str,
+        file_path: str | bytes,
+        api_key: str,
+        data: Dict[str, str],
+        timeout: float,
+        content_type: str = "application/octet-stream",
+    ) -> httpx.Response:
+        """
+        Upload a file as multipart/form-data over the pooled connection.
+
+        A path is streamed from disk in chunks while the request body is sent, rather
+        than being read into memory first; raw bytes are sent as they are.
+        """
+        client = AsyncTranscriptionClient.get_client()
+        if isinstance(file_path, (bytes, bytearray, memoryview)):
+            name, f = "audio", io.BytesIO(file_path)
+        else:
+            name, f = os.path.basename(file_path), open(file_path, "rb")
+        with f:
+            return await client.post(
+                url,
+                headers={"Authorization": f"Bearer {api_key}"},
+                files={"file": (name, f, content_type)},
+                data=data,
+                timeout=timeout,
+            )
+
+    @staticmethod
+    async def aclose(loop: Optional[asyncio.AbstractEventLoop] = None) -> None:
+        """Close the pooled client of the given (default: running) event loop."""
+        loop = loop or asyncio.get_running_loop()
+        client = AsyncTranscriptionClient._clients.pop(loop, None)
+        if client is not None:
+            await client.aclose()
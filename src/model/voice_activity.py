@@ -0,0 +1,206 @@
+import numpy as np
+
+
+class VoiceActivityDetector:
+    """
+    Energy / zero-crossing-rate voice activity detection used to strip pauses before ASR.
+
+    Frames are classified in one vectorized pass: a frame is speech when its energy is well
+    above the estimated noise floor, or moderately above it with a high zero-crossing rate
+    (unvoiced consonants such as "s" or "f"). Short gaps are bridged and every region is
+    padded with a guard band so word onsets and endings are not clipped.
+
+    The floor only counts as noise when the loud frames are well above it and the recording
+    has at least one real pause near it. Otherwise (e.g. two talkers at different volumes
+    with no pauses, where the floor sits on the quieter voice) nothing is stripped.
+
+    Removed pauses are recorded in an offset map: a list of [output_start, input_start,
+    duration] segments in seconds, used to map timestamps on the stripped audio back to
+    the original recording.
+    """
+
+    def __init__(self, frame_ms=30, hop_ms=10, energy_margin_db=10.0, unvoiced_margin_db=4.0,
+                 zcr_threshold=0.25, guard_ms=200, min_silence_ms=600, min_speech_ms=100,
+                 min_noise_gap_db=25.0):
+        """
+        Args:
+            frame_ms: Analysis frame length
+            hop_ms: Hop between frames
+            energy_margin_db: Energy above the noise floor that marks a frame as speech
+            unvoiced_margin_db: Lower margin applied to frames with a high zero-crossing rate
+            zcr_threshold: Zero-crossing rate (crossings per sample) treated as unvoiced speech
+            guard_ms: Padding kept on both sides of each speech region
+            min_silence_ms: Pauses shorter than this are kept
+            min_speech_ms: Isolated bursts shorter than this are dropped (clicks, pops)
+            min_noise_gap_db: How far the loud frames must be above the floor for it to be noise
+        """
+        self.frame_ms = frame_ms
+        self.hop_ms = hop_ms
+        self.energy_margin_db = energy_margin_db
+        self.unvoiced_margin_db = unvoiced_margin_db
+        self.zcr_threshold = zcr_threshold
+        self.guard_ms = guard_ms
+        self.min_silence_ms = min_silence_ms
+        self.min_speech_ms = min_speech_ms
+        self.min_noise_gap_db = min_noise_gap_db
+
+    # --- Public API --- #
+    def speech_regions(self, y, sr):
+        """
+        Find speech regions in a mono signal.
+
+        Returns:
+            int64 array of shape (n_regions, 2) with [start, end) sample indices
+        """
+        frame = max(1, int(sr * self.frame_ms / 1000))
+        hop = max(1, int(sr * self.hop_ms / 1000))
+        if len(y) < frame:
+            return np.array([[0, len(y)]], dtype=np.int64) if len(y) else np.zeros((0, 2), dtype=np.int64)
+
+        frames = np.lib.stride_tricks.sliding_window_view(y, frame)[::hop]
+        energy_db = 10 * np.log10(np.mean(frames ** 2, axis=1) + 1e-10)
+        signs = np.signbit(frames)
+        zcr = np.count_nonzero(signs[:, 1:] != signs[:, :-1], axis=1) / frame
+
+        floor_db, loud_db = np.percentile(energy_db, [10, 95])
+        min_silence = int(np.ceil(self.min_silence_ms / self.hop_ms))
+        if not self._has_clear_silence(energy_db, floor_db, loud_db, min_silence):
+            # No reliable noise estimate: keep everything rather than cut quiet speech
+            return np.array([[0, len(y)]], dtype=np.int64)
+
+        speech = energy_db > floor_db + self.energy_margin_db
+        speech |= (zcr > self.zcr_threshold) & (energy_db > floor_db + self.unvoiced_margin_db)
+
+        min_speech = int(np.ceil(self.min_speech_ms / self.hop_ms))
+        speech = self._drop_short_runs(speech, value=True, min_length=min_speech)
+        speech = self._drop_short_runs(speech, value=False, min_length=min_silence)
+
+        starts, ends = self._runs(speech)
+        if not len(starts):
+            return np.zeros((0, 2), dtype=np.int64)
+
+        # Frame runs -> sample ranges, padded with the guard band and merged where they touch
+        guard = int(sr * self.guard_ms / 1000)
+        regions = np.stack([starts * hop - guard, (ends - 1) * hop + frame + guard], axis=1)
+        np.clip(regions, 0, len(y), out=regions)
+        first = np.ones(len(regions), dtype=bool)
+        first[1:] = regions[1:, 0] > regions[:-1, 1]
+        group_starts = np.flatnonzero(first)
+        return np.stack([regions[group_starts, 0], np.maximum.reduceat(regions[:, 1], group_starts)], axis=1)
+
+    def strip_silence(self, y, sr, offset=0.0):
+        """
+        Concatenate the speech regions of a mono signal.
+
+        Args:
+            y: Input signal
+            sr: Sample rate of y
+            offset: Time (seconds) of y[0] in the original recording, e.g. after trimming
+
+        Returns:
+            Tuple of (stripped signal, offset map)
+        """
+        regions = self.speech_regions(y, sr)
+        if not len(regions):
+            # Nothing looks like speech; leave the decision to the recognizer
+            return y, self.identity_map(len(y) / sr, offset)
+        stripped = np.concatenate([y[start:end] for start, end in regions])
+
+        lengths = regions[:, 1] - regions[:, 0]
+        out_starts = np.concatenate([[0], np.cumsum(lengths)[:-1]])
+        offset_map = [
+            [float(out_start / sr), float(offset + start / sr), float(length / sr)]
+            for out_start, start, length in zip(out_starts, regions[:, 0], lengths)
+        ]
+        return stripped, offset_map
+
+    def split_points(self, y, sr, max_seconds, offset_map=None):
+        """
+        Choose cut points that split a signal into segments of at most max_seconds.
+
+        Each cut lands in the second half of the allowed span: on the last junction of the
+        offset map there (a stripped pause), otherwise in the quietest frame, so words are
+        not cut in half.
+
+        Args:
+            y: Mono signal
+            sr: Sample rate of y
+            max_seconds: Maximum segment length
+            offset_map: Offset map of y as returned by strip_silence, if pauses were stripped
+
+        Returns:
+            List of sample indices where segments start (always begins with 0)
+        """
+        span = int(sr * max_seconds)
+        if span <= 0 or len(y) <= span:
+            return [0]
+        junctions = np.array(
+            [int(round(segment[0] * sr)) for segment in (offset_map or [])[1:]], dtype=np.int64
+        )
+        hop = max(1, int(sr * self.hop_ms / 1000))
+        frame_hops = max(1, int(round(self.frame_ms / self.hop_ms)))
+
+        cuts = [0]
+        while len(y) - cuts[-1] > span:
+            low, high = cuts[-1] + span // 2, cuts[-1] + span
+            inside = junctions[(junctions > low) & (junctions <= high)]
+            if len(inside):
+                cut = int(inside[-1])
+            else:
+                # Energy per hop, smoothed over one analysis frame
+                window = y[low:high]
+                usable = len(window) - len(window) % hop
+                energy = np.mean(window[:usable].reshape(-1, hop) ** 2, axis=1)
+                energy = np.convolve(energy, np.ones(frame_hops), mode="same")
+                cut = low + int(np.argmin(energy)) * hop + hop // 2
+            cuts.append(cut)
+        return cuts
+
+    @staticmethod
+    def identity_map(duration, offset=0.0):
+        """Offset map for a signal where nothing was removed."""
+        return [[0.0, float(offset), float(duration)]] if duration > 0 else []
+
+    @staticmethod
+    def to_original_time(t, offset_map):
+        """Map a timestamp (seconds) on the processed audio back to the original recording."""
+        if not offset_map:
+            return t
+        out_starts = np.array([segment[0] for segment in offset_map])
+        index = max(0, int(np.searchsorted(out_starts, t, side="right")) - 1)
+        out_start, in_start, duration = offset_map[index]
+        return in_start + min(max(t - out_start, 0.0), duration)
+
+    # --- Private Helpers --- #
+    def _has_clear_silence(self, energy_db, floor_db, loud_db, min_silence):
+        """Whether the energy floor is real background noise with at least one pause at it."""
+        if loud_db - floor_db < self.min_noise_gap_db:
+            return False
+        starts, ends = self._runs(energy_db <= floor_db + self.unvoiced_margin_db)
+        return bool(np.any(ends - starts >= min_silence))
+
+    @staticmethod
+    def _runs(mask):
+        """Start and end (exclusive) indices of the True runs in a boolean mask."""
+        edges = np.diff(np.concatenate([[0], mask.astype(np.int8), [0]]))
+        return np.flatnonzero(edges == 1), np.flatnonzero(edges == -1)
+
+    @staticmethod
+    def _drop_short_runs(mask, value, min_length):
+        """Flip runs equal to value that are shorter than min_length (interior runs only for gaps)."""
+        if min_length <= 1:
+            return mask
+        target = mask if value else ~mask
+        starts, ends = VoiceActivityDetector._runs(target)
+        short = (ends - starts) < min_length
+        if not value:
+            # Leading/trailing silence is not a gap between speech regions
+            short &= (starts > 0) & (ends < len(mask))
+        if not np.any(short):
+            return mask
+        flip = np.zeros(len(mask) + 1, dtype=np.int32)
+        np.add.at(flip, starts[short], 1)
+        np.add.at(flip, ends[short], -1)
+        out = mask.copy()
+        out[np.cumsum(flip[:-1]) > 0] = not value
+        return out
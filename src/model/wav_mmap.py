@@ -0,0 +1,143 @@
+import io
+import mmap
+import os
+import struct
+import numpy as np
+import soundfile as sf
+
+
+class WavMemmap:
+    """
+    Memory-mapped view of the sample data of an uncompressed WAV file.
+
+    The file is never read in full: samples stay in the page cache behind an np.memmap
+    and are converted to float32 mono one block at a time, so a large upload spool is
+    not copied into a freshly allocated array before the stages that consume it.
+    """
+
+    # soundfile subtype -> (little-endian dtype, scale to [-1, 1])
+    SUPPORTED_SUBTYPES = {
+        "PCM_16": ("<i2", 1 / 32768),
+        "PCM_32": ("<i4", 1 / 2147483648),
+        "FLOAT": ("<f4", 1.0),
+        "DOUBLE": ("<f8", 1.0),
+    }
+
+    def __init__(self, data, samplerate, scale=1.0, offset=0):
+        self.data = data
+        self.samplerate = samplerate
+        self.frames, self.channels = data.shape
+        self._scale = scale
+        # np.memmap maps from the allocation-granularity boundary below the data offset
+        self._map_start = offset % mmap.ALLOCATIONGRANULARITY
+
+    # --- Public API --- #
+    @staticmethod
+    def open(source):
+        """
+        Map a PCM/float WAV source.
+
+        Args:
+            source: Path to an audio file, or a binary file object backed by a real file descriptor
+
+        Returns:
+            WavMemmap, or None if the source is not a mappable WAV (callers fall back to decoding)
+        """
+        if isinstance(source, (bytes, bytearray, memoryview, io.BytesIO)):
+            return None
+        is_file = hasattr(source, "read")
+        if is_file:
+            try:
+                source.fileno()
+            except (AttributeError, OSError, io.UnsupportedOperation):
+                return None
+            position = source.tell()
+            # Chunk offsets are absolute, so the file object must sit at the start of the WAV
+            if position != 0:
+                return None
+
+        try:
+            info = sf.info(source)
+            if is_file:
+                source.seek(position)
+            if info.format != "WAV" or info.subtype not in WavMemmap.SUPPORTED_SUBTYPES:
+                return None
+            offset = WavMemmap._data_offset(source)
+        except (RuntimeError, TypeError, ValueError, OSError, struct.error):
+            return None
+        finally:
+            if is_file:
+                source.seek(position)
+        if offset is None or info.frames <= 0:
+            return None
+
+        dtype, scale = WavMemmap.SUPPORTED_SUBTYPES[info.subtype]
+        data = np.memmap(source, dtype=dtype, mode="r", offset=offset, shape=(info.frames, info.channels))
+        if is_file:
+            # np.memmap seeks to the end of file objects; leave the caller's position untouched
+            source.seek(position)
+        return WavMemmap(data, info.samplerate, scale, offset)
+
+    def blocks(self, block_frames, start=0, stop=None):
+        """
+        Yield float32 mono blocks converted on demand from the mapped samples.
+
+        Pages behind blocks that were already consumed are released from the process, so
+        a sequential pass keeps resident memory flat however long the file is.
+        """
+        stop = self.frames if stop is None else min(stop, self.frames)
+        for begin in range(start, stop, block_frames):
+            end = min(begin + block_frames, stop)
+            yield self.read(begin, end)
+            self._release(begin, end)
+
+    def read(self, start, stop):
+        """Convert frames [start, stop) to a float32 mono array."""
+        # Plain ndarray view of the mapped pages (memmap subclasses confuse some consumers)
+        block = np.asarray(self.data[start:stop])
+        if self.channels > 1:
+            out = block.mean(axis=1, dtype=np.float32)
+        else:
+            out = block[:, 0].astype(np.float32)
+        if self._scale != 1.0:
+            out *= np.float32(self._scale)
+        return out
+
+    # --- Private Helpers --- #
+    def _release(self, start, stop):
+        """Drop the mapped pages of frames [start, stop) from this process (they stay in the page cache)."""
+        mapping = getattr(self.data, "_mmap", None)
+        if mapping is None or not hasattr(mmap, "MADV_DONTNEED"):
+            return
+        frame_bytes = self.channels * self.data.itemsize
+        first = self._map_start + start * frame_bytes
+        last = self._map_start + stop * frame_bytes
+        first -= first % mmap.PAGESIZE
+        last -= last % mmap.PAGESIZE
+        if last > first:
+            mapping.madvise(mmap.MADV_DONTNEED, first, last - first)
+
+    @staticmethod
+    def _data_offset(source):
+        """Byte offset of the 'data' chunk payload in a RIFF/WAVE file."""
+        f = open(os.fspath(source), "rb") if not hasattr(source, "read") else source
+        try:
+            riff, _, wave = struct.unpack("<4sI4s", f.read(12))
+            if riff != b"RIFF" or wave != b"WAVE":
+                return None
+            offset = 12
+            while True:
+                header = f.read(8)
+                if len(header) < 8:
+                    return None
+                chunk_id, size = struct.unpack("<4sI", header)
+                offset += 8
+                if chunk_id == b"data":
+                    return offset
+                # Chunks are word-aligned
+                skip = size + (size & 1)
+                f.seek(skip, io.SEEK_CUR)
+                offset += skip
+        finally:
+            if f is not source:
+                f.close()
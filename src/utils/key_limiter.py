@@ -0,0 +1,40 @@
+import asyncio
+import hashlib
+import weakref
+from contextlib import asynccontextmanager
+
+from prometheus_client import Gauge
+
+KEY_SLOTS_IN_USE = Gauge("api_key_slots_in_use", "Concurrent requests running per API key", ["key"])
+
+
+class KeyConcurrencyLimiter:
+    """
+    Caps how many requests run concurrently for each API key.
+
+    Every caller that uses the same key shares one semaphore of `limit` slots, so two batch
+    jobs on the same key together never exceed the limit, while other keys are unaffected.
+    Keys are only ever exposed as a short fingerprint (logs and metrics labels).
+    """
+
+    def __init__(self, limit: int):
+        self.limit = max(1, limit)
+        # asyncio primitives are bound to one loop: one table per event loop
+        self._slots = weakref.WeakKeyDictionary()
+
+    @staticmethod
+    def fingerprint(api_key: str) -> str:
+        return hashlib.sha256((api_key or "").encode("utf-8")).hexdigest()[:12]
+
+    @asynccontextmanager
+    async def slot(self, api_key: str):
+        """Hold one of the key's slots for the duration of the block."""
+        fingerprint = KeyConcurrencyLimiter.fingerprint(api_key)
+        table = self._slots.setdefault(asyncio.get_running_loop(), {})
+        semaphore = table.setdefault(fingerprint, asyncio.Semaphore(self.limit))
+        async with semaphore:
+            KEY_SLOTS_IN_USE.labels(key=fingerprint).inc()
+            try:
+                yield
+            finally:
+                KEY_SLOTS_IN_USE.labels(key=fingerprint).dec()
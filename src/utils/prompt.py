@@ -183,6 +183,89 @@ If asterisks or additional text appear anywhere in your response, it is consider
 """
 
 
+# Section markers of the fused refine + translate output (see LLMService.refine_translate_ar_stream)
+REFINED_ARABIC_MARKER = "<<ARABIC>>"
+ENGLISH_TRANSLATION_MARKER = "<<ENGLISH>>"
+
+
+def get_refine_translate_arabic_prompt_deepseek(raw_text):
+    return f"""
+Act as a senior medical transcription editor and medical translator specializing in Arabic healthcare documentation.
+
+**ORIGINAL TRANSCRIPTION:**
+{raw_text}
+
+**TASK 1 - REFINE (Arabic):**
+- Correct grammatical errors and awkward phrasing
+- Improve sentence structure and flow
+- Maintain all medical facts and clinical details
+- De-identify speaker references when possible
+- Use formal Arabic appropriate for medical records
+- Ensure refining any mentioned medications
+
+**TASK 2 - TRANSLATE (English):**
+- Translate the refined Arabic text from Task 1 to English
+- Preserve medical terminology accurately
+- Keep the structure and meaning identical
+- Keep brand and generic drug names unchanged, do not lose it, you must mention it
+
+**OUTPUT FORMAT (exactly two sections, each marker alone on its own line):**
+{REFINED_ARABIC_MARKER}
+the refined Arabic text
+{ENGLISH_TRANSLATION_MARKER}
+the English translation
+
+**CRITICAL RULES:**
+→ Output ONLY the two markers and the two texts, in this order
+→ No Arabic characters in the English section
+→ No additional commentary or explanations
+
+“⚠️ Absolutely forbidden to use any asterisks (*), markdown symbols, or additional text.
+The output must contain only plain text.
+If asterisks or additional text appear anywhere in your response, it is considered incorrect output.”
+
+{REFINED_ARABIC_MARKER}
+"""
+
+
+def get_refine_translate_arabic_prompt_deepseek_conversation(raw_text):
+    return f"""
+Act as a clinical transcription editor and medical translator. Refine this Arabic medical conversation, then translate it to English.
+
+**CONVERSATION TO PROCESS:**
+{raw_text}
+
+**TASK 1 - REFINE (Arabic):**
+- Preserve all medical content, terminology, and clinical context
+- Fix grammatical errors and improve sentence flow
+- Clearly label each speaker turn with **الدكتور:** or **المريض:**
+- Minimize personal identifiers while keeping dialogue intact
+- Keep brand and generic drug names unchanged, do not lose it, you must mention it
+
+**TASK 2 - TRANSLATE (English):**
+- Translate the refined conversation from Task 1 to English
+- **الدكتور:** must become **Doctor:** and **المريض:** must become **Patient:**
+- Maintain accurate medical terminology and the dialogue sequence
+
+**OUTPUT FORMAT (exactly two sections, each marker alone on its own line):**
+{REFINED_ARABIC_MARKER}
+the refined Arabic conversation
+{ENGLISH_TRANSLATION_MARKER}
+the English conversation
+
+**CRITICAL RULES:**
+→ Output ONLY the two markers and the two conversations, in this order
+→ No Arabic characters in the English section
+→ No additional text or explanations
+
+“⚠️ Absolutely forbidden to use any asterisks (*), markdown symbols, or additional text.
+The output must contain only plain text.
+If asterisks or additional text appear anywhere in your response, it is considered incorrect output.”
+
+{REFINED_ARABIC_MARKER}
+"""
+
+
 def get_dynamic_extraction_prompt_llama(translated_text, features):
     return f"""
 You are a medical expert Given the following medical text, extract relevant medical features and provide reasoning for the extraction. Return a JSON object with two fields:
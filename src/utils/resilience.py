@@ -0,0 +1,340 @@
+import asyncio
+import logging
+import random
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from email.utils import parsedate_to_datetime
+from typing import Any, Awaitable, Callable, Optional, Tuple
+
+import httpx
+import numpy as np
+import requests
+from fireworks.client import error as fireworks_error
+from prometheus_client import Counter, Gauge
+
+from core.config import Config
+
+logger = logging.getLogger(__name__)
+
+INFERENCE_RETRIES = Counter("inference_retries_total", "Retried outbound inference calls", ["endpoint"])
+INFERENCE_HEDGES = Counter("inference_hedges_total", "Hedged outbound inference calls", ["endpoint"])
+CIRCUIT_OPEN = Gauge("inference_circuit_open", "1 while the endpoint's circuit breaker is open", ["endpoint"])
+
+# HTTP statuses worth retrying: throttling, gateway and transient server errors
+RETRY_STATUSES = {408, 425, 429, 500, 502, 503, 504}
+
+TRANSIENT_FIREWORKS_ERRORS = (
+    fireworks_error.RateLimitError,
+    fireworks_error.InternalServerError,
+    fireworks_error.ServiceUnavailableError,
+    fireworks_error.BadGatewayError,
+    fireworks_error.APITimeoutError,
+)
+
+
+class CircuitOpenError(Exception):
+    """Raised without calling the endpoint while its circuit breaker is open."""
+
+
+class CircuitBreaker:
+    """
+    Consecutive-failure circuit breaker for one endpoint.
+
+    After failure_threshold transient failures in a row the circuit opens and calls fail
+    fast for reset_seconds. Then a single trial call is let through (half-open): success
+    closes the circuit, failure opens it for another reset_seconds.
+    """
+
+    def __init__(self, name: str, failure_threshold: int, reset_seconds: float):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        self._failures = 0
+        self._opened_at = None
+        self._trial_started = None
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            if self._opened_at is None:
+                return "closed"
+            if time.monotonic() - self._opened_at >= self.reset_seconds:
+                return "half_open"
+            return "open"
+
+    def allow(self) -> bool:
+        """Whether a call may go out now."""
+        with self._lock:
+            if self._opened_at is None:
+                return True
+            now = time.monotonic()
+            if now - self._opened_at < self.reset_seconds:
+                return False
+            # Half-open: one trial per reset window
+            if self._trial_started is not None and now - self._trial_started < self.reset_seconds:
+                return False
+            self._trial_started = now
+            return True
+
+    def record_success(self) -> None:
+        with self._lock:
+            self._failures = 0
+            self._opened_at = None
+            self._trial_started = None
+        CIRCUIT_OPEN.labels(endpoint=self.name).set(0)
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self._failures += 1
+            if self._opened_at is None and self._failures < self.failure_threshold:
+                return
+            if self._opened_at is None:
+                logger.error("Circuit breaker for %s opened after %d failures", self.name, self._failures)
+            self._opened_at = time.monotonic()
+            self._trial_started = None
+        CIRCUIT_OPEN.labels(endpoint=self.name).set(1)
+
+
+class LatencyWindow:
+    """Rolling window of recent successful call latencies for one endpoint."""
+
+    def __init__(self, size: int = 200):
+        self._samples = deque(maxlen=size)
+        self._lock = threading.Lock()
+
+    def observe(self, seconds: float) -> None:
+        with self._lock:
+            self._samples.append(seconds)
+
+    def percentile(self, q: float, min_samples: int) -> Optional[float]:
+        """The q-th percentile latency, or None until min_samples calls have been seen."""
+        with self._lock:
+            if len(self._samples) < max(1, min_samples):
+                return None
+            samples = list(self._samples)
+        return float(np.percentile(samples, q))
+
+
+class Resilience:
+    """
+    Shared resilience layer for outbound inference calls.
+
+    call() / call_sync() wrap one logical request to a named endpoint with:
+      - retries with full-jitter exponential backoff on transient errors (timeouts,
+        connection errors, 429/5xx), honoring Retry-After when the response carries one;
+      - optional hedging: if an attempt is still running after the endpoint's
+        HEDGE_PERCENTILE latency, a second identical request is sent and the first
+        success wins (only for idempotent, non-streaming calls);
+      - a per-endpoint CircuitBreaker that fails fast with CircuitOpenError.
+
+    Non-transient errors (e.g. 4xx) are raised immediately. Settings come from Config.
+    """
+
+    _breakers = {}
+    _latencies = {}
+    _lock = threading.Lock()
+    _hedge_executor = None
+
+    # --- Public API --- #
+    @staticmethod
+    async def call(
+        endpoint: str,
+        fn: Callable[[], Awaitable[Any]],
+        hedge: Optional[bool] = None,
+        max_attempts: Optional[int] = None,
+    ) -> Any:
+        """
+        Await fn() with retries, optional hedging and the endpoint's circuit breaker.
+
+        Args:
+            endpoint: Name of the endpoint (breaker, latency window and metrics label)
+            fn: Zero-argument coroutine function performing one attempt
+            hedge: Whether to hedge slow attempts (default: Config.HEDGE_ENABLED)
+            max_attempts: Attempts including the first (default: Config.RETRY_MAX_ATTEMPTS)
+        """
+        hedge = Config.HEDGE_ENABLED if hedge is None else hedge
+        attempts = max(1, max_attempts or Config.RETRY_MAX_ATTEMPTS)
+        breaker = Resilience.breaker(endpoint)
+        for attempt in range(1, attempts + 1):
+            if not breaker.allow():
+                raise CircuitOpenError(f"Circuit breaker for {endpoint} is open")
+            try:
+                result = await Resilience._attempt_async(endpoint, fn, hedge)
+            except Exception as e:
+                delay = Resilience._after_failure(endpoint, breaker, e, attempt, attempts)
+                await asyncio.sleep(delay)
+            else:
+                breaker.record_success()
+                return result
+
+    @staticmethod
+    def call_sync(
+        endpoint: str,
+        fn: Callable[[], Any],
+        hedge: Optional[bool] = None,
+        max_attempts: Optional[int] = None,
+    ) -> Any:
+        """
+        Blocking counterpart of call() for synchronous callers.
+
+        Hedged attempts run in a small shared thread pool; a losing attempt cannot be
+        interrupted and finishes in the background.
+        """
+        hedge = Config.HEDGE_ENABLED if hedge is None else hedge
+        attempts = max(1, max_attempts or Config.RETRY_MAX_ATTEMPTS)
+        breaker = Resilience.breaker(endpoint)
+        for attempt in range(1, attempts + 1):
+            if not breaker.allow():
+                raise CircuitOpenError(f"Circuit breaker for {endpoint} is open")
+            try:
+                result = Resilience._attempt_sync(endpoint, fn, hedge)
+            except Exception as e:
+                delay = Resilience._after_failure(endpoint, breaker, e, attempt, attempts)
+                time.sleep(delay)
+            else:
+                breaker.record_success()
+                return result
+
+    @staticmethod
+    def classify(exc: BaseException) -> Tuple[bool, Optional[float]]:
+        """Return (is_transient, retry_after_seconds) for an exception raised by an attempt."""
+        if isinstance(exc, (httpx.HTTPStatusError, requests.HTTPError)) and exc.response is not None:
+            status = exc.response.status_code
+            return status in RETRY_STATUSES, Resilience._retry_after(exc.response.headers)
+        if isinstance(exc, (httpx.TransportError, requests.ConnectionError, requests.Timeout)):
+            return True, None
+        if isinstance(exc, TRANSIENT_FIREWORKS_ERRORS):
+            return True, None
+        if isinstance(exc, (TimeoutError, ConnectionError)):
+            return True, None
+        return False, None
+
+    @staticmethod
+    def breaker(endpoint: str) -> CircuitBreaker:
+        with Resilience._lock:
+            if endpoint not in Resilience._breakers:
+                Resilience._breakers[endpoint] = CircuitBreaker(
+                    endpoint, Config.BREAKER_FAILURE_THRESHOLD, Config.BREAKER_RESET_SECONDS
+                )
+            return Resilience._breakers[endpoint]
+
+    @staticmethod
+    def latencies(endpoint: str) -> LatencyWindow:
+        with Resilience._lock:
+            if endpoint not in Resilience._latencies:
+                Resilience._latencies[endpoint] = LatencyWindow()
+            return Resilience._latencies[endpoint]
+
+    # --- Private Helpers --- #
+    @staticmethod
+    def _after_failure(endpoint, breaker, exc, attempt, attempts) -> float:
+        """Record a failed attempt; re-raises exc unless another attempt should follow after the returned delay."""
+        transient, retry_after = Resilience.classify(exc)
+        if not transient:
+            # The endpoint answered; the request itself was bad
+            breaker.record_success()
+            raise exc
+        breaker.record_failure()
+        delay = Resilience._backoff(attempt, retry_after)
+        if attempt >= attempts or delay is None or breaker.state == "open":
+            raise exc
+        INFERENCE_RETRIES.labels(endpoint=endpoint).inc()
+        logger.warning(
+            "Transient error from %s (attempt %d/%d), retrying in %.2fs: %s",
+            endpoint, attempt, attempts, delay, exc,
+        )
+        return delay
+
+    @staticmethod
+    def _backoff(attempt: int, retry_after: Optional[float]) -> Optional[float]:
+        """Delay before the next attempt, or None if the server asks us to wait too long."""
+        if retry_after is not None:
+            if retry_after > Config.RETRY_AFTER_MAX_SECONDS:
+                return None
+            return retry_after + random.uniform(0, Config.RETRY_BASE_DELAY)
+        # Full jitter
+        cap = min(Config.RETRY_MAX_DELAY, Config.RETRY_BASE_DELAY * 2 ** (attempt - 1))
+        return random.uniform(0, cap)
+
+    @staticmethod
+    def _retry_after(headers) -> Optional[float]:
+        value = headers.get("Retry-After") if headers is not None else None
+        if not value:
+            return None
+        try:
+            return max(0.0, float(value))
+        except ValueError:
+            pass
+        try:
+            return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+        except (TypeError, ValueError):
+            return None
+
+    @staticmethod
+    def _hedge_delay(endpoint: str, hedge: bool) -> Optional[float]:
+        if not hedge:
+            return None
+        return Resilience.latencies(endpoint).percentile(Config.HEDGE_PERCENTILE, Config.HEDGE_MIN_SAMPLES)
+
+    @staticmethod
+    async def _attempt_async(endpoint, fn, hedge):
+        start = time.monotonic()
+        delay = Resilience._hedge_delay(endpoint, hedge)
+        tasks = [asyncio.ensure_future(fn())]
+        try:
+            if delay is not None:
+                done, _ = await asyncio.wait(tasks, timeout=delay)
+                if not done:
+                    INFERENCE_HEDGES.labels(endpoint=endpoint).inc()
+                    tasks.append(asyncio.ensure_future(fn()))
+            pending = set(tasks)
+            while True:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        Resilience.latencies(endpoint).observe(time.monotonic() - start)
+                        return task.result()
+                if not pending:
+                    raise next(iter(done)).exception()
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    @staticmethod
+    def _attempt_sync(endpoint, fn, hedge):
+        start = time.monotonic()
+        delay = Resilience._hedge_delay(endpoint, hedge)
+        if delay is None:
+            result = fn()
+            Resilience.latencies(endpoint).observe(time.monotonic() - start)
+            return result
+
+        executor = Resilience._get_hedge_executor()
+        futures = [executor.submit(fn)]
+        done, _ = wait(futures, timeout=delay)
+        if not done:
+            INFERENCE_HEDGES.labels(endpoint=endpoint).inc()
+            futures.append(executor.submit(fn))
+        pending = set(futures)
+        while True:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                if future.exception() is None:
+                    Resilience.latencies(endpoint).observe(time.monotonic() - start)
+                    for other in pending:
+                        other.cancel()
+                    return future.result()
+            if not pending:
+                raise next(iter(done)).exception()
+
+    @staticmethod
+    def _get_hedge_executor():
+        with Resilience._lock:
+            if Resilience._hedge_executor is None:
+                Resilience._hedge_executor = ThreadPoolExecutor(
+                    max_workers=Config.HEDGE_MAX_THREADS, thread_name_prefix="hedge"
+                )
+            return Resilience._hedge_executor
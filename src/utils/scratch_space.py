@@ -0,0 +1,123 @@
+import os
+import shutil
+import tempfile
+import threading
+import logging
+from contextlib import contextmanager
+
+from prometheus_client import Gauge
+
+from core.config import Config
+
+logger = logging.getLogger(__name__)
+
+SCRATCH_BYTES_IN_USE = Gauge("scratch_bytes_in_use", "Bytes held in live per-request scratch directories")
+
+
+class ScratchQuotaExceeded(Exception):
+    """Raised when temporary audio artifacts exceed the configured scratch quota."""
+
+
+class ScratchDir:
+    """A per-request scratch directory; created and removed by ScratchSpace.request()."""
+
+    def __init__(self, root: str, quota_bytes: int):
+        self.root = root
+        self.quota_bytes = quota_bytes
+
+    def path(self, name: str) -> str:
+        """Path for a new artifact inside this directory."""
+        return os.path.join(self.root, name)
+
+    def usage(self) -> int:
+        """Bytes currently stored in this directory."""
+        total = 0
+        for dirpath, _, filenames in os.walk(self.root):
+            for filename in filenames:
+                try:
+                    total += os.path.getsize(os.path.join(dirpath, filename))
+                except OSError:
+                    pass
+        return total
+
+    def check_quota(self) -> int:
+        """Raise ScratchQuotaExceeded if the directory is over its quota; returns current usage."""
+        used = self.usage()
+        if self.quota_bytes and used > self.quota_bytes:
+            raise ScratchQuotaExceeded(
+                f"Scratch directory {self.root} holds {used} bytes (quota {self.quota_bytes})"
+            )
+        return used
+
+
+class ScratchSpace:
+    """
+    Manager for temporary audio artifacts.
+
+    Every request gets its own directory under SCRATCH_DIR (point it at a tmpfs such as
+    /dev/shm to keep intermediate audio in RAM), which is removed when the request's
+    context exits - on success, on error and on asyncio cancellation alike. Bytes held in
+    live directories are exported as the scratch_bytes_in_use gauge.
+    """
+
+    _live = {}
+    _lock = threading.Lock()
+
+    # --- Public API --- #
+    @staticmethod
+    def root() -> str:
+        """Base directory for scratch files (created on first use)."""
+        root = Config.SCRATCH_DIR or os.path.join(tempfile.gettempdir(), "medvoice-scratch")
+        os.makedirs(root, exist_ok=True)
+        return root
+
+    @staticmethod
+    @contextmanager
+    def request(prefix: str = "request"):
+        """
+        Create a scratch directory for the duration of a request.
+
+        Usable from both sync and async code; cleanup runs in a finally block, so it also
+        happens when the surrounding task is cancelled.
+
+        Raises:
+            ScratchQuotaExceeded: If the scratch space as a whole is already over quota
+        """
+        total_quota = Config.SCRATCH_TOTAL_QUOTA_MB * 1024 * 1024
+        if total_quota and ScratchSpace.bytes_in_use() > total_quota:
+            raise ScratchQuotaExceeded(f"Scratch space is over its {Config.SCRATCH_TOTAL_QUOTA_MB} MB quota")
+
+        scratch = ScratchDir(
+            tempfile.mkdtemp(prefix=f"{prefix}-", dir=ScratchSpace.root()),
+            Config.SCRATCH_REQUEST_QUOTA_MB * 1024 * 1024,
+        )
+        with ScratchSpace._lock:
+            ScratchSpace._live[scratch.root] = scratch
+        try:
+            yield scratch
+        finally:
+            with ScratchSpace._lock:
+                ScratchSpace._live.pop(scratch.root, None)
+            shutil.rmtree(scratch.root, ignore_errors=True)
+            logger.debug("Removed scratch directory %s", scratch.root)
+
+    @staticmethod
+    def temp_file(suffix: str = "") -> str:
+        """
+        Reserve a standalone temporary file in the scratch root for callers without a request context.
+
+        The caller owns the file and must remove it; no directory is left behind.
+        """
+        fd, path = tempfile.mkstemp(suffix=suffix, dir=ScratchSpace.root())
+        os.close(fd)
+        return path
+
+    @staticmethod
+    def bytes_in_use() -> int:
+        """Bytes held in all live request directories of this process."""
+        with ScratchSpace._lock:
+            live = list(ScratchSpace._live.values())
+        return sum(scratch.usage() for scratch in live)
+
+
+SCRATCH_BYTES_IN_USE.set_function(ScratchSpace.bytes_in_use)
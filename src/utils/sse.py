@@ -0,0 +1,101 @@
+import asyncio
+import time
+from typing import Any, AsyncIterator, Dict, List
+
+import orjson
+
+from core.config import Config
+
+_ORJSON_OPTIONS = orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY
+
+
+def encode_event(event: Dict[str, Any]) -> bytes:
+    """Serialize one event as an SSE `data:` frame (UTF-8 JSON, non-ASCII kept as is)."""
+    return b"data: " + orjson.dumps(event, default=str, option=_ORJSON_OPTIONS) + b"\n\n"
+
+
+def _is_chunk(event: Dict[str, Any]) -> bool:
+    """A plain text chunk, with nothing besides phase/status/chunk that merging would drop."""
+    return (
+        event.get("status") == "streaming"
+        and isinstance(event.get("chunk"), str)
+        and set(event) == {"phase", "status", "chunk"}
+    )
+
+
+async def coalesce_chunks(
+    events: AsyncIterator[Dict[str, Any]],
+    interval: float = None,
+    max_bytes: int = None,
+) -> AsyncIterator[Dict[str, Any]]:
+    """
+    Merge consecutive {"status": "streaming", "chunk": ...} events into fewer, larger ones.
+
+    Chunks are buffered per phase and flushed once `interval` seconds have passed since the
+    first buffered chunk, once a phase has buffered `max_bytes` of text, or right before any
+    other event, so the concatenated text and the order relative to other events are
+    unchanged. The timer also fires while the source is idle, so a slow stream is not held
+    back for longer than the interval.
+    """
+    interval = Config.SSE_FLUSH_INTERVAL_MS / 1000 if interval is None else interval
+    max_bytes = Config.SSE_FLUSH_MAX_BYTES if max_bytes is None else max_bytes
+    buffers: Dict[str, List[str]] = {}
+    sizes: Dict[str, int] = {}
+    deadline = None
+
+    def flush():
+        merged = [
+            {"phase": phase, "status": "streaming", "chunk": "".join(parts)}
+            for phase, parts in buffers.items()
+        ]
+        buffers.clear()
+        sizes.clear()
+        return merged
+
+    source = aiter(events)
+    pending = None
+    try:
+        while True:
+            if pending is None:
+                pending = asyncio.ensure_future(anext(source))
+            timeout = None if deadline is None else max(0.0, deadline - time.monotonic())
+            done, _ = await asyncio.wait({pending}, timeout=timeout)
+            if not done:
+                # Interval elapsed with nothing new: send what has been buffered
+                for merged in flush():
+                    yield merged
+                deadline = None
+                continue
+
+            try:
+                event = pending.result()
+            except StopAsyncIteration:
+                break
+            finally:
+                pending = None
+
+            if _is_chunk(event):
+                phase = event.get("phase")
+                buffers.setdefault(phase, []).append(event["chunk"])
+                sizes[phase] = sizes.get(phase, 0) + len(event["chunk"].encode("utf-8"))
+                if deadline is None:
+                    deadline = time.monotonic() + interval
+                if sizes[phase] >= max_bytes or interval <= 0:
+                    for merged in flush():
+                        yield merged
+                    deadline = None
+                continue
+
+            for merged in flush():
+                yield merged
+            deadline = None
+            yield event
+
+        for merged in flush():
+            yield merged
+    finally:
+        if pending is not None:
+            pending.cancel()
+            await asyncio.gather(pending, return_exceptions=True)
+        if hasattr(source, "aclose"):
+            await source.aclose()
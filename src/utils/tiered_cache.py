@@ -0,0 +1,127 @@
+import asyncio
+import json
+import logging
+import threading
+import time
+from collections import OrderedDict
+
+from prometheus_client import Counter
+
+logger = logging.getLogger(__name__)
+
+CACHE_LOOKUPS = Counter("cache_lookups_total", "Result cache lookups", ["cache", "tier", "result"])
+
+
+class TieredCache:
+    """
+    Two-tier key/value cache for JSON-serializable results.
+
+    The first tier is an in-process LRU; the optional second tier is Redis, shared by the
+    API workers and Celery workers. Both tiers expire entries after ttl_seconds. Redis hits
+    are copied into the local tier. Redis errors are logged and treated as misses, so an
+    unavailable cache never fails the request that consults it. Lookups are counted in the
+    cache_lookups_total counter, labelled by cache name, tier and hit/miss.
+    """
+
+    def __init__(self, name, max_entries=1024, ttl_seconds=86400, redis_url=None):
+        """
+        Args:
+            name: Cache name, used as the Redis key prefix and the metrics label
+            max_entries: Capacity of the local LRU tier (0 disables it)
+            ttl_seconds: Lifetime of an entry in both tiers
+            redis_url: Redis connection URL; None disables the shared tier
+        """
+        self.name = name
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.redis_url = redis_url
+        self._local = OrderedDict()
+        self._lock = threading.Lock()
+        self._redis = None
+
+    # --- Public API --- #
+    def get(self, key):
+        """Return the cached value for key, or None."""
+        value = self._get_local(key)
+        if value is not None:
+            return value
+        if not self.redis_url:
+            return None
+        value = self._get_redis(key)
+        if value is not None:
+            self._set_local(key, value)
+        return value
+
+    def set(self, key, value):
+        """Store a JSON-serializable value in every tier."""
+        self._set_local(key, value)
+        if self.redis_url:
+            self._set_redis(key, value)
+
+    async def aget(self, key):
+        """get() for async callers; the Redis round trip runs in a worker thread."""
+        value = self._get_local(key)
+        if value is not None or not self.redis_url:
+            return value
+        value = await asyncio.to_thread(self._get_redis, key)
+        if value is not None:
+            self._set_local(key, value)
+        return value
+
+    async def aset(self, key, value):
+        """set() for async callers."""
+        self._set_local(key, value)
+        if self.redis_url:
+            await asyncio.to_thread(self._set_redis, key, value)
+
+    def clear(self):
+        """Drop the local tier (the Redis tier is left to expire)."""
+        with self._lock:
+            self._local.clear()
+
+    # --- Private Helpers --- #
+    def _get_local(self, key):
+        if not self.max_entries:
+            return None
+        with self._lock:
+            entry = self._local.get(key)
+            if entry is not None and entry[0] < time.monotonic():
+                del self._local[key]
+                entry = None
+            if entry is not None:
+                self._local.move_to_end(key)
+        CACHE_LOOKUPS.labels(cache=self.name, tier="local", result="hit" if entry else "miss").inc()
+        return entry[1] if entry else None
+
+    def _set_local(self, key, value):
+        if not self.max_entries:
+            return
+        with self._lock:
+            self._local[key] = (time.monotonic() + self.ttl_seconds, value)
+            self._local.move_to_end(key)
+            while len(self._local) > self.max_entries:
+                self._local.popitem(last=False)
+
+    def _get_redis(self, key):
+        try:
+            raw = self._client().get(self._redis_key(key))
+        except Exception as e:
+            logger.warning("Redis lookup failed for cache %s: %s", self.name, e)
+            return None
+        CACHE_LOOKUPS.labels(cache=self.name, tier="redis", result="hit" if raw is not None else "miss").inc()
+        return json.loads(raw) if raw is not None else None
+
+    def _set_redis(self, key, value):
+        try:
+            self._client().set(self._redis_key(key), json.dumps(value), ex=int(self.ttl_seconds))
+        except Exception as e:
+            logger.warning("Redis write failed for cache %s: %s", self.name, e)
+
+    def _redis_key(self, key):
+        return f"{self.name}:{key}"
+
+    def _client(self):
+        if self._redis is None:
+            import redis  # optional; only needed when a Redis tier is configured
+            self._redis = redis.Redis.from_url(self.redis_url, socket_timeout=1.0, socket_connect_timeout=1.0)
+        return self._redis
@@ -0,0 +1,104 @@
+import asyncio
+import io
+import logging
+import os
+
+from fastapi import UploadFile
+
+logger = logging.getLogger(__name__)
+
+
+class UploadSpool:
+    """
+    Direct access to the spooled body of an UploadFile.
+
+    Starlette spools uploads in a SpooledTemporaryFile: small bodies stay in memory, larger
+    ones roll over to an anonymous temp file. source() hands that spool to the decoder as
+    is - the in-memory buffer as bytes, or the rolled-over file as a /proc path the
+    preprocessing workers can open - so the upload is not first copied to AUDIO_DIR and
+    read back. persist() writes the original to disk as an optional side task; it reads
+    with positional I/O (or an in-kernel copy), so it can run while the decoder reads.
+    """
+
+    COPY_CHUNK_BYTES = 1024 * 1024
+
+    def __init__(self, upload: UploadFile):
+        self.upload = upload
+        self._bytes = None
+
+    # --- Public API --- #
+    def source(self):
+        """Path or bytes for AudioPreprocessingService / PreprocessingPool."""
+        fd = self._fileno()
+        if fd is not None:
+            # Reopened by path, the worker gets its own file offset
+            path = f"/proc/{os.getpid()}/fd/{fd}"
+            if os.path.exists(path):
+                return path
+        return self._buffer()
+
+    def size(self) -> int:
+        fd = self._fileno()
+        if fd is not None:
+            return os.fstat(fd).st_size
+        return len(self._buffer())
+
+    async def persist(self, destination) -> str:
+        """Copy the original upload to destination without moving the spool's position."""
+        await asyncio.to_thread(self._copy_to, str(destination))
+        logger.info("Uploaded file saved: %s", destination)
+        return str(destination)
+
+    # --- Private Helpers --- #
+    def _raw(self):
+        """The file behind the SpooledTemporaryFile wrapper (BytesIO or a real temp file)."""
+        f = self.upload.file
+        return getattr(f, "_file", f)
+
+    def _fileno(self):
+        f = self.upload.file
+        # Calling fileno() on an in-memory SpooledTemporaryFile would force it to disk
+        if not getattr(f, "_rolled", True):
+            return None
+        try:
+            return self._raw().fileno()
+        except (AttributeError, OSError, io.UnsupportedOperation):
+            return None
+
+    def _buffer(self) -> bytes:
+        if self._bytes is None:
+            raw = self._raw()
+            if isinstance(raw, io.BytesIO):
+                self._bytes = raw.getvalue()
+            else:
+                position = raw.tell()
+                raw.seek(0)
+                self._bytes = raw.read()
+                raw.seek(position)
+        return self._bytes
+
+    def _copy_to(self, destination: str) -> None:
+        fd = self._fileno()
+        with open(destination, "wb") as out:
+            if fd is None:
+                out.write(self._buffer())
+                return
+            size, offset = os.fstat(fd).st_size, 0
+            if hasattr(os, "copy_file_range"):
+                try:
+                    while offset < size:
+                        copied = os.copy_file_range(fd, out.fileno(), size - offset, offset, offset)
+                        if not copied:
+                            break
+                        offset += copied
+                    return
+                except OSError:
+                    # e.g. across filesystems on older kernels; finish with positional reads
+                    pass
+            out.seek(offset)
+            while offset < size:
+                chunk = os.pread(fd, min(UploadSpool.COPY_CHUNK_BYTES, size - offset), offset)
+                if not chunk:
+                    break
+                out.write(chunk)
+                offset += len(chunk)
@@ -0,0 +1,48 @@
+from concurrent.futures import Future, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from model.audio_batch import BatchPreprocessingService
+
+
+class DyingWorkerPool(ThreadPoolExecutor):
+    """Stands in for a process pool whose worker is killed while processing `killer`."""
+
+    killer = None
+
+    def submit(self, fn, path, output, options):
+        if path == self.killer:
+            future = Future()
+            future.set_exception(BrokenProcessPool("A process in the process pool was terminated abruptly"))
+            return future
+        return super().submit(fn, path, output, options)
+
+
+def fake_process_one(path, output_path, options):
+    return {"input": path, "output": output_path, "seconds": 0.0, "error": None}
+
+
+def run_batch(monkeypatch, tmp_path, paths, killer):
+    monkeypatch.setattr(DyingWorkerPool, "killer", killer)
+    monkeypatch.setattr(BatchPreprocessingService, "_executor", staticmethod(lambda workers, options: DyingWorkerPool(workers)))
+    monkeypatch.setattr(BatchPreprocessingService, "_process_one", staticmethod(fake_process_one))
+    return BatchPreprocessingService.preprocess_batch(paths, tmp_path, workers=2)
+
+
+def test_dead_worker_fails_only_its_file(monkeypatch, tmp_path):
+    paths = [f"/audio/visit_{i}.wav" for i in range(10)]
+    summary = run_batch(monkeypatch, tmp_path, paths, killer=paths[3])
+
+    assert [result["input"] for result in summary["results"]] == paths
+    assert summary["failed"] == 1
+    assert summary["succeeded"] == 9
+    failed = summary["results"][3]
+    assert failed["output"] is None
+    assert "worker process died" in failed["error"]
+
+
+def test_batch_without_dead_workers(monkeypatch, tmp_path):
+    paths = [f"/audio/visit_{i}.wav" for i in range(5)]
+    summary = run_batch(monkeypatch, tmp_path, paths, killer=None)
+
+    assert summary["failed"] == 0
+    assert [result["output"] for result in summary["results"]] == [str(tmp_path / f"visit_{i}.flac") for i in range(5)]
@@ -0,0 +1,49 @@
+import os
+
+import numpy as np
+import soundfile as sf
+
+from model.audio_preprocessing import AudioPreprocessingService
+
+SR = 16000
+
+
+def recording(path, seconds=30):
+    """Speech-like bursts with short pauses between them."""
+    rng = np.random.default_rng(0)
+    t = np.arange(seconds * SR) / SR
+    bursts = (np.sin(2 * np.pi * 0.25 * t) > -0.3).astype(np.float32)
+    y = rng.standard_normal(len(t)).astype(np.float32) * 0.1 * bursts + rng.standard_normal(len(t)) * 1e-4
+    sf.write(path, y, SR)
+    return path
+
+
+def preprocess(source, output, segment_seconds):
+    return AudioPreprocessingService.preprocess_audio(
+        source, output, output_format="flac", segment_seconds=segment_seconds, return_meta=True
+    )
+
+
+def test_segments_replace_the_full_output(tmp_path):
+    source = recording(str(tmp_path / "visit.wav"))
+    output = str(tmp_path / "processed.flac")
+
+    _, meta = preprocess(source, output, segment_seconds=10)
+
+    segments = meta["segments"]
+    assert len(segments) > 1
+    assert not os.path.exists(output)
+    assert all(os.path.exists(segment["path"]) for segment in segments)
+    written = sum(sf.info(segment["path"]).duration for segment in segments)
+    assert abs(written - sum(segment["duration"] for segment in segments)) < 0.01
+
+
+def test_single_segment_is_the_output_file(tmp_path):
+    source = recording(str(tmp_path / "visit.wav"))
+    output = str(tmp_path / "processed.flac")
+
+    _, meta = preprocess(source, output, segment_seconds=120)
+
+    assert [segment["path"] for segment in meta["segments"]] == [output]
+    assert os.path.exists(output)
+    assert sorted(os.listdir(tmp_path)) == ["processed.flac", "visit.wav"]
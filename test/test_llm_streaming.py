@@ -0,0 +1,48 @@
+import asyncio
+from types import SimpleNamespace
+
+from model.inference_backend import InferenceBackend
+from model.llm_service import LLMService
+
+
+class FakeBackend:
+    """Streams each prompt's scripted deltas as completion chunks, counting upstream calls."""
+
+    name = "fake"
+
+    def __init__(self, deltas):
+        self.deltas = deltas
+        self.calls = 0
+
+    async def acreate_completion(self, api_key=None, **params):
+        self.calls += 1
+        for delta in self.deltas:
+            yield SimpleNamespace(choices=[SimpleNamespace(text=delta)])
+
+
+def collect(prompt, temperature=0):
+    async def run():
+        return [chunk async for chunk in LLMService._call_llm_api_stream("model", prompt, temperature=temperature)]
+    return asyncio.run(run())
+
+
+def use_backend(monkeypatch, deltas):
+    backend = FakeBackend(deltas)
+    monkeypatch.setattr(InferenceBackend, "get", staticmethod(lambda: backend))
+    return backend
+
+
+def test_deltas_are_streamed_verbatim(monkeypatch):
+    deltas = ["The pat", "ient  has", "\n\n", "  fever", " ", "and cough."]
+    use_backend(monkeypatch, deltas)
+
+    assert collect("verbatim", temperature=0.7) == deltas
+
+
+def test_cached_completion_is_replayed_as_one_chunk(monkeypatch):
+    deltas = ["Blood ", "pressure", "  130/85", "\nPulse 72"]
+    backend = use_backend(monkeypatch, deltas)
+
+    assert collect("cached prompt") == deltas
+    assert collect("cached prompt") == ["".join(deltas)]
+    assert backend.calls == 1
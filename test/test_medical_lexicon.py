@@ -0,0 +1,183 @@
+import asyncio
+
+import pytest
+
+from model.input_validator import MedicalValidator
+from model.llm_service import LLMService
+from model.medical_lexicon import MedicalLexiconClassifier
+
+MEDICAL = {
+    "en_visit": (
+        "The patient reports a headache and fever for two days with a dry cough but no chest pain. "
+        "Blood pressure is normal. Prescribed paracetamol 500 mg three times daily, follow up in one week."
+    ),
+    "en_dictation": (
+        "Known diabetic on metformin and insulin, now with burning urination and abdominal pain. "
+        "Urine culture sent, started ciprofloxacin for a suspected urinary tract infection."
+    ),
+    "ar_visit": (
+        "المريض يشكو من صداع وسخونة من يومين مع كحة خفيفة، ضغط الدم طبيعي، "
+        "ونصحه الطبيب بالراحة وأخذ بنادول ٥٠٠ ملجم والمتابعة بعد أسبوع."
+    ),
+    "ar_dialect": (
+        "يا دكتور عندي وجع في بطني ومغص من امبارح ومش قادر آكل، "
+        "وخدت بنادول مرتين بس الحرارة لسه عالية والصداع مش راضي يروح خالص"
+    ),
+}
+
+# Clinical visits in vocabulary the lexicon does not list
+MEDICAL_NO_LEXICON_HITS = {
+    "en_heart_failure": (
+        "Echocardiogram showed a reduced ejection fraction of thirty percent with left ventricular dilation. "
+        "Started furosemide and spironolactone, titrate carvedilol, and recheck potassium and creatinine next week."
+    ),
+    "ar_heart_failure": (
+        "أظهر تخطيط صدى القلب انخفاض نسبة الضخ إلى ثلاثين بالمئة مع توسع البطين الأيسر. "
+        "بدأنا فوروسيميد وسبيرونولاكتون ونزيد كارفيديلول تدريجيا ونعيد قياس البوتاسيوم والكرياتينين الأسبوع القادم."
+    ),
+}
+
+NON_MEDICAL = {
+    "en_chat": (
+        "So yesterday we went to the mall for the sale, then we watched a football match with friends "
+        "and talked about the new car my brother wants to buy before his birthday next month."
+    ),
+    "ar_chat": (
+        "امبارح رحنا المول واشترينا هدايا وبعدين قعدنا مع أصحابنا نتفرج على ماتش الكورة "
+        "واتكلمنا عن العربية الجديدة اللي أخويا عايز يشتريها قبل عيد ميلاده الشهر الجاي"
+    ),
+}
+
+NON_MEDICAL_NO_OFF_TOPIC_TERMS = {
+    "en_meeting": (
+        "The project deadline is next week, so we need to finish the quarterly report and "
+        "send it to the manager before Friday afternoon together with the budget numbers."
+    ),
+    "ar_meeting": (
+        "موعد تسليم المشروع الأسبوع القادم، لذلك يجب أن ننهي التقرير ربع السنوي "
+        "ونرسله إلى المدير قبل ظهر يوم الخميس مع أرقام الميزانية المطلوبة منا."
+    ),
+}
+
+
+def classify(text):
+    return MedicalLexiconClassifier.classify(text, medical_threshold=85)
+
+
+@pytest.mark.parametrize("name", sorted(MEDICAL))
+def test_medical_transcripts(name):
+    result = classify(MEDICAL[name])
+
+    assert result["classification"] == "MEDICAL"
+    assert result["confidence"] >= 85
+
+
+@pytest.mark.parametrize("name", sorted(MEDICAL_NO_LEXICON_HITS))
+def test_no_lexicon_hits_is_uncertain_not_non_medical(name):
+    result = classify(MEDICAL_NO_LEXICON_HITS[name])
+
+    assert result["classification"] is None
+
+
+@pytest.mark.parametrize("text", [*NON_MEDICAL.values(), *NON_MEDICAL_NO_OFF_TOPIC_TERMS.values()])
+def test_non_medical_is_left_to_the_llm(text):
+    assert classify(text)["classification"] is None
+
+
+# Everyday sentences using words that are also clinical
+@pytest.mark.parametrize(
+    "text",
+    [
+        "Please be patient, the traffic on the way to the hospital parking was a real pain today.",
+        "ولما رحت المول كان فيه زحمه ووجع دماغ والمريض اللي جنبي",
+        "The history doctor was tired after the lab, and the CT office had an acute shortage of staff.",
+        "الدكتور كان قلق جدا والجو حاد اليوم بعد الاجتماع الطويل في المكتب",
+    ],
+)
+def test_everyday_sentences_are_not_medical(text):
+    assert classify(text)["classification"] is None
+
+
+def test_short_clinical_sentence_is_left_to_the_llm():
+    assert classify("Fever and cough since Monday, taking paracetamol.")["classification"] is None
+
+
+def test_off_topic_terms_lower_the_score():
+    visit = "The patient has a headache and the clinic prescribed medicine for the pain"
+    chat = visit + " before the football match at the mall"
+
+    assert MedicalLexiconClassifier.score(chat)["probability"] < MedicalLexiconClassifier.score(visit)["probability"]
+
+
+def test_phrase_words_are_not_counted_twice():
+    result = MedicalLexiconClassifier.score("chest pain")
+
+    assert result["matched_terms"] == ["chest pain"]
+    assert result["weight"] == MedicalLexiconClassifier.WEIGHTS["symptom"]
+
+
+def test_arabic_prefixes_and_spelling_variants_match():
+    result = MedicalLexiconClassifier.score("وبالصداع والحُمّى والكحة")
+
+    assert result["matched_terms"] == ["حمي", "صداع", "كحه"]
+
+
+def stub_llm(monkeypatch, classification="MEDICAL", confidence=90):
+    calls = []
+
+    async def call_llm_api_async(**kwargs):
+        calls.append(kwargs)
+        return f'{{"classification": "{classification}", "confidence": {confidence}}}'
+
+    monkeypatch.setattr(LLMService, "_call_llm_api_async", staticmethod(call_llm_api_async))
+    return calls
+
+
+def test_validator_uses_lexicon_for_clear_cases(monkeypatch):
+    calls = stub_llm(monkeypatch)
+
+    result = asyncio.run(MedicalValidator.validate_medical_content_async(MEDICAL["ar_visit"]))
+
+    assert result["method"] == "lexicon"
+    assert result["classification"] == "MEDICAL"
+    assert calls == []
+
+
+def test_validator_falls_back_to_llm_when_uncertain(monkeypatch):
+    calls = stub_llm(monkeypatch, "MEDICAL", 88)
+
+    result = asyncio.run(MedicalValidator.validate_medical_content_async(MEDICAL_NO_LEXICON_HITS["en_heart_failure"]))
+
+    assert len(calls) == 1
+    assert result["method"] == "llm_validation"
+    assert result["classification"] == "MEDICAL"
+    assert result["confidence"] == 88
+    assert result["lexicon_score"] is not None
+
+
+def test_validator_leaves_non_medical_to_the_llm(monkeypatch):
+    calls = stub_llm(monkeypatch, "NON_MEDICAL", 96)
+
+    result = asyncio.run(MedicalValidator.validate_medical_content_async(NON_MEDICAL["en_chat"]))
+
+    assert len(calls) == 1
+    assert result["method"] == "llm_validation"
+    assert result["classification"] == "NON_MEDICAL"
+    assert result["lexicon_score"] is not None
+
+
+def test_graph_validate_node_leaves_non_medical_to_the_llm(monkeypatch):
+    from model.pipeline_graph import validate_node
+
+    calls = []
+
+    def call_llm_api(**kwargs):
+        calls.append(kwargs)
+        return '{"classification": "MEDICAL", "confidence": 91}'
+
+    monkeypatch.setattr(LLMService, "_call_llm_api", staticmethod(call_llm_api))
+
+    state = validate_node({"raw_text": MEDICAL_NO_LEXICON_HITS["en_heart_failure"]})
+
+    assert len(calls) == 1
+    assert state["is_medical"] is True
@@ -0,0 +1,61 @@
+import asyncio
+from concurrent.futures import Executor, Future
+from concurrent.futures.process import BrokenProcessPool
+
+import pytest
+
+from model.preprocessing_pool import PreprocessingPool
+
+
+class FakePool(Executor):
+    """Executor whose jobs finish only when the test resolves their futures."""
+
+    def __init__(self):
+        self.futures = []
+        self.shutdowns = 0
+
+    def submit(self, fn, *args, **kwargs):
+        future = Future()
+        self.futures.append(future)
+        return future
+
+    def shutdown(self, wait=True, *, cancel_futures=False):
+        self.shutdowns += 1
+
+
+async def submitted(pool, count):
+    while len(pool.futures) < count:
+        await asyncio.sleep(0)
+
+
+def test_late_broken_job_does_not_shut_down_the_replacement_pool(monkeypatch):
+    broken, fresh = FakePool(), FakePool()
+    monkeypatch.setattr(PreprocessingPool, "_executor", broken)
+
+    async def run():
+        first = asyncio.create_task(PreprocessingPool.preprocess("a.wav", "a.flac"))
+        late = asyncio.create_task(PreprocessingPool.preprocess("b.wav", "b.flac"))
+        await submitted(broken, 2)
+
+        broken.futures[0].set_exception(BrokenProcessPool("worker died"))
+        with pytest.raises(BrokenProcessPool):
+            await first
+        assert PreprocessingPool._executor is None
+        assert broken.shutdowns == 1
+
+        # Another caller starts the replacement pool and submits to it
+        PreprocessingPool._executor = fresh
+        retry = asyncio.create_task(PreprocessingPool.preprocess("c.wav", "c.flac"))
+        await submitted(fresh, 1)
+
+        broken.futures[1].set_exception(BrokenProcessPool("worker died"))
+        with pytest.raises(BrokenProcessPool):
+            await late
+        assert PreprocessingPool._executor is fresh
+        assert fresh.shutdowns == 0
+        assert broken.shutdowns == 1
+
+        fresh.futures[0].set_result("c.flac")
+        return await retry
+
+    assert asyncio.run(run()) == "c.flac"
@@ -0,0 +1,61 @@
+import asyncio
+
+from model.llm_service import SectionedStream
+from utils.prompt import ENGLISH_TRANSLATION_MARKER, REFINED_ARABIC_MARKER
+
+MARKERS = {REFINED_ARABIC_MARKER: "refined", ENGLISH_TRANSLATION_MARKER: "translation"}
+
+
+async def chunks(parts):
+    for part in parts:
+        yield part
+
+
+def read_sections(parts, fallbacks=None):
+    async def run():
+        stream = SectionedStream(chunks(parts), MARKERS, fallbacks)
+        try:
+            sections = {}
+            for name in ("refined", "translation"):
+                sections[name] = "".join([chunk async for chunk in stream.section(name)])
+            return sections, stream
+        finally:
+            await stream.aclose()
+    return asyncio.run(run())
+
+
+def test_sections_split_on_markers():
+    parts = ["<<ARABIC>>\n", "المريض يعاني  من صداع", "\n<<ENGLISH>>\n", "The patient has  a headache."]
+    sections, stream = read_sections(parts)
+
+    assert sections == {"refined": "المريض يعاني  من صداع", "translation": "The patient has  a headache."}
+    assert stream.text == sections
+
+
+def test_markers_split_across_chunks():
+    text = "<<ARABIC>> حرارة وكحة <<ENGLISH>> Fever and cough"
+    sections, _ = read_sections(list(text))
+
+    assert sections == {"refined": "حرارة وكحة", "translation": "Fever and cough"}
+
+
+def test_text_before_first_marker_belongs_to_first_section():
+    sections, _ = read_sections(["ضغط الدم مرتفع ", "<<ENG", "LISH>> High blood pressure"])
+
+    assert sections == {"refined": "ضغط الدم مرتفع", "translation": "High blood pressure"}
+
+
+def test_partial_marker_prefix_that_is_text_is_kept():
+    sections, _ = read_sections(["<<ARABIC>> a << b", " c <<ENGLISH>> d"])
+
+    assert sections == {"refined": "a << b c", "translation": "d"}
+
+
+def test_empty_section_uses_fallback():
+    async def translate():
+        yield "Fallback "
+        yield "translation"
+
+    sections, _ = read_sections(["<<ARABIC>> نص مكرر <<ENGLISH>>  \n"], fallbacks={"translation": translate})
+
+    assert sections == {"refined": "نص مكرر", "translation": "Fallback translation"}
@@ -0,0 +1,64 @@
+import asyncio
+
+import orjson
+
+from utils.sse import coalesce_chunks, encode_event
+
+
+def chunk(phase, text):
+    return {"phase": phase, "status": "streaming", "chunk": text}
+
+
+async def source(events, delay=0.0):
+    for event in events:
+        if delay:
+            await asyncio.sleep(delay)
+        yield event
+
+
+def coalesce(events, delay=0.0, **kwargs):
+    async def run():
+        return [event async for event in coalesce_chunks(source(events, delay), **kwargs)]
+    return asyncio.run(run())
+
+
+def test_chunks_merge_and_flush_before_other_events():
+    complete = {"phase": "refine_text", "status": "complete", "timing": 1.5}
+    events = [chunk("refine_text", "Chest "), chunk("refine_text", "pain  "), chunk("refine_text", "since\n"), complete]
+
+    assert coalesce(events, interval=10) == [chunk("refine_text", "Chest pain  since\n"), complete]
+
+
+def test_chunk_events_with_extra_keys_are_passed_through():
+    tagged = {"phase": "refine_text", "status": "streaming", "chunk": "b", "section": 2}
+    events = [chunk("refine_text", "a"), tagged, chunk("refine_text", "c")]
+
+    assert coalesce(events, interval=10) == [chunk("refine_text", "a"), tagged, chunk("refine_text", "c")]
+
+
+def test_byte_budget_flushes_early():
+    events = [chunk("translation", "ألم ") for _ in range(6)]
+    merged = coalesce(events, interval=10, max_bytes=16)
+
+    assert "".join(event["chunk"] for event in merged) == "ألم " * 6
+    assert [len(event["chunk"]) for event in merged] == [12, 12]
+
+
+def test_interval_flushes_while_source_is_slow():
+    events = [chunk("questions", "one "), chunk("questions", "two ")]
+    merged = coalesce(events, delay=0.05, interval=0.01)
+
+    assert merged == events
+
+
+def test_zero_interval_disables_coalescing():
+    events = [chunk("questions", "one "), chunk("questions", "two ")]
+
+    assert coalesce(events, interval=0) == events
+
+
+def test_encode_event_keeps_non_ascii():
+    frame = encode_event({"phase": "translation", "chunk": "صداع"})
+
+    assert frame.startswith(b"data: ") and frame.endswith(b"\n\n")
+    assert orjson.loads(frame[len(b"data: "):]) == {"phase": "translation", "chunk": "صداع"}
@@ -0,0 +1,184 @@
+import asyncio
+
+import pytest
+
+from core import audio_preprocessing
+from core.audio_preprocessing import _interleave, run_pipeline_streaming
+from model.extract_features import ExtractFeature
+from model.llm_service import LLMService
+from model.speech_service import SpeechService
+
+
+async def text_stream(*chunks):
+    for chunk in chunks:
+        yield chunk
+
+
+class StubPipeline:
+    """Scripted speech and LLM stages; records which stages ran and which were closed."""
+
+    def __init__(self, monkeypatch, transcript):
+        self.started = []
+        self.closed = []
+        self.hold = {}
+        stubs = {
+            (SpeechService, "transcribe_audio_stream"): self._transcribe(transcript),
+            (LLMService, "refine_en_transcription_stream"): self._stage("refine", transcript),
+            (LLMService, "refine_ar_transcription_stream"): self._stage("refine", transcript),
+            (LLMService, "translate_to_eng_stream"): self._stage("translate", "Translated text."),
+            (ExtractFeature, "extract_stream"): self._stage("extract", '{"json_data": {}, "reasoning": ""}'),
+            (LLMService, "generate_questions_stream"): self._stage("questions", '{"questions": [], "reasoning": ""}'),
+        }
+        for (owner, name), stub in stubs.items():
+            monkeypatch.setattr(owner, name, staticmethod(stub))
+
+    def _transcribe(self, transcript):
+        async def transcribe(audio_source, **kwargs):
+            yield None, {"duration": 1.0}
+            yield transcript, None
+        return transcribe
+
+    def _stage(self, name, text):
+        async def stage(*args, **kwargs):
+            self.started.append(name)
+            try:
+                yield text[: len(text) // 2]
+                if name in self.hold:
+                    await self.hold[name].wait()
+                yield text[len(text) // 2:]
+            finally:
+                self.closed.append(name)
+        return stage
+
+
+def pipeline(audio_path, language="en"):
+    return run_pipeline_streaming(
+        visit_id="test-visit", language=language, patient_name="", patient_id="", save=False, audio_path=str(audio_path)
+    )
+
+
+@pytest.fixture
+def audio_path(tmp_path):
+    path = tmp_path / "visit.wav"
+    path.write_bytes(b"RIFF")
+    return path
+
+
+def test_interleave_cancels_streams_when_closed():
+    closed = []
+
+    async def stream(name):
+        try:
+            yield name
+            await asyncio.Event().wait()
+        finally:
+            closed.append(name)
+
+    async def run():
+        events = _interleave(stream("extraction"), stream("questions"))
+        seen = {await anext(events), await anext(events)}
+        await events.aclose()
+        return seen
+
+    assert asyncio.run(run()) == {"extraction", "questions"}
+    assert sorted(closed) == ["extraction", "questions"]
+
+
+def test_disconnect_during_extraction_closes_both_llm_streams(monkeypatch, audio_path):
+    stubs = StubPipeline(monkeypatch, "The patient has fever, cough and chest pain; prescribed paracetamol 500 mg.")
+
+    async def run():
+        stubs.hold = {"extract": asyncio.Event(), "questions": asyncio.Event()}
+        events = pipeline(audio_path)
+        async for event in events:
+            if event["phase"] in ("extraction", "questions") and event["status"] == "streaming":
+                break
+        # What the SSE response does when the client goes away
+        await events.aclose()
+        return list(stubs.closed)
+
+    closed = asyncio.run(run())
+    assert {"extract", "questions"} <= set(closed)
+
+
+# Heart-failure dictation with none of the lexicon's terms
+NO_LEXICON_HITS = {
+    "en": (
+        "Echocardiogram showed a reduced ejection fraction of thirty percent with left ventricular dilation. "
+        "Started furosemide and spironolactone, titrate carvedilol, and recheck potassium and creatinine next week."
+    ),
+    "ar": (
+        "أظهر تخطيط صدى القلب انخفاض نسبة الضخ إلى ثلاثين بالمئة مع توسع البطين الأيسر. "
+        "بدأنا فوروسيميد وسبيرونولاكتون ونزيد كارفيديلول تدريجيا ونعيد قياس البوتاسيوم والكرياتينين الأسبوع القادم."
+    ),
+}
+
+
+def stub_llm_validation(monkeypatch, classification, confidence):
+    calls = []
+
+    async def call_llm_api_async(**kwargs):
+        calls.append(kwargs["prompt"])
+        return f'{{"classification": "{classification}", "confidence": {confidence}}}'
+
+    monkeypatch.setattr(LLMService, "_call_llm_api_async", staticmethod(call_llm_api_async))
+    return calls
+
+
+def run_to_end(audio_path, language):
+    async def run():
+        return [event async for event in pipeline(audio_path, language)]
+    return asyncio.run(run())
+
+
+@pytest.mark.parametrize("language", ["en", "ar"])
+def test_medical_transcript_without_lexicon_hits_runs_every_stage(monkeypatch, audio_path, language):
+    stubs = StubPipeline(monkeypatch, NO_LEXICON_HITS[language])
+    llm_calls = stub_llm_validation(monkeypatch, "MEDICAL", 92)
+
+    events = run_to_end(audio_path, language)
+
+    assert events[-1]["phase"] == "complete"
+    assert not any(event["phase"] == "short_circuit" for event in events)
+    expected = {"refine", "extract", "questions"} | ({"translate"} if language == "ar" else set())
+    assert set(stubs.started) == expected
+    assert len(llm_calls) == 1
+    result = events[-1]["result"]
+    assert result["classification"] == "MEDICAL"
+    assert result["meta"]["validation_method"] == "llm_validation"
+
+
+def test_llm_confirmed_non_medical_short_circuits(monkeypatch, audio_path):
+    transcript = "Let's meet at the cafe on Friday after the football match and then go shopping for the birthday party gifts together with everyone."
+    stubs = StubPipeline(monkeypatch, transcript)
+    stub_llm_validation(monkeypatch, "NON_MEDICAL", 97)
+
+    events = run_to_end(audio_path, "en")
+
+    assert events[-1]["phase"] == "short_circuit"
+    assert events[-1]["result"]["meta"]["validation_method"] == "llm_validation"
+    assert "extract" not in stubs.started and "questions" not in stubs.started
+
+
+def payload(classification, confidence, method):
+    return {
+        "classification": classification,
+        "is_medical": classification == "MEDICAL",
+        "confidence": confidence,
+        "meta": {"validation_method": method},
+    }
+
+
+@pytest.mark.parametrize(
+    "final_payload, expected",
+    [
+        (payload("NON_MEDICAL", 97, "llm_validation"), True),
+        (payload("NON_MEDICAL", 50, "llm_validation"), False),
+        (payload("NON_MEDICAL", 95, "lexicon"), False),
+        (payload("MEDICAL", 99, "llm_validation"), False),
+        # Failed validation: no classification
+        (payload(None, 0, None), False),
+    ],
+)
+def test_is_confidently_non_medical(final_payload, expected):
+    assert audio_preprocessing._is_confidently_non_medical(final_payload) is expected
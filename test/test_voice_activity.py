@@ -0,0 +1,59 @@
+import numpy as np
+
+from model.voice_activity import VoiceActivityDetector
+
+SR = 16000
+
+
+def talker(seconds, level_db, rng):
+    """Speech-like signal: noise with a 4 Hz syllable envelope, at level_db relative to full scale."""
+    t = np.arange(int(seconds * SR)) / SR
+    envelope = 0.8 + 0.2 * np.sin(2 * np.pi * 4 * t)
+    return (rng.standard_normal(len(t)) * envelope * 10 ** (level_db / 20)).astype(np.float32)
+
+
+def conversation(turns, pause_seconds=0.0, noise_db=-70.0, seed=0):
+    """Alternating loud (-10 dBFS) and quiet (-25 dBFS) talkers; returns the signal and turn spans."""
+    rng = np.random.default_rng(seed)
+    parts, spans, position = [], [], 0
+    for i in range(turns):
+        turn = talker(3.0, -10.0 if i % 2 == 0 else -25.0, rng)
+        spans.append((position, position + len(turn)))
+        parts.append(turn)
+        position += len(turn)
+        if pause_seconds:
+            # Stationary background noise
+            pause = (rng.standard_normal(int(pause_seconds * SR)) * 10 ** (noise_db / 20)).astype(np.float32)
+            parts.append(pause)
+            position += len(pause)
+    return np.concatenate(parts), spans
+
+
+def covered(regions, start, end):
+    return any(region_start <= start and end <= region_end for region_start, region_end in regions)
+
+
+def test_two_talkers_without_pauses_lose_no_speech():
+    y, _ = conversation(turns=12)
+
+    stripped, offset_map = VoiceActivityDetector().strip_silence(y, SR)
+
+    assert len(stripped) == len(y)
+    assert offset_map == VoiceActivityDetector.identity_map(len(y) / SR)
+
+
+def test_quiet_talker_is_kept_when_real_pauses_are_stripped():
+    y, spans = conversation(turns=12, pause_seconds=1.5)
+
+    regions = VoiceActivityDetector().speech_regions(y, SR)
+    stripped, _ = VoiceActivityDetector().strip_silence(y, SR)
+
+    assert all(covered(regions, start, end) for start, end in spans)
+    assert len(stripped) < len(y) - 8 * SR
+
+
+def test_recording_without_pauses_at_the_floor_is_kept():
+    rng = np.random.default_rng(1)
+    y = talker(20.0, -10.0, rng)
+
+    assert VoiceActivityDetector().speech_regions(y, SR).tolist() == [[0, len(y)]]